@@ -0,0 +1,170 @@
+"""
+Cache effectiveness metrics per key family (``home_page``, ``treks``, ...).
+
+``InstrumentedLocMemCache`` counts hits, misses, sets, evictions and stored
+bytes; ``get_or_compute`` reports how long rebuilds take. Each process keeps
+its counters in memory and writes them to ``CACHE_METRICS_DIR/<pid>-<id>.json``
+at most every ``CACHE_METRICS_FLUSH_INTERVAL`` seconds. ``metrics_view`` sums
+the files of every process (past ones included, so totals never go down
+while the directory lives) and serves them in Prometheus text format to
+requests bearing ``METRICS_TOKEN``.
+"""
+import glob
+import hmac
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+import uuid
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.core.cache.backends.locmem import LocMemCache
+from django.http import Http404, HttpResponse
+
+from .server_timing import record_cache
+
+logger = logging.getLogger(__name__)
+
+COUNTERS = {
+    "hits": "Cache reads that found a value.",
+    "misses": "Cache reads that found nothing or an expired value.",
+    "sets": "Values written to the cache.",
+    "evictions": "Entries culled to make room.",
+    "set_bytes": "Pickled bytes written to the cache.",
+    "computes": "Values rebuilt by get_or_compute.",
+    "compute_seconds": "Time spent rebuilding values in get_or_compute.",
+}
+
+_lock = threading.Lock()
+_stats = defaultdict(lambda: dict.fromkeys(COUNTERS, 0))
+_file = {"path": None, "flushed": 0.0}
+_MISSING = object()
+
+
+def _reset():
+    """Start a forked worker with its own counters and file."""
+    global _lock
+    _lock = threading.Lock()
+    _stats.clear()
+    _file.update(path=None, flushed=0.0)
+
+
+os.register_at_fork(after_in_child=_reset)
+
+
+def key_family(key):
+    """Map a cache key (with or without the ":version:" prefix) to its family."""
+    key = key.split(":", 2)[-1] if key.startswith(":") else key
+    if key.endswith(":refresh_lock"):
+        return "refresh_lock"
+    for prefix in settings.CACHE_KEY_FAMILIES:
+        if key.startswith(prefix):
+            return prefix.rstrip("_")
+    return "other"
+
+
+def record(key, **increments):
+    family = key_family(key)
+    with _lock:
+        stats = _stats[family]
+        for name, value in increments.items():
+            stats[name] += value
+    if settings.CACHE_METRICS_DIR and time.monotonic() - _file["flushed"] >= settings.CACHE_METRICS_FLUSH_INTERVAL:
+        flush()
+
+
+def record_compute(key, seconds):
+    record(key, computes=1, compute_seconds=seconds)
+
+
+def snapshot():
+    with _lock:
+        return {family: dict(stats) for family, stats in _stats.items()}
+
+
+def flush():
+    """Write this process's counters to its file in CACHE_METRICS_DIR."""
+    _file["flushed"] = time.monotonic()
+    directory = settings.CACHE_METRICS_DIR
+    if _file["path"] is None:
+        _file["path"] = os.path.join(directory, f"{os.getpid()}-{uuid.uuid4().hex[:8]}.json")
+    try:
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(snapshot(), f)
+        os.replace(tmp, _file["path"])
+    except OSError:
+        logger.exception("Could not write cache metrics to %s", directory)
+
+
+def clear():
+    """Drop every process's counters; run when the server (re)starts."""
+    if settings.CACHE_METRICS_DIR:
+        for path in glob.glob(os.path.join(settings.CACHE_METRICS_DIR, "*.json")):
+            os.remove(path)
+
+
+def combined():
+    """Counters summed over every process that wrote to CACHE_METRICS_DIR (or just this one)."""
+    if not settings.CACHE_METRICS_DIR:
+        return snapshot()
+    flush()
+    totals = defaultdict(lambda: dict.fromkeys(COUNTERS, 0))
+    for path in glob.glob(os.path.join(settings.CACHE_METRICS_DIR, "*.json")):
+        try:
+            with open(path) as f:
+                stats = json.load(f)
+        except (OSError, ValueError):
+            continue
+        for family, counters in stats.items():
+            for name, value in counters.items():
+                if name in COUNTERS:
+                    totals[family][name] += value
+    return dict(totals)
+
+
+class InstrumentedLocMemCache(LocMemCache):
+    def get(self, key, default=None, version=None):
+        started = time.perf_counter()
+        value = super().get(key, _MISSING, version=version)
+        hit = value is not _MISSING
+        record_cache(hit, time.perf_counter() - started)
+        record(key, **{"hits" if hit else "misses": 1})
+        return value if hit else default
+
+    def _set(self, key, value, timeout=DEFAULT_TIMEOUT):
+        record(key, sets=1, set_bytes=len(value))
+        # A full cache culls entries while storing; whatever is gone afterwards was evicted.
+        before = list(self._cache) if len(self._cache) >= self._max_entries else ()
+        super()._set(key, value, timeout)
+        for culled in before:
+            if culled not in self._cache:
+                record(culled, evictions=1)
+
+
+def render_metrics():
+    lines = []
+    stats = combined()
+    for name, help_text in COUNTERS.items():
+        metric = f"aorbo_cache_{name}_total"
+        lines.append(f"# HELP {metric} {help_text}")
+        lines.append(f"# TYPE {metric} counter")
+        for family in sorted(stats):
+            lines.append(f'{metric}{{family="{family}"}} {stats[family][name]}')
+    return "\n".join(lines) + "\n"
+
+
+def metrics_view(request):
+    """Prometheus scrape target, authenticated with ``Authorization: Bearer <METRICS_TOKEN>``."""
+    token = settings.METRICS_TOKEN
+    if not token:
+        raise Http404
+    scheme, _, given = request.headers.get("Authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not hmac.compare_digest(given.strip().encode(), token.encode()):
+        return HttpResponse("Unauthorized\n", status=401, content_type="text/plain", headers={"WWW-Authenticate": "Bearer"})
+    return HttpResponse(render_metrics(), content_type="text/plain; version=0.0.4")
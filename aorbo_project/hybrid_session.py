@@ -0,0 +1,67 @@
+"""
+Hybrid session engine (``SESSION_ENGINE = "aorbo_project.hybrid_session"``).
+
+Sessions without a logged-in user are stored in the cookie itself, signed
+like ``django.contrib.sessions.backends.signed_cookies``, so anonymous
+visitors never read or write ``django_session``. Once a user logs in the
+session moves to ``cached_db`` under a fresh random key; logging out goes
+back to a cookie. Signed cookies are readable by the client, so anonymous
+sessions should only hold non-secret data (they are kept per browser,
+unlike a per-process cache, so every worker sees them).
+
+Expired database rows are removed in batches by ``manage.py
+clear_expired_sessions``.
+"""
+from django.contrib.auth import SESSION_KEY
+from django.contrib.sessions.backends.cached_db import SessionStore as CachedDBStore
+from django.core import signing
+
+SALT = "aorbo_project.hybrid_session"
+
+
+def is_signed(session_key):
+    """Signed payloads contain ':' separators; database keys are [a-z0-9] only."""
+    return bool(session_key) and ":" in session_key
+
+
+class SessionStore(CachedDBStore):
+    def load(self):
+        if not is_signed(self.session_key):
+            return super().load()
+        try:
+            return signing.loads(
+                self.session_key, serializer=self.serializer, salt=SALT, max_age=self.get_session_cookie_age(),
+            )
+        except (signing.BadSignature, ValueError):
+            self._session_key = None
+            return {}
+
+    def create(self):
+        if SESSION_KEY in self._get_session():
+            return super().create()
+        # The key is generated by save(); no database round-trip to find a free one.
+        self._session_key = None
+        self.modified = True
+
+    def save(self, must_create=False):
+        data = self._get_session(no_load=must_create)
+        if SESSION_KEY not in data:
+            if not must_create and self.session_key and not is_signed(self.session_key):
+                super().delete(self.session_key)
+            self._session_key = signing.dumps(data, serializer=self.serializer, salt=SALT, compress=True)
+            return
+        if is_signed(self.session_key):
+            # Just logged in: move to the database under a new random key.
+            self._session_key = None
+        super().save(must_create=must_create)
+
+    def exists(self, session_key):
+        return not is_signed(session_key) and super().exists(session_key)
+
+    def delete(self, session_key=None):
+        key = session_key or self.session_key
+        if not is_signed(key):
+            return super().delete(session_key)
+        if session_key is None:
+            self._session_key = None
+            self._session_cache = {}
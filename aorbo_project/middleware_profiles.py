@@ -0,0 +1,122 @@
+"""
+Path-scoped middleware profiles.
+
+``MIDDLEWARE_PROFILES`` maps a profile name to URL path patterns and the
+middleware it skips. ``MiddlewareProfileMiddleware`` (early in MIDDLEWARE)
+picks the profile for anonymous GET/HEAD requests and the session, auth,
+messages and CSP middleware below are drop-in subclasses of Django's and
+django-csp's that pass straight through when their key is skipped. Requests
+carrying a session or messages cookie always get the full stack, so
+signed-in staff keep their sessions, messages and ``request.user``
+everywhere.
+
+Skipping means: no session load or cookie, ``request.user`` is a plain
+``AnonymousUser``, no message storage, and no CSP nonce. The CSP header is
+built once at startup and copied onto responses that don't customise it,
+skipped or not.
+
+AxesMiddleware is left alone: it only reads a request flag after the view
+and django-axes' system check requires its exact class path.
+"""
+import re
+
+from csp.constants import HEADER, HEADER_REPORT_ONLY
+from csp.middleware import CheckableLazyObject, CSPMiddleware as BaseCSPMiddleware
+from csp.utils import build_policy
+from django.conf import settings
+from django.contrib.auth.middleware import AuthenticationMiddleware as BaseAuthenticationMiddleware
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.messages.middleware import MessageMiddleware as BaseMessageMiddleware
+from django.contrib.sessions.middleware import SessionMiddleware as BaseSessionMiddleware
+
+# Response attributes set by django-csp's decorators; any of them means the
+# header has to be built for this response.
+CSP_RESPONSE_ATTRS = (
+    "_csp_exempt", "_csp_exempt_ro", "_csp_config", "_csp_config_ro",
+    "_csp_update", "_csp_update_ro", "_csp_replace", "_csp_replace_ro",
+)
+
+
+class MiddlewareProfileMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.bypass_cookies = {settings.SESSION_COOKIE_NAME, "messages"}
+        self.profiles = [
+            (re.compile("|".join(f"(?:{pattern})" for pattern in profile["paths"])), frozenset(profile["skip"]))
+            for profile in settings.MIDDLEWARE_PROFILES.values()
+        ]
+
+    def __call__(self, request):
+        request.skip_middleware = self.skipped(request)
+        return self.get_response(request)
+
+    def skipped(self, request):
+        if request.method not in ("GET", "HEAD") or self.bypass_cookies & request.COOKIES.keys():
+            return frozenset()
+        for pattern, skip in self.profiles:
+            if pattern.fullmatch(request.path_info):
+                return skip
+        return frozenset()
+
+
+class ProfiledMixin:
+    """Pass the request straight through when ``profile_key`` is in the request's skip set."""
+
+    profile_key = None
+
+    def __call__(self, request):
+        if self.profile_key in getattr(request, "skip_middleware", ()):
+            return self.skipped(request)
+        return super().__call__(request)
+
+    def skipped(self, request):
+        return self.get_response(request)
+
+
+class SessionMiddleware(ProfiledMixin, BaseSessionMiddleware):
+    profile_key = "session"
+
+
+class AuthenticationMiddleware(ProfiledMixin, BaseAuthenticationMiddleware):
+    profile_key = "auth"
+
+    def skipped(self, request):
+        request.user = AnonymousUser()
+        return self.get_response(request)
+
+
+class MessageMiddleware(ProfiledMixin, BaseMessageMiddleware):
+    profile_key = "messages"
+
+
+class CSPMiddleware(ProfiledMixin, BaseCSPMiddleware):
+    profile_key = "csp"
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        self.header = build_policy()
+        self.header_ro = build_policy(report_only=True)
+        self.precomputed = not any(
+            (getattr(settings, name, None) or {}).get("EXCLUDE_URL_PREFIXES")
+            for name in ("CONTENT_SECURITY_POLICY", "CONTENT_SECURITY_POLICY_REPORT_ONLY")
+        )
+
+    def skipped(self, request):
+        return self.process_response(request, self.get_response(request))
+
+    def process_response(self, request, response):
+        nonce = getattr(request, "_csp_nonce", None)
+        debug_page = settings.DEBUG and response.status_code in (404, 500)
+        if (
+            not self.precomputed or nonce is not None or debug_page
+            or any(hasattr(response, attr) for attr in CSP_RESPONSE_ATTRS)
+        ):
+            return super().process_response(request, response)
+
+        if self.header and HEADER not in response:
+            response[HEADER] = self.header
+        if self.header_ro and HEADER_REPORT_ONLY not in response:
+            response[HEADER_REPORT_ONLY] = self.header_ro
+        if hasattr(request, "csp_nonce"):
+            request.csp_nonce = CheckableLazyObject(self._csp_nonce_post_response)
+        return response
@@ -0,0 +1,126 @@
+import gzip
+import hashlib
+import time
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse, HttpResponseNotModified
+from django.urls import Resolver404, resolve
+from django.utils.cache import cc_delim_re, patch_vary_headers
+from django.utils.http import http_date, parse_http_date_safe
+
+from treks_app.versions import get_version
+
+# Headers we set ourselves when replaying an entry
+SKIPPED_HEADERS = {"content-length", "content-encoding", "etag", "last-modified", "vary", "set-cookie"}
+
+
+class PageCacheMiddleware:
+    """
+    Full-page cache for anonymous GET/HEAD traffic to the views listed in
+    ``PAGE_CACHE_VIEWS``.
+
+    Entries hold the rendered body gzip-compressed once at store time, plus a
+    strong ETag and Last-Modified, keyed by host and a normalized URL and
+    versioned by the "pages" content counter. A hit never reaches the inner
+    middleware, the view or the template engine; conditional requests are
+    answered with 304.
+
+    Sits above SessionMiddleware: requests carrying a session or message
+    cookie or an Origin header (CORS), and responses that set cookies or
+    vary on anything but Accept-Encoding/Origin, are passed through
+    untouched.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.views = set(settings.PAGE_CACHE_VIEWS)
+        self.bypass_cookies = {settings.SESSION_COOKIE_NAME, "messages"}
+
+    def __call__(self, request):
+        if not self.is_cacheable_request(request):
+            return self.get_response(request)
+
+        key = self.cache_key(request)
+        entry = cache.get(key)
+        if entry is None:
+            response = self.get_response(request)
+            if not self.is_cacheable_response(response):
+                return response
+            entry = self.make_entry(response)
+            cache.set(key, entry, settings.PAGE_CACHE_TIMEOUT)
+        return self.respond(request, entry)
+
+    def is_cacheable_request(self, request):
+        if request.method not in ("GET", "HEAD"):
+            return False
+        if self.bypass_cookies & request.COOKIES.keys() or "HTTP_ORIGIN" in request.META:
+            return False
+        if set(request.GET) - set(settings.PAGE_CACHE_QUERY_PARAMS) - set(settings.PAGE_CACHE_IGNORED_PARAMS):
+            return False
+        try:
+            match = resolve(request.path_info)
+        except Resolver404:
+            return False
+        return match.url_name in self.views
+
+    def cache_key(self, request):
+        params = sorted(
+            (name, value)
+            for name in settings.PAGE_CACHE_QUERY_PARAMS
+            for value in request.GET.getlist(name)
+        )
+        url = f"{request.scheme}://{request.get_host()}{request.path}?{urlencode(params)}"
+        digest = hashlib.sha256(url.encode()).hexdigest()
+        return f"page_{get_version('pages')}_{digest}"
+
+    def is_cacheable_response(self, response):
+        if response.status_code != 200 or response.streaming or response.cookies:
+            return False
+        if response.has_header("Content-Encoding"):
+            return False
+        cache_control = response.get("Cache-Control", "").lower()
+        if "private" in cache_control or "no-store" in cache_control:
+            return False
+        vary = {h.strip().lower() for h in cc_delim_re.split(response.get("Vary", "")) if h.strip()}
+        return vary <= {"accept-encoding", "origin"}
+
+    def make_entry(self, response):
+        body = response.content
+        return {
+            "status": response.status_code,
+            "headers": [(k, v) for k, v in response.items() if k.lower() not in SKIPPED_HEADERS],
+            "gzip": gzip.compress(body, compresslevel=6, mtime=0),
+            "etag": hashlib.sha256(body).hexdigest()[:32],
+            "last_modified": int(time.time()),
+        }
+
+    def respond(self, request, entry):
+        use_gzip = "gzip" in request.META.get("HTTP_ACCEPT_ENCODING", "")
+        etag = '"%s%s"' % (entry["etag"], "-gz" if use_gzip else "")
+
+        if self.not_modified(request, entry):
+            response = HttpResponseNotModified()
+        else:
+            body = entry["gzip"] if use_gzip else gzip.decompress(entry["gzip"])
+            response = HttpResponse(b"" if request.method == "HEAD" else body, status=entry["status"])
+            for header, value in entry["headers"]:
+                response[header] = value
+            response["Content-Length"] = str(len(body))
+            if use_gzip:
+                response["Content-Encoding"] = "gzip"
+
+        response["ETag"] = etag
+        response["Last-Modified"] = http_date(entry["last_modified"])
+        response["Cache-Control"] = "max-age=0, must-revalidate"
+        patch_vary_headers(response, ("Accept-Encoding", "Cookie", "Origin"))
+        return response
+
+    def not_modified(self, request, entry):
+        if_none_match = request.META.get("HTTP_IF_NONE_MATCH")
+        if if_none_match is not None:
+            tags = {t.strip().removeprefix("W/").strip('"') for t in if_none_match.split(",")}
+            return "*" in tags or bool(tags & {entry["etag"], entry["etag"] + "-gz"})
+        since = parse_http_date_safe(request.META.get("HTTP_IF_MODIFIED_SINCE", ""))
+        return since is not None and since >= entry["last_modified"]
@@ -0,0 +1,154 @@
+"""
+Slow and repeated query tracing.
+
+For sampled requests every query is recorded with its duration, the shape of
+its parameters, the view, the innermost project code line and, when it runs
+while a template renders, the template file and line. Queries slower than
+``QUERY_TRACER_SLOW_MS`` and statements repeated ``QUERY_TRACER_REPEAT_THRESHOLD``
+times from the same place (N+1) are written as JSON lines to the
+"aorbo.query_tracer" logger, which ``query_report_view`` reads back.
+"""
+import json
+import logging
+import os
+import random
+import sys
+import time
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.contrib import admin
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+from django.template.base import Node
+from django.template.response import TemplateResponse
+
+logger = logging.getLogger("aorbo.query_tracer")
+
+BASE_DIR = str(settings.BASE_DIR) + os.sep
+# Frames in these files are plumbing; attribute their queries to the caller.
+SKIPPED_PREFIXES = (
+    os.path.dirname(__file__) + os.sep,
+    os.path.join(BASE_DIR, "treks_app", "caching.py"),
+)
+
+
+def _param_shape(params, many):
+    if many:
+        params = next(iter(params), ())
+    if isinstance(params, dict):
+        return {name: type(value).__name__ for name, value in params.items()}
+    return [type(value).__name__ for value in params or ()]
+
+
+def _attribute(frame):
+    """Return ("template.html:12" or None, "treks_app/views.py:80" or None) for a query."""
+    template = code = None
+    while frame is not None and (template is None or code is None):
+        if template is None:
+            node = frame.f_locals.get("self")
+            # type(), not isinstance(): the latter would evaluate lazy objects.
+            if issubclass(type(node), Node) and node.token is not None:
+                template = f"{node.origin.template_name}:{node.token.lineno}"
+        if code is None:
+            filename = frame.f_code.co_filename
+            if (filename.startswith(BASE_DIR) and "site-packages" not in filename
+                    and not filename.startswith(SKIPPED_PREFIXES)):
+                code = f"{os.path.relpath(filename, BASE_DIR)}:{frame.f_lineno}"
+        frame = frame.f_back
+    return template, code
+
+
+class QueryTrace:
+    def __init__(self, request):
+        self.request = request
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - started
+            template, code = _attribute(sys._getframe(1))
+            self.queries.append((sql, duration, _param_shape(params, many), template, code))
+
+    def findings(self):
+        match = self.request.resolver_match
+        base = {"path": self.request.path, "view": match.view_name if match else None}
+        slow_seconds = settings.QUERY_TRACER_SLOW_MS / 1000
+
+        for sql, duration, shape, template, code in self.queries:
+            if duration >= slow_seconds:
+                yield {
+                    **base, "kind": "slow", "sql": sql, "params": shape,
+                    "ms": round(duration * 1000, 2), "template": template, "code": code,
+                }
+
+        repeats = defaultdict(list)
+        for sql, duration, shape, template, code in self.queries:
+            repeats[sql, template, code].append(duration)
+        for (sql, template, code), durations in repeats.items():
+            if len(durations) >= settings.QUERY_TRACER_REPEAT_THRESHOLD:
+                yield {
+                    **base, "kind": "repeated", "sql": sql, "count": len(durations),
+                    "ms": round(sum(durations) * 1000, 2), "template": template, "code": code,
+                }
+
+
+class QueryTracerMiddleware:
+    def __init__(self, get_response):
+        if not settings.QUERY_TRACER_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if random.random() >= settings.QUERY_TRACER_SAMPLE_RATE:
+            return self.get_response(request)
+
+        trace = QueryTrace(request)
+        with connection.execute_wrapper(trace):
+            response = self.get_response(request)
+        for finding in trace.findings():
+            logger.warning(json.dumps(finding))
+        return response
+
+
+def read_findings(limit):
+    """The most recent ``limit`` findings from the log file and its rotated copies."""
+    findings = []
+    path = settings.QUERY_TRACER_LOG
+    for candidate in [path] + [f"{path}.{n}" for n in range(1, settings.QUERY_TRACER_LOG_BACKUPS + 1)]:
+        if len(findings) >= limit or not os.path.exists(candidate):
+            break
+        with open(candidate, encoding="utf-8") as f:
+            lines = f.readlines()
+        for line in reversed(lines):
+            try:
+                findings.append(json.loads(line))
+            except ValueError:
+                continue
+            if len(findings) >= limit:
+                break
+    return findings
+
+
+def query_report_view(request):
+    """Admin page grouping logged findings by kind, view, location and statement."""
+    groups = {}
+    occurrences = Counter()
+    for finding in read_findings(settings.QUERY_TRACER_REPORT_LIMIT):
+        key = (finding["kind"], finding["view"], finding["template"], finding["code"], finding["sql"])
+        occurrences[key] += 1
+        group = groups.setdefault(key, {**finding, "max_ms": 0})
+        group["max_ms"] = max(group["max_ms"], finding["ms"])
+    rows = sorted(groups.values(), key=lambda g: g["max_ms"], reverse=True)
+    for row in rows:
+        row["occurrences"] = occurrences[row["kind"], row["view"], row["template"], row["code"], row["sql"]]
+    return TemplateResponse(request, "admin/query_report.html", {
+        **admin.site.each_context(request),
+        "title": "Slow and repeated queries",
+        "rows": rows,
+        "slow_ms": settings.QUERY_TRACER_SLOW_MS,
+        "repeat_threshold": settings.QUERY_TRACER_REPEAT_THRESHOLD,
+    })
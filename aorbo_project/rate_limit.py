@@ -0,0 +1,164 @@
+"""
+Token-bucket rate limiting for plain Django views.
+
+``RATE_LIMITS`` maps URL names to a policy: ``rate`` ("5/min", "2/s", ...),
+``burst`` (bucket size), the ``methods`` it applies to and whether clients
+are told apart by ``ip`` or ``session``. A session only counts once it is
+known to the session store (a logged-in user's database session); anyone can
+make up a cookie, so other requests fall back to the IP. Each client gets a
+bucket per route that refills at ``rate`` and holds up to ``burst`` tokens; a
+request spends one token, and a request that finds the bucket empty gets a
+429 with ``Retry-After``, as JSON or as an HTML page depending on what the
+client accepts.
+
+Requests carrying a valid ``exempt_token()`` in ``EXEMPT_HEADER`` (the cache
+warmup, see treks_app.warmup) are not limited.
+
+Buckets live in process memory by default. With ``RATE_LIMIT_BACKEND =
+"cache"`` they are kept in the default cache instead, which shares them
+between workers when that cache is shared (Redis, Memcached). Cache updates
+are not atomic, so two workers racing on one bucket may both let a request
+through; the limit stays approximately right.
+"""
+import math
+import threading
+import time
+from collections import OrderedDict
+from importlib import import_module
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import HttpResponse, JsonResponse
+from django.template.loader import render_to_string
+
+PERIODS = {"s": 1, "sec": 1, "m": 60, "min": 60, "h": 3600, "hour": 3600, "d": 86400, "day": 86400}
+
+EXEMPT_HEADER = "X-RateLimit-Exempt"
+EXEMPT_SALT = "aorbo_project.rate_limit.exempt"
+EXEMPT_MAX_AGE = 60 * 60 * 24
+
+
+def parse_rate(rate):
+    """'5/min' -> tokens per second."""
+    count, period = rate.split("/")
+    return int(count) / PERIODS[period]
+
+
+def take(state, now, rate, burst):
+    """
+    Spend one token from ``state`` ((tokens, updated_at) or None for a full
+    bucket). Returns (new state, seconds to wait or 0 if allowed).
+    """
+    tokens, updated = state if state else (burst, now)
+    tokens = min(burst, tokens + (now - updated) * rate)
+    if tokens >= 1:
+        return (tokens - 1, now), 0
+    return (tokens, now), (1 - tokens) / rate
+
+
+class MemoryBuckets:
+    def __init__(self, max_keys):
+        self.max_keys = max_keys
+        self.buckets = OrderedDict()
+        self.lock = threading.Lock()
+
+    def hit(self, key, rate, burst, timeout):
+        with self.lock:
+            state, wait = take(self.buckets.get(key), time.monotonic(), rate, burst)
+            self.buckets[key] = state
+            self.buckets.move_to_end(key)
+            while len(self.buckets) > self.max_keys:
+                self.buckets.popitem(last=False)
+        return wait
+
+
+class CacheBuckets:
+    def hit(self, key, rate, burst, timeout):
+        key = f"ratelimit:{key}"
+        state, wait = take(cache.get(key), time.time(), rate, burst)
+        cache.set(key, state, timeout)
+        return wait
+
+
+def client_ip(request):
+    """Client address, trusting the last RATE_LIMIT_PROXY_COUNT X-Forwarded-For hops."""
+    forwarded = request.META.get("HTTP_X_FORWARDED_FOR")
+    hops = settings.RATE_LIMIT_PROXY_COUNT
+    if forwarded and hops:
+        addresses = [address.strip() for address in forwarded.split(",")]
+        return addresses[max(0, len(addresses) - hops)]
+    return request.META.get("REMOTE_ADDR", "")
+
+
+def exempt_token():
+    """Value for EXEMPT_HEADER, valid for EXEMPT_MAX_AGE seconds wherever SECRET_KEY is the same."""
+    return signing.dumps("exempt", salt=EXEMPT_SALT)
+
+
+def is_exempt(request):
+    token = request.headers.get(EXEMPT_HEADER)
+    if not token:
+        return False
+    try:
+        return signing.loads(token, salt=EXEMPT_SALT, max_age=EXEMPT_MAX_AGE) == "exempt"
+    except signing.BadSignature:
+        return False
+
+
+class RateLimitMiddleware:
+    def __init__(self, get_response):
+        if not settings.RATE_LIMIT_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.policies = {
+            name: {
+                "rate": parse_rate(policy["rate"]),
+                "burst": policy.get("burst", 1),
+                "methods": set(policy.get("methods", ["GET", "POST"])),
+                "key": policy.get("key", "ip"),
+            }
+            for name, policy in settings.RATE_LIMITS.items()
+        }
+        self.session_store = import_module(settings.SESSION_ENGINE).SessionStore
+        if settings.RATE_LIMIT_BACKEND == "cache":
+            self.buckets = CacheBuckets()
+        else:
+            self.buckets = MemoryBuckets(settings.RATE_LIMIT_MAX_CLIENTS)
+
+    def __call__(self, request):
+        return self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        name = request.resolver_match.url_name if request.resolver_match else None
+        policy = self.policies.get(name)
+        if policy is None or request.method not in policy["methods"] or is_exempt(request):
+            return None
+
+        client = self.session(request) if policy["key"] == "session" else None
+        client = client or f"ip:{client_ip(request)}"
+        # Long enough for an idle bucket to refill completely.
+        timeout = math.ceil(policy["burst"] / policy["rate"]) + 1
+        wait = self.buckets.hit(f"{name}:{client}", policy["rate"], policy["burst"], timeout)
+        if not wait:
+            return None
+        return self.too_many_requests(request, math.ceil(wait))
+
+    def session(self, request):
+        """Bucket key for the request's session if the session store knows it, else None."""
+        key = request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+        if key and self.session_store().exists(key):
+            return f"session:{key}"
+        return None
+
+    def too_many_requests(self, request, retry_after):
+        message = "Too many requests, please try again shortly."
+        if request.get_preferred_type(["application/json", "text/html"]) == "text/html":
+            response = HttpResponse(
+                render_to_string("429.html", {"message": message, "retry_after": retry_after}), status=429,
+            )
+        else:
+            response = JsonResponse({"error": message}, status=429)
+        response["Retry-After"] = str(retry_after)
+        return response
@@ -0,0 +1,139 @@
+"""
+Per-request timing breakdown: database, cache, template rendering, view and
+total time, sent as a ``Server-Timing`` header and logged as one JSON line.
+
+Only sampled requests (``SERVER_TIMING_SAMPLE_RATE``) are measured; with
+``SERVER_TIMING_ENABLED = False`` the middleware removes itself at startup.
+Code elsewhere reports into the current request through ``record_cache``.
+"""
+import json
+import logging
+import random
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+from django.template.backends.django import DjangoTemplates, Template
+
+logger = logging.getLogger("aorbo.server_timing")
+
+_current = ContextVar("server_timing", default=None)
+
+
+class RequestTimings:
+    def __init__(self):
+        self.db_count = 0
+        self.db_time = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.cache_time = 0.0
+        self.template_time = 0.0
+        self.view_start = None
+        self.view_time = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        # connection.execute_wrapper hook
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - started
+            self.db_count += 1
+
+    def metrics(self, total):
+        return [
+            ("db", self.db_time, f"{self.db_count} queries"),
+            ("cache", self.cache_time, f"{self.cache_hits} hits, {self.cache_misses} misses"),
+            ("tpl", self.template_time, "templates"),
+            ("view", self.view_time, "view"),
+            ("total", total, "total"),
+        ]
+
+
+def record_cache(hit, seconds):
+    """Count a cache lookup against the current request, if it is being timed."""
+    timings = _current.get()
+    if timings is not None:
+        if hit:
+            timings.cache_hits += 1
+        else:
+            timings.cache_misses += 1
+        timings.cache_time += seconds
+
+
+class TimedTemplate(Template):
+    def render(self, context=None, request=None):
+        timings = _current.get()
+        if timings is None:
+            return super().render(context, request)
+        started = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            timings.template_time += time.perf_counter() - started
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """DjangoTemplates whose top-level renders report to the request's timings."""
+
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        template = super().get_template(template_name)
+        return TimedTemplate(template.template, self)
+
+
+class ServerTimingMiddleware:
+    """
+    Put it high in MIDDLEWARE so "total" covers the middleware below it.
+    "view" runs from this middleware's process_view hook until the stack
+    below it returns, so it also covers the later process_view hooks,
+    TemplateResponse rendering and the inner middleware's response handling.
+    The header goes to staff only unless ``SERVER_TIMING_PUBLIC`` is set.
+    """
+
+    def __init__(self, get_response):
+        if not settings.SERVER_TIMING_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.sample_rate = settings.SERVER_TIMING_SAMPLE_RATE
+
+    def __call__(self, request):
+        if random.random() >= self.sample_rate:
+            return self.get_response(request)
+
+        timings = RequestTimings()
+        token = _current.set(timings)
+        started = time.perf_counter()
+        try:
+            with connection.execute_wrapper(timings):
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        if timings.view_start is not None:
+            timings.view_time = time.perf_counter() - timings.view_start
+        total = time.perf_counter() - started
+
+        metrics = timings.metrics(total)
+        if settings.SERVER_TIMING_PUBLIC or getattr(getattr(request, "user", None), "is_staff", False):
+            response["Server-Timing"] = ", ".join(
+                f'{name};dur={seconds * 1000:.1f};desc="{desc}"' for name, seconds, desc in metrics
+            )
+        logger.info(json.dumps({
+            "path": request.path,
+            "view": request.resolver_match.view_name if request.resolver_match else None,
+            "status": response.status_code,
+            "db_queries": timings.db_count,
+            "cache_hits": timings.cache_hits,
+            "cache_misses": timings.cache_misses,
+            **{f"{name}_ms": round(seconds * 1000, 1) for name, seconds, _ in metrics},
+        }))
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        timings = _current.get()
+        if timings is not None:
+            timings.view_start = time.perf_counter()
@@ -8,6 +8,7 @@ For more information, see https://docs.djangoproject.com/en/5.0/topics/settings/
 import os
 from pathlib import Path
 import sys
+import tempfile
 from decouple import config
 
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -50,6 +51,9 @@ if not DEBUG:
 # SECURITY FIX: Session and CSRF cookie hardening
 SESSION_COOKIE_HTTPONLY = True  # Prevent JavaScript/XSS access to session cookie
 SESSION_COOKIE_SAMESITE = 'Strict'  # Prevent CSRF via cookies
+# Anonymous sessions live in a signed cookie, logged-in ones in cached_db
+# (aorbo_project.hybrid_session). Prune old rows with clear_expired_sessions.
+SESSION_ENGINE = 'aorbo_project.hybrid_session'
 CSRF_COOKIE_HTTPONLY = True  # Prevent JavaScript access to CSRF token
 CSRF_COOKIE_SAMESITE = 'Strict'
 
@@ -59,6 +63,8 @@ INSTALLED_APPS = [
     'django.contrib.contenttypes',
     'django.contrib.sessions',
     'django.contrib.messages',
+    'django.contrib.postgres',  # OpClass index expressions (treks_app.models)
+    'whitenoise.runserver_nostatic',
     'django.contrib.staticfiles',
     'django_extensions',
     'corsheaders',
@@ -71,14 +77,20 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
-    'django.contrib.sessions.middleware.SessionMiddleware',
+    'whitenoise.middleware.WhiteNoiseMiddleware',
+    'aorbo_project.middleware_profiles.MiddlewareProfileMiddleware',
+    'aorbo_project.server_timing.ServerTimingMiddleware',
+    'aorbo_project.query_tracer.QueryTracerMiddleware',
+    'aorbo_project.rate_limit.RateLimitMiddleware',
+    'aorbo_project.page_cache.PageCacheMiddleware',
+    'aorbo_project.middleware_profiles.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
-    'django.contrib.messages.middleware.MessageMiddleware',
+    'aorbo_project.middleware_profiles.AuthenticationMiddleware',
+    'aorbo_project.middleware_profiles.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
-    'csp.middleware.CSPMiddleware',
+    'aorbo_project.middleware_profiles.CSPMiddleware',
     'axes.middleware.AxesMiddleware',
 ]
 
@@ -94,7 +106,7 @@ ROOT_URLCONF = 'aorbo_project.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'aorbo_project.server_timing.TimedDjangoTemplates',
         'DIRS': [BASE_DIR / 'templates'],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -103,6 +115,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'treks_app.snapshots.site_content',
             ],
         },
     },
@@ -110,6 +123,10 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'aorbo_project.wsgi.application'
 
+# Compile the URLconf and templates when the app loads (treks_app.apps) so the
+# first request on a fresh worker doesn't pay for it.
+BOOT_WARMUP = config('BOOT_WARMUP', default=str(not DEBUG), cast=lambda x: x.lower() in ('true', '1', 'yes'))
+
 # Database - Supabase PostgreSQL
 DATABASES = {
     'default': {
@@ -171,17 +188,227 @@ STATICFILES_DIRS = [
     os.path.join(BASE_DIR, 'static'),
 ]
 
+# Static files are served by WhiteNoise straight from STATIC_ROOT, before any
+# other middleware runs. `collectstatic` writes hashed names plus .gz/.br
+# variants; hashed files get a one-year immutable Cache-Control.
+STORAGES = {
+    "default": {
+        "BACKEND": "django.core.files.storage.FileSystemStorage",
+    },
+    "staticfiles": {
+        "BACKEND": "aorbo_project.staticfiles.StaticFilesStorage",
+    },
+}
+WHITENOISE_USE_FINDERS = DEBUG  # Serve straight from static/ while developing
+WHITENOISE_MAX_AGE = 60 * 60  # Unhashed names (e.g. robots, direct links)
+
+# Per-page CSS/JS, keyed by the template a view renders. Every page gets the
+# base.html sources plus its own. `manage.py build_assets` writes minified,
+# purged bundles and critical CSS to static/dist/ (run before collectstatic).
+ASSET_BUNDLES = {
+    'base.html': {'css': ['css/styles.css', 'css/carousel-hover.css'], 'js': ['js/main.js']},
+    'index.html': {'css': ['css/pages/index.css'], 'js': ['js/index.js']},
+    'about.html': {'css': ['css/pages/about.css'], 'js': ['js/about.js']},
+    'blogs.html': {'css': ['css/pages/blogs.css']},
+    'blog_detail.html': {'css': ['css/pages/blog_detail.css'], 'js': ['js/blog_detail.js']},
+    'contact.html': {'css': ['css/pages/contact.css'], 'js': ['js/contact.js']},
+    'safety.html': {'css': ['css/pages/safety.css']},
+    'card_details.html': {'css': ['css/pages/card_details.css']},
+    'travel_your_way.html': {'css': ['css/pages/travel_your_way.css']},
+    'treks.html': {'css': ['css/pages/treks.css']},
+    'privacypolicy.html': {'css': ['css/pages/privacypolicy.css']},
+    'terms_and_conditions.html': {'css': ['css/pages/terms_and_conditions.css']},
+    'user_agreement.html': {'css': ['css/pages/user_agreement.css']},
+}
+ASSET_BUNDLES_ENABLED = not DEBUG  # Link the raw sources while developing
+ASSET_CRITICAL_LINES = 60  # Lines of a page's content block treated as above the fold
+# Classes only added at runtime by Bootstrap's JS (loaded from the CDN)
+ASSET_PURGE_SAFELIST = [
+    'show', 'showing', 'hiding', 'collapsing', 'collapsed', 'fade', 'active',
+    'carousel-item-next', 'carousel-item-prev', 'carousel-item-start', 'carousel-item-end',
+    'modal-open', 'modal-backdrop', 'dropdown-menu-end', 'was-validated',
+]
+
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Image storage: 'supabase' in production, 'local' writes under MEDIA_ROOT
+STORAGE_BACKEND = config('STORAGE_BACKEND', default='supabase')
+STORAGE_LOCAL_ROOT = MEDIA_ROOT
+STORAGE_GC_GRACE_HOURS = 24  # Never collect objects younger than this (uploads in flight)
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 CACHES = {
     "default": {
-        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "BACKEND": "aorbo_project.cache_metrics.InstrumentedLocMemCache",
     }
 }
 
+# Cache metrics (/metrics/): each process writes its counters to
+# CACHE_METRICS_DIR, which the endpoint sums (empty: only the answering
+# process's). Clear the directory when the server starts, as gunicorn.conf.py
+# does. Scrapers authenticate with "Authorization: Bearer <METRICS_TOKEN>";
+# the endpoint is off without a token.
+CACHE_METRICS_DIR = config('CACHE_METRICS_DIR', default=os.path.join(tempfile.gettempdir(), 'aorbo-cache-metrics'))
+CACHE_METRICS_FLUSH_INTERVAL = 5
+METRICS_TOKEN = config('METRICS_TOKEN', default='')
+
+# Key prefixes reported separately by the cache metrics (/metrics/).
+CACHE_KEY_FAMILIES = [
+    "home_page_", "treks_", "trek_detail_", "card_trek_detail_", "blogs_page_", "blog_detail_",
+    "search_suggestions_", "featured_treks_", "trek_categories_",
+    "page_", "facet_index", "ratelimit:",
+]
+
+# Content versions (treks_app.versions) live in the database; each process
+# re-reads them at most this often, so edits reach every worker's caches and
+# snapshots within this many seconds.
+CONTENT_VERSION_CHECK_INTERVAL = 2
+
+# View caches (treks_app.caching.get_or_compute): how long a rebuild may hold
+# its lock, how long a cold-miss request waits for another request's rebuild,
+# and whether stale entries are refreshed off the request thread.
+CACHE_COMPUTE_LOCK_TIMEOUT = 30
+CACHE_COMPUTE_WAIT = 5
+CACHE_REFRESH_IN_BACKGROUND = True
+
+# Anonymous full-page cache (aorbo_project.page_cache). Entries are dropped
+# when any editor-managed model is saved; other workers pick that up within
+# CONTENT_VERSION_CHECK_INTERVAL.
+PAGE_CACHE_VIEWS = [
+    'home', 'blogs', 'about', 'safety',
+    'privacy_policy', 'terms_and_conditions', 'user_agreement',
+]
+PAGE_CACHE_TIMEOUT = 60 * 5
+PAGE_CACHE_QUERY_PARAMS = ['page']  # Part of the key; any other param bypasses the cache
+PAGE_CACHE_IGNORED_PARAMS = ['utm_source', 'utm_medium', 'utm_campaign', 'utm_term', 'utm_content', 'gclid', 'fbclid']
+
+# Cache warmup (manage.py warm_caches, or the gunicorn post_worker_init hook
+# when WARM_CACHES_ON_START is set). WARMUP_HOST should be the public host so
+# warmed full-page entries match real traffic.
+WARMUP_HOST = config('WARMUP_HOST', default=ALLOWED_HOSTS[0])
+WARMUP_WORKERS = 4
+WARMUP_TIME_BUDGET = 60
+WARMUP_MAX_PAGES = 20
+WARMUP_SUGGESTION_PREFIXES = 100
+
+# TrekList.price_base is price_start converted with these rates; treks in a
+# currency missing here get no price_base.
+BASE_CURRENCY = 'INR'
+CURRENCY_RATES = {'INR': 1}
+
+# Faceted browse endpoint (treks_app.facets). Bands are (low, high) with high
+# exclusive and None meaning open-ended; prices in BASE_CURRENCY, durations in
+# days.
+BROWSE_PRICE_BANDS = [(0, 2000), (2000, 5000), (5000, 10000), (10000, 20000), (20000, None)]
+BROWSE_DURATION_BANDS = [(1, 2), (2, 4), (4, 7), (7, None)]
+BROWSE_PAGE_SIZE = 24
+BROWSE_INDEX_TIMEOUT = 60 * 60
+
+# Token-bucket limits for plain views (aorbo_project.rate_limit), keyed by
+# URL name. DRF's throttles below only cover API views. "rate" is the refill
+# rate, "burst" the bucket size. RATE_LIMIT_BACKEND "cache" keeps buckets in
+# the default cache (shared between workers if the cache is); "memory" keeps
+# them per process. RATE_LIMIT_PROXY_COUNT is the number of trusted proxies
+# adding to X-Forwarded-For in front of the app; leave it at 0 unless such a
+# proxy exists, or clients can pick their own address. "key": "session" only
+# applies to sessions the store knows (logged-in users), others go by IP.
+RATE_LIMIT_ENABLED = config('RATE_LIMIT_ENABLED', default='True', cast=lambda x: x.lower() in ('true', '1', 'yes'))
+RATE_LIMIT_BACKEND = config('RATE_LIMIT_BACKEND', default='memory')
+RATE_LIMIT_PROXY_COUNT = config('RATE_LIMIT_PROXY_COUNT', default=0, cast=int)
+RATE_LIMIT_MAX_CLIENTS = 50000
+RATE_LIMITS = {
+    'search_suggestions': {'rate': '5/s', 'burst': 20, 'methods': ['GET'], 'key': 'session'},
+    'contact': {'rate': '5/hour', 'burst': 3, 'methods': ['POST']},
+}
+
+# Blog render artifacts (treks_app.blog_render), computed on save.
+BLOG_WORDS_PER_MINUTE = 200
+BLOG_SUMMARY_WORDS = 35
+# Hosts blog posts may embed with <iframe> (https only); other iframes are
+# removed on save. Keep CSP frame-src in line.
+BLOG_EMBED_HOSTS = ['www.google.com', 'www.youtube.com', 'www.youtube-nocookie.com', 'player.vimeo.com']
+
+# Static export (manage.py export_static_site). When set, editor saves also
+# re-render the affected pages in the background.
+STATIC_EXPORT_ROOT = config('STATIC_EXPORT_ROOT', default='')
+
+# Sitemaps (treks_app.sitemaps), prebuilt into SITEMAP_ROOT with gzip copies
+# and served at /sitemap.xml. Editor saves of treks and posts rebuild the
+# changed chunks in the background.
+SITEMAP_ROOT = config('SITEMAP_ROOT', default=os.path.join(BASE_DIR, 'sitemaps'))
+SITEMAP_BASE_URL = config('SITEMAP_BASE_URL', default='https://www.aorbotreks.com')
+SITEMAP_CHUNK_SIZE = 50000  # Protocol limit per file
+SITEMAP_MAX_AGE = 60 * 60
+SITEMAP_REBUILD_ON_SAVE = True
+
+# Admin changelists for unbounded tables (treks_app.paginators): above this
+# many rows (per pg_class.reltuples) counts are planner estimates.
+ADMIN_ESTIMATED_COUNT_THRESHOLD = 100000
+
+# Streaming CSV/JSONL exports of contacts and visitors (treks_app.exports):
+# rows fetched per server-side cursor round-trip.
+EXPORT_CHUNK_SIZE = 2000
+
+# Middleware profiles (aorbo_project.middleware_profiles). Anonymous GET/HEAD
+# requests whose path fully matches one of a profile's patterns skip the
+# listed middleware ("session", "auth", "messages", "csp"); requests with a
+# session or messages cookie always run the full stack. The first matching
+# profile wins. Measure with manage.py benchmark_middleware.
+MIDDLEWARE_PROFILES = {
+    'public': {
+        'paths': [
+            r'/',
+            r'/(about|safety|privacy-policy|terms-and-conditions|user-agreement|travel-your-way)/',
+            r'/(blogs|treks|card-trek)/([-\w]+/)?',
+            r'/(search|search-suggestions|browse)/',
+            r'/sitemap(-[a-z-]+-\d+)?\.xml',
+        ],
+        'skip': ['session', 'auth', 'messages', 'csp'],
+    },
+}
+
+# Server-Timing header and per-request timing log (aorbo_project.server_timing).
+# The header is only sent to staff unless SERVER_TIMING_PUBLIC is set.
+SERVER_TIMING_ENABLED = config('SERVER_TIMING_ENABLED', default='True', cast=lambda x: x.lower() in ('true', '1', 'yes'))
+SERVER_TIMING_SAMPLE_RATE = config('SERVER_TIMING_SAMPLE_RATE', default=1.0 if DEBUG else 0.01, cast=float)
+SERVER_TIMING_PUBLIC = DEBUG
+
+# Slow/repeated query tracing (aorbo_project.query_tracer), reported at
+# /supersecretadmin/query-report/.
+QUERY_TRACER_ENABLED = config('QUERY_TRACER_ENABLED', default='True', cast=lambda x: x.lower() in ('true', '1', 'yes'))
+QUERY_TRACER_SAMPLE_RATE = config('QUERY_TRACER_SAMPLE_RATE', default=1.0 if DEBUG else 0.05, cast=float)
+QUERY_TRACER_SLOW_MS = 100
+QUERY_TRACER_REPEAT_THRESHOLD = 5
+QUERY_TRACER_LOG = config('QUERY_TRACER_LOG', default=os.path.join(BASE_DIR, 'logs', 'queries.log'))
+QUERY_TRACER_LOG_BACKUPS = 5
+QUERY_TRACER_REPORT_LIMIT = 2000
+os.makedirs(os.path.dirname(QUERY_TRACER_LOG), exist_ok=True)
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'message': {'format': '{message}', 'style': '{'},
+    },
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+        'query_tracer': {
+            'class': 'logging.handlers.RotatingFileHandler',
+            'filename': QUERY_TRACER_LOG,
+            'maxBytes': 5 * 1024 * 1024,
+            'backupCount': QUERY_TRACER_LOG_BACKUPS,
+            'formatter': 'message',
+            'encoding': 'utf-8',
+        },
+    },
+    'loggers': {
+        'aorbo.server_timing': {'handlers': ['console'], 'level': 'INFO', 'propagate': False},
+        'aorbo.query_tracer': {'handlers': ['query_tracer'], 'level': 'WARNING', 'propagate': False},
+    },
+}
+
 
 # Localhost should only be in DEBUG mode for local development
 CORS_ORIGIN_ALLOW_ALL = False
@@ -245,6 +472,9 @@ CONTENT_SECURITY_POLICY = {
         'frame-src': (
             "'self'",
             'https://www.google.com',
+            'https://www.youtube.com',  # blog embeds (BLOG_EMBED_HOSTS)
+            'https://www.youtube-nocookie.com',
+            'https://player.vimeo.com',
         ),
         'img-src': (
             "'self'",
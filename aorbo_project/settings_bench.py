@@ -0,0 +1,52 @@
+"""
+Settings for ``manage.py benchmark``: no network, no credentials needed.
+
+    python manage.py benchmark --settings=aorbo_project.settings_bench --seed
+
+Uses a SQLite file by default; set BENCH_DB=postgres to use the DB_* variables
+against a local Postgres instead. Storage goes to a local directory instead of
+Supabase and mail to the console.
+"""
+import os
+import tempfile
+
+for name, value in {
+    "SECRET_KEY": "benchmark-only",
+    "DEBUG": "False",
+    "ALLOWED_HOSTS": "testserver,localhost",
+    "DB_NAME": "aorbo_bench",
+    "DB_USER": "postgres",
+    "DB_PASSWORD": "postgres",
+    "DB_HOST": "localhost",
+    "EMAIL_HOST": "localhost",
+    "EMAIL_PORT": "25",
+    "EMAIL_HOST_USER": "bench@example.com",
+    "EMAIL_HOST_PASSWORD": "",
+    "SUPABASE_URL": "http://localhost",
+    "SUPABASE_KEY": "",
+    "SERVER_TIMING_ENABLED": "False",
+    "QUERY_TRACER_ENABLED": "False",
+    # Every benchmark client shares one address; the contact POST scenario
+    # would otherwise be measuring 429s.
+    "RATE_LIMIT_ENABLED": "False",
+}.items():
+    os.environ.setdefault(name, value)
+
+from .settings import *  # noqa: E402,F401,F403
+from .settings import BASE_DIR  # noqa: E402
+
+if os.environ.get("BENCH_DB") != "postgres":
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": os.environ.get("BENCH_SQLITE_PATH", os.path.join(BASE_DIR, "bench.sqlite3")),
+        }
+    }
+
+STORAGE_BACKEND = "local"
+STORAGE_LOCAL_ROOT = os.path.join(tempfile.gettempdir(), "aorbo_bench_storage")
+EMAIL_BACKEND = "django.core.mail.backends.console.EmailBackend"
+STATIC_EXPORT_ROOT = ""
+SITEMAP_ROOT = os.path.join(tempfile.gettempdir(), "aorbo_bench_sitemaps")
+SITEMAP_REBUILD_ON_SAVE = False
+BENCHMARK_BASELINE = os.path.join(BASE_DIR, "benchmarks", "baseline.json")
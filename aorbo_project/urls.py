@@ -19,13 +19,17 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 
+from .cache_metrics import metrics_view
+from .query_tracer import query_report_view
+
 urlpatterns = [
+    path('supersecretadmin/query-report/', admin.site.admin_view(query_report_view), name='query_report'),
     path('supersecretadmin/', admin.site.urls),
+    path('metrics/', metrics_view, name='metrics'),
     path('accounts/', include('django.contrib.auth.urls')),
     path('', include('treks_app.urls')),
 ]
 
-# Always serve static and media files, even when DEBUG is False
-# This is needed for ngrok hosting
+# Always serve media files, even when DEBUG is False
+# This is needed for ngrok hosting. Static files are served by WhiteNoise.
 urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
-urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
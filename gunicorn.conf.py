@@ -0,0 +1,24 @@
+import os
+import threading
+
+
+def on_starting(server):
+    """Start cache metrics from zero; files left by the previous master's workers are stale."""
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "aorbo_project.settings")
+    from aorbo_project.cache_metrics import clear
+
+    clear()
+
+
+def post_worker_init(worker):
+    """Warm this worker's caches in the background when WARM_CACHES_ON_START is set."""
+    if os.environ.get("WARM_CACHES_ON_START", "").lower() not in ("true", "1", "yes"):
+        return
+
+    def run():
+        from treks_app.warmup import LocalFetcher, warm, warmup_urls
+
+        counts = warm(warmup_urls(), LocalFetcher())
+        worker.log.info("Cache warmup finished: %s", dict(counts))
+
+    threading.Thread(target=run, daemon=True).start()
@@ -48,7 +48,9 @@ document.addEventListener('DOMContentLoaded', function () {
         return;
     }
 
-    const headings = Array.from(blogContent.querySelectorAll('h2, h3'));
+    // Normally rendered server-side from Blog.toc; only older posts need this.
+    const serverToc = tocNav.querySelector('a') !== null;
+    const headings = serverToc ? [] : Array.from(blogContent.querySelectorAll('h2, h3'));
     const uniqueHeadings = [];
     const seenHeadings = new Set();
 
@@ -72,7 +74,7 @@ document.addEventListener('DOMContentLoaded', function () {
             tocNav.appendChild(a);
         });
         tocNav.style.display = 'block';
-    } else {
+    } else if (!serverToc) {
         tocNav.innerHTML =
             '<p style="font-size:12px;color:#999;">No headings found in this article</p>';
     }
@@ -21,12 +21,13 @@ function handleUserType() {
 
     function initLottieAnimation() {
         if (!lottieInstance) {
+            const container = document.getElementById('lottieContainer');
             lottieInstance = lottie.loadAnimation({
-                container: document.getElementById('lottieContainer'),
+                container: container,
                 renderer: 'svg',
                 loop: false,
                 autoplay: false,
-                path: '/static/lottiefile/aorbo.json'
+                path: container.dataset.src || '/static/lottiefile/aorbo.json'
             });
         }
         return lottieInstance;
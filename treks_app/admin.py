@@ -1,10 +1,14 @@
 from django.contrib import admin
+from django.contrib.admin.options import IncorrectLookupParameters
+from django.core.exceptions import PermissionDenied
+from django.http import HttpResponseBadRequest
+from django.urls import path, reverse
 from django.utils.html import format_html
 from django.db.models import Count
 from django.utils import timezone
 from django.utils.safestring import mark_safe
-import supabase
 from django import forms
+from datetime import datetime, time, timedelta
 
 
 admin.site.site_header = "Aorbo Treks Admin"
@@ -17,12 +21,123 @@ from .models import (
     SocialMedia, ContactInfo, TrekList, Visitor, 
     TermsAndConditions, Operator, Tag, TrekPoint 
 )   
+from .exports import EXPORTS, FORMATS, streaming_response
+from .paginators import EstimatedCountPaginator, estimated_count, estimated_distinct
+
+class PrefixAutocompleteMixin:
+    """
+    Autocomplete widgets search ``autocomplete_search_fields`` (a
+    case-insensitive prefix match served by the model's Upper(name) index)
+    instead of the changelist's substring ``search_fields``.
+    """
+    autocomplete_search_fields = ('^name',)
+
+    def is_autocomplete(self, request):
+        match = request.resolver_match
+        return bool(match and match.url_name == 'autocomplete')
+
+    def get_search_fields(self, request):
+        if self.is_autocomplete(request):
+            return self.autocomplete_search_fields
+        return super().get_search_fields(request)
+
+    def get_search_results(self, request, queryset, search_term):
+        queryset, may_have_duplicates = super().get_search_results(request, queryset, search_term)
+        if self.is_autocomplete(request):
+            # Results are rendered with str(obj), i.e. just the name; the
+            # paginated widget needs a stable order.
+            queryset = queryset.only('pk', 'name').order_by('name', 'pk')
+        return queryset, may_have_duplicates
+
+
+class LargeTableAdminMixin:
+    """
+    Changelists for tables that grow without bound: estimated counts on
+    large tables (treks_app.paginators), no second count of the whole
+    table, and a date hierarchy built from the first and last date rather
+    than DISTINCT scans (templates/admin/large_change_list.html).
+    """
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    change_list_template = 'admin/large_change_list.html'
+
+
+class ExportAdminMixin:
+    """
+    Streaming CSV / JSONL export (treks_app.exports). The changelist's
+    export links cover everything matching its current filters and search;
+    the actions export the selected rows.
+    """
+    actions = ['export_csv', 'export_jsonl']
+
+    @property
+    def export_fields(self):
+        return EXPORTS[self.model._meta.model_name][1]
+
+    def export_url_name(self):
+        return f'{self.model._meta.app_label}_{self.model._meta.model_name}_export'
+
+    def get_urls(self):
+        export = path('export/', self.admin_site.admin_view(self.export_view), name=self.export_url_name())
+        return [export] + super().get_urls()
+
+    def export_view(self, request):
+        if not self.has_view_permission(request):
+            raise PermissionDenied
+        params = request.GET.copy()
+        fmt = params.pop('_format', ['csv'])[-1]
+        compress = params.pop('_gzip', [''])[-1] == '1'
+        if fmt not in FORMATS:
+            return HttpResponseBadRequest('Unknown export format')
+        # The remaining parameters are the changelist's filters, search and ordering.
+        request.GET = params
+        try:
+            queryset = self.get_changelist_instance(request).get_queryset(request)
+        except IncorrectLookupParameters:
+            return HttpResponseBadRequest('Invalid filters')
+        return streaming_response(queryset, self.export_fields, fmt, compress)
+
+    def changelist_view(self, request, extra_context=None):
+        url = reverse(f'admin:{self.export_url_name()}', current_app=self.admin_site.name)
+        links = []
+        for fmt in FORMATS:
+            for compress, label in (('', f'Export {fmt.upper()}'), ('1', f'{fmt.upper()}.gz')):
+                query = request.GET.copy()
+                query['_format'] = fmt
+                if compress:
+                    query['_gzip'] = compress
+                links.append((label, f'{url}?{query.urlencode()}'))
+        extra_context = {**(extra_context or {}), 'export_links': links}
+        return super().changelist_view(request, extra_context=extra_context)
+
+    @admin.action(description='Export selected as CSV', permissions=['view'])
+    def export_csv(self, request, queryset):
+        return streaming_response(queryset, self.export_fields, 'csv')
+
+    @admin.action(description='Export selected as JSONL', permissions=['view'])
+    def export_jsonl(self, request, queryset):
+        return streaming_response(queryset, self.export_fields, 'jsonl')
+
+
+class UserTypeFilter(admin.SimpleListFilter):
+    """Fixed choices, so the sidebar doesn't scan the table for distinct values."""
+    title = 'user type'
+    parameter_name = 'user_type'
+
+    def lookups(self, request, model_admin):
+        return (('trekker', 'Trekker'), ('organizer', 'Organizer'), ('other', 'Other'))
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(user_type=self.value())
+        return queryset
+
 
 # Register your models here.
 @admin.register(Contact)
-class ContactAdmin(admin.ModelAdmin):
+class ContactAdmin(ExportAdminMixin, LargeTableAdminMixin, admin.ModelAdmin):
     list_display = ('name', 'email', 'mobile', 'user_type', 'created_at')
-    list_filter = ('user_type', 'created_at')
+    list_filter = (UserTypeFilter, 'created_at')
     search_fields = ('name', 'email', 'mobile', 'comment')
     readonly_fields = ('created_at',)
     date_hierarchy = 'created_at'
@@ -112,6 +227,7 @@ class TrekOrganizerAdmin(admin.ModelAdmin):
 class TrekAdmin(admin.ModelAdmin):
     list_display = ('title', 'category', 'organizer', 'difficulty', 'price', 'is_featured', 'image_preview')
     list_filter = ('category', 'difficulty', 'is_featured', 'created_at')
+    list_select_related = ('category', 'organizer')
     search_fields = ('title', 'description', 'location')
     prepopulated_fields = {'slug': ('title',)}
     readonly_fields = ('created_at', 'updated_at', 'image_preview')
@@ -144,6 +260,7 @@ class TrekAdmin(admin.ModelAdmin):
 class TrekImageAdmin(admin.ModelAdmin):
     list_display = ('id', 'caption', 'image_preview')
     search_fields = ('caption',)
+    autocomplete_fields = ('trek',)
     
     def image_preview(self, obj):
         if obj.image:
@@ -155,8 +272,10 @@ class TrekImageAdmin(admin.ModelAdmin):
 class TestimonialAdmin(admin.ModelAdmin):
     list_display = ('name', 'trek_display', 'rating', 'date', 'is_featured', 'photo_preview')
     list_filter = ('rating', 'is_featured', 'date')
+    list_select_related = ('trek',)
     search_fields = ('name', 'content', 'trek_name')
     readonly_fields = ('photo_preview',)
+    autocomplete_fields = ('trek',)
     
     def trek_display(self, obj):
         return obj.trek.title if obj.trek else obj.trek_name
@@ -230,7 +349,7 @@ class ContactInfoAdmin(admin.ModelAdmin):
     search_fields = ('company_name', 'address', 'email', 'phone')
 
 @admin.register(Visitor)
-class VisitorAdmin(admin.ModelAdmin):
+class VisitorAdmin(ExportAdminMixin, LargeTableAdminMixin, admin.ModelAdmin):
     list_display = ("ip_address", "session_id", "user_agent", "visit_time")
     list_filter = ("visit_time",)
     date_hierarchy = "visit_time"
@@ -238,25 +357,36 @@ class VisitorAdmin(admin.ModelAdmin):
     readonly_fields = ("ip_address", "session_id", "user_agent", "visit_time")
 
     change_list_template = "admin/visitor_changelist.html"
+    stats_days = 14
 
     def changelist_view(self, request, extra_context=None):
         from django.db.models.functions import TruncDate
-        today =  timezone.localdate()
-        qs = Visitor.objects.all()
-        total_visitors = qs.count()
-        unique_sessions = qs.values("session_id").distinct().count()
-        today_unique = qs.filter(visit_time__date=today).values("session_id").distinct().count()
+        # Daily stats only range-scan the visit_time index over the last
+        # stats_days; all-time totals come from planner estimates on large tables.
+        today = timezone.make_aware(datetime.combine(timezone.localdate(), time.min))
+        recent = Visitor.objects.filter(visit_time__gte=today - timedelta(days=self.stats_days - 1))
+        total_estimate = estimated_count(Visitor.objects.all())
+        total_visitors = Visitor.objects.count() if total_estimate is None else total_estimate
+        unique_estimate = estimated_distinct(Visitor.objects.all(), "session_id")
+        if unique_estimate is None:
+            unique_sessions = Visitor.objects.values("session_id").distinct().count()
+        else:
+            unique_sessions = unique_estimate
+        today_unique = recent.filter(visit_time__gte=today).values("session_id").distinct().count()
         daily_unique = (
-            qs.annotate(day=TruncDate("visit_time"))
+            recent.annotate(day=TruncDate("visit_time"))
               .values("day")
               .annotate(unique=Count("session_id", distinct=True))
-              .order_by("-day")[:14]
+              .order_by("-day")
         )
         extra = {
             "total_visitors": total_visitors,
+            "total_estimated": total_estimate is not None,
             "unique_sessions": unique_sessions,
+            "unique_estimated": unique_estimate is not None,
             "today_unique": today_unique,
             "daily_unique": list(daily_unique),
+            "stats_days": self.stats_days,
         }
         extra_context = {**(extra_context or {}), **extra}
         return super().changelist_view(request, extra_context=extra_context)
@@ -271,7 +401,7 @@ class TermsAndConditionsAdmin(admin.ModelAdmin):
     content_preview.short_description = 'Content Preview'
 
 @admin.register(TrekList)
-class TrekListAdmin(admin.ModelAdmin):
+class TrekListAdmin(PrefixAutocompleteMixin, admin.ModelAdmin):
 
     list_display = (
         'name',
@@ -335,7 +465,8 @@ class TrekListAdmin(admin.ModelAdmin):
         }),
     )
 
-    filter_horizontal = ('tags', 'operators', 'trek_points', 'related_treks')
+    # Only the selected options are rendered; choices are searched on demand.
+    autocomplete_fields = ('tags', 'operators', 'trek_points', 'related_treks')
 
     def image_preview(self, obj):
         if obj.image:
@@ -358,17 +489,17 @@ class TrekListAdmin(admin.ModelAdmin):
 
 
 @admin.register(Operator)
-class OperatorAdmin(admin.ModelAdmin):
+class OperatorAdmin(PrefixAutocompleteMixin, admin.ModelAdmin):
     list_display = ('name',)
     search_fields = ('name',)
 
 @admin.register(Tag)
-class TagAdmin(admin.ModelAdmin):
+class TagAdmin(PrefixAutocompleteMixin, admin.ModelAdmin):
     list_display = ('name',)
     search_fields = ('name',)
 
 @admin.register(TrekPoint)
-class TrekPointAdmin(admin.ModelAdmin):
+class TrekPointAdmin(PrefixAutocompleteMixin, admin.ModelAdmin):
     list_display = ('name',)
     search_fields = ('name',)
 
@@ -1,6 +1,34 @@
+import logging
+from pathlib import Path
+
 from django.apps import AppConfig
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
 
 
 class TreksAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'treks_app'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+
+        if settings.BOOT_WARMUP:
+            self.warm_up()
+
+    def warm_up(self):
+        """Import the URLconf and compile every project template into the cached loader."""
+        from django.template import TemplateDoesNotExist, TemplateSyntaxError
+        from django.template.loader import get_template
+        from django.urls import get_resolver
+
+        get_resolver().reverse_dict  # populates every pattern
+
+        for directory in settings.TEMPLATES[0]['DIRS']:
+            for path in Path(directory).rglob('*.html'):
+                name = path.relative_to(directory).as_posix()
+                try:
+                    get_template(name)
+                except (TemplateDoesNotExist, TemplateSyntaxError):
+                    logger.exception("Boot warmup could not load %s", name)
@@ -0,0 +1,419 @@
+"""
+Per-page CSS/JS bundles.
+
+``build_bundles()`` (run by ``manage.py build_assets``) concatenates the
+sources listed in ``settings.ASSET_BUNDLES`` for every page template, drops
+CSS rules whose classes/ids never appear in the templates or scripts,
+minifies the result and splits out the above-the-fold ("critical") rules.
+Everything is written to ``static/dist/`` so collectstatic hashes and
+compresses it like any other static file.
+"""
+import json
+import posixpath
+import re
+from functools import lru_cache
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+
+DIST_DIR = "dist"
+BUILT_MANIFEST = f"{DIST_DIR}/bundles.json"
+BASE_TEMPLATE = "base.html"
+
+# At-rules whose block holds ordinary style rules
+GROUPING_AT_RULES = {"media", "supports", "document", "layer", "container"}
+
+
+def bundle_name(template_name):
+    return Path(template_name).stem
+
+
+def bundle_sources(template_name):
+    """Return the {"css": [...], "js": [...]} sources served with a page."""
+    bundles = settings.ASSET_BUNDLES
+    base = bundles[BASE_TEMPLATE]
+    if template_name == BASE_TEMPLATE or template_name not in bundles:
+        return {"css": list(base["css"]), "js": list(base["js"])}
+    page = bundles[template_name]
+    return {
+        "css": base["css"] + page.get("css", []),
+        "js": base["js"] + page.get("js", []),
+    }
+
+
+@lru_cache(maxsize=None)
+def _built_bundles():
+    path = finders.find(BUILT_MANIFEST)
+    if not path:
+        return {}
+    with open(path) as fh:
+        return json.load(fh)
+
+
+def built_bundle(template_name):
+    """Return the built bundle for a page, or None to fall back to sources."""
+    if not settings.ASSET_BUNDLES_ENABLED:
+        return None
+    if settings.DEBUG:
+        _built_bundles.cache_clear()
+    built = _built_bundles()
+    return built.get(template_name) or built.get(BASE_TEMPLATE)
+
+
+@lru_cache(maxsize=None)
+def _read_static(path):
+    with open(finders.find(path), encoding="utf-8") as fh:
+        return fh.read()
+
+
+def read_static(path):
+    if settings.DEBUG:
+        _read_static.cache_clear()
+    return _read_static(path)
+
+
+# --------------------------------------------------------------------------
+# CSS
+# --------------------------------------------------------------------------
+
+def _strip_css_comments(text):
+    out, i, n = [], 0, len(text)
+    while i < n:
+        c = text[i]
+        if c in "\"'":
+            j = _string_end(text, i)
+            out.append(text[i:j])
+            i = j
+        elif text.startswith("/*", i):
+            end = text.find("*/", i + 2)
+            i = n if end == -1 else end + 2
+        else:
+            out.append(c)
+            i += 1
+    return "".join(out)
+
+
+def _string_end(text, start):
+    quote, i = text[start], start + 1
+    while i < len(text):
+        if text[i] == "\\":
+            i += 2
+            continue
+        if text[i] == quote or text[i] == "\n" and quote != "`":
+            return i + 1
+        i += 1
+    return i
+
+
+def _block_end(text, start):
+    """Index just past the brace that closes the block opened at ``start``."""
+    depth, i = 0, start
+    while i < len(text):
+        c = text[i]
+        if c in "\"'":
+            i = _string_end(text, i)
+            continue
+        if c == "{":
+            depth += 1
+        elif c == "}":
+            depth -= 1
+            if depth == 0:
+                return i + 1
+        i += 1
+    return i
+
+
+def parse_css(text):
+    """
+    Parse a stylesheet into a list of nodes:
+
+    ``("rule", selector, body)``, ``("group", prelude, children)`` for
+    @media/@supports, and ``("raw", text)`` for every other at-rule.
+    """
+    return _parse_nodes(_strip_css_comments(text))
+
+
+def _parse_nodes(text):
+    nodes, i, n = [], 0, len(text)
+    while i < n:
+        if text[i].isspace() or text[i] in ";}":
+            i += 1
+            continue
+        brace = text.find("{", i)
+        if text[i] == "@":
+            semi = text.find(";", i)
+            if semi != -1 and (brace == -1 or semi < brace):
+                nodes.append(("raw", text[i:semi + 1].strip()))
+                i = semi + 1
+                continue
+            if brace == -1:
+                break
+            end = _block_end(text, brace)
+            prelude = text[i:brace].strip()
+            name = prelude[1:].split(None, 1)[0].lower() if len(prelude) > 1 else ""
+            if name in GROUPING_AT_RULES:
+                nodes.append(("group", prelude, _parse_nodes(text[brace + 1:end - 1])))
+            else:
+                nodes.append(("raw", text[i:end].strip()))
+            i = end
+            continue
+        if brace == -1:
+            break
+        end = _block_end(text, brace)
+        nodes.append(("rule", text[i:brace].strip(), text[brace + 1:end - 1]))
+        i = end
+    return nodes
+
+
+def _split_top_level(text, sep):
+    parts, depth, start, i = [], 0, 0, 0
+    while i < len(text):
+        c = text[i]
+        if c in "\"'":
+            i = _string_end(text, i)
+            continue
+        if c in "([":
+            depth += 1
+        elif c in ")]":
+            depth -= 1
+        elif c == sep and depth == 0:
+            parts.append(text[start:i])
+            start = i + 1
+        i += 1
+    parts.append(text[start:])
+    return parts
+
+
+def _minify_selector(selector):
+    selector = re.sub(r"\s+", " ", selector.strip())
+    return re.sub(r"\s*([,>~])\s*", r"\1", selector)
+
+
+def _minify_body(body):
+    declarations = []
+    for declaration in _split_top_level(body, ";"):
+        if ":" not in declaration:
+            continue
+        prop, value = declaration.split(":", 1)
+        value = re.sub(r"\s+", " ", value.strip())
+        value = re.sub(r"\s*!\s*important", "!important", value)
+        value = re.sub(r",\s+", ",", value)
+        if prop.strip() and value:
+            declarations.append(f"{prop.strip()}:{value}")
+    return ";".join(declarations)
+
+
+def _minify_raw(text):
+    text = re.sub(r"\s+", " ", text)
+    return re.sub(r"\s*([{};,])\s*", r"\1", text).replace(";}", "}")
+
+
+def serialize_css(nodes):
+    out = []
+    for node in nodes:
+        if node[0] == "rule":
+            body = _minify_body(node[2])
+            if body:
+                out.append(f"{_minify_selector(node[1])}{{{body}}}")
+        elif node[0] == "group":
+            inner = serialize_css(node[2])
+            if inner:
+                prelude = re.sub(r"\s+", " ", node[1])
+                out.append(f"{prelude}{{{inner}}}")
+        else:
+            out.append(_minify_raw(node[1]))
+    return "".join(out)
+
+
+_NOT_RE = re.compile(r":not\((?:[^()]|\([^()]*\))*\)")
+_ATTR_RE = re.compile(r"\[[^\]]*\]")
+_CLASS_RE = re.compile(r"\.(-?[_a-zA-Z][\w-]*)")
+_ID_RE = re.compile(r"#(-?[_a-zA-Z][\w-]*)")
+_TOKEN_RE = re.compile(r"-?[_a-zA-Z][\w-]*")
+
+
+def selector_names(selector):
+    """Classes and ids a selector requires to be present in the markup."""
+    selector = _ATTR_RE.sub("", _NOT_RE.sub("", selector))
+    return set(_CLASS_RE.findall(selector)) | set(_ID_RE.findall(selector))
+
+
+def markup_tokens(*texts):
+    tokens = set()
+    for text in texts:
+        tokens.update(_TOKEN_RE.findall(text))
+    return tokens
+
+
+def filter_css(nodes, tokens, keep_raw=True):
+    """Keep only selectors whose classes and ids all occur in ``tokens``."""
+    kept = []
+    for node in nodes:
+        if node[0] == "rule":
+            selectors = [
+                s for s in _split_top_level(node[1], ",")
+                if s.strip() and selector_names(s) <= tokens
+            ]
+            if selectors:
+                kept.append(("rule", ",".join(selectors), node[2]))
+        elif node[0] == "group":
+            children = filter_css(node[2], tokens, keep_raw)
+            if children:
+                kept.append(("group", node[1], children))
+        elif keep_raw:
+            kept.append(node)
+    return kept
+
+
+def critical_css(nodes, tokens):
+    """Rules that style the above-the-fold markup, plus @font-face."""
+    kept = []
+    for node in filter_css(nodes, tokens, keep_raw=True):
+        if node[0] == "raw" and not node[1].lower().startswith("@font-face"):
+            continue
+        kept.append(node)
+    return kept
+
+
+def rebase_urls(css, source_path, target_dir):
+    """Rewrite relative url()s in ``source_path`` to resolve from ``target_dir``."""
+    source_dir = posixpath.dirname(source_path)
+
+    def rewrite(match):
+        url = match.group(2).strip()
+        if not url or re.match(r"^([a-z]+:|/|#|data:)", url, re.I):
+            return match.group(0)
+        path, _, suffix = url.partition("?")
+        target = posixpath.relpath(posixpath.normpath(posixpath.join(source_dir, path)), target_dir)
+        return f"url('{target}{'?' + suffix if suffix else ''}')"
+
+    return re.sub(r"""url\(\s*(['"]?)([^'")]*)\1\s*\)""", rewrite, css)
+
+
+# --------------------------------------------------------------------------
+# JavaScript
+# --------------------------------------------------------------------------
+
+_REGEX_PRECEDERS = set("(,=:[!&|?{};+-*%<>~^")
+_REGEX_KEYWORDS = {"return", "typeof", "case", "do", "else", "in", "of", "new", "delete", "void", "throw"}
+
+
+def minify_js(source):
+    """
+    Conservative minifier: drops comments and collapses whitespace runs to a
+    single space or newline. Newlines are kept so automatic semicolon
+    insertion behaves exactly as in the source.
+    """
+    out, i, n = [], 0, len(source)
+    last_char, last_word = "", ""
+    while i < n:
+        c = source[i]
+        if c in "\"'`":
+            j = _string_end(source, i)
+            out.append(source[i:j])
+            last_char, last_word, i = c, "", j
+        elif source.startswith("//", i):
+            end = source.find("\n", i)
+            i = n if end == -1 else end
+        elif source.startswith("/*", i):
+            end = source.find("*/", i + 2)
+            i = n if end == -1 else end + 2
+            out.append(" ")
+        elif c == "/" and (last_char in _REGEX_PRECEDERS or last_char == "" or last_word in _REGEX_KEYWORDS):
+            j, in_class = i + 1, False
+            while j < n and (in_class or source[j] != "/") and source[j] != "\n":
+                if source[j] == "\\":
+                    j += 1
+                elif source[j] == "[":
+                    in_class = True
+                elif source[j] == "]":
+                    in_class = False
+                j += 1
+            j += 1
+            while j < n and (source[j].isalnum()):
+                j += 1
+            out.append(source[i:j])
+            last_char, last_word, i = "/", "", j
+        elif c.isspace():
+            j = i
+            while j < n and source[j].isspace():
+                j += 1
+            out.append("\n" if "\n" in source[i:j] else " ")
+            i = j
+        elif c.isalnum() or c in "_$":
+            j = i
+            while j < n and (source[j].isalnum() or source[j] in "_$"):
+                j += 1
+            last_word = source[i:j]
+            out.append(last_word)
+            last_char, i = "a", j
+        else:
+            out.append(c)
+            last_char, last_word, i = c, "", i + 1
+
+    lines = (line.strip() for line in "".join(out).split("\n"))
+    return "\n".join(line for line in lines if line) + "\n"
+
+
+# --------------------------------------------------------------------------
+# Build
+# --------------------------------------------------------------------------
+
+def _template_path(name):
+    for directory in settings.TEMPLATES[0]["DIRS"]:
+        path = Path(directory) / name
+        if path.exists():
+            return path
+    raise FileNotFoundError(name)
+
+
+def _above_the_fold(template_name):
+    """Markup rendered before the fold: the header of base.html plus the
+    first ``ASSET_CRITICAL_LINES`` lines of the page's content block."""
+    base = _template_path(BASE_TEMPLATE).read_text(encoding="utf-8")
+    header = base.split("{% block content %}", 1)[0]
+    if template_name == BASE_TEMPLATE:
+        return header
+    page = _template_path(template_name).read_text(encoding="utf-8")
+    content = page.split("{% block content %}", 1)[-1]
+    return header + "\n".join(content.splitlines()[:settings.ASSET_CRITICAL_LINES])
+
+
+def build_bundles(output_dir):
+    """Build every bundle into ``output_dir``; return the manifest written."""
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    scripts = [Path(p).read_text(encoding="utf-8") for p in sorted(Path(settings.BASE_DIR, "static", "js").glob("*.js"))]
+    base_markup = _template_path(BASE_TEMPLATE).read_text(encoding="utf-8")
+    safelist = set(settings.ASSET_PURGE_SAFELIST)
+
+    manifest = {}
+    for template_name in settings.ASSET_BUNDLES:
+        name = bundle_name(template_name)
+        sources = bundle_sources(template_name)
+        page_markup = _template_path(template_name).read_text(encoding="utf-8")
+
+        css = "\n".join(
+            rebase_urls(read_static(path), path, DIST_DIR) for path in sources["css"]
+        )
+        nodes = parse_css(css)
+        used = markup_tokens(base_markup, page_markup, *scripts) | safelist
+        fold = markup_tokens(_above_the_fold(template_name)) | safelist
+
+        entry = {}
+        if nodes:
+            (output_dir / f"{name}.css").write_text(serialize_css(filter_css(nodes, used)), encoding="utf-8")
+            (output_dir / f"{name}.critical.css").write_text(serialize_css(critical_css(nodes, fold)), encoding="utf-8")
+            entry["css"] = f"{DIST_DIR}/{name}.css"
+            entry["critical"] = f"{DIST_DIR}/{name}.critical.css"
+        if sources["js"]:
+            js = ";\n".join(minify_js(read_static(path)) for path in sources["js"])
+            (output_dir / f"{name}.js").write_text(js, encoding="utf-8")
+            entry["js"] = f"{DIST_DIR}/{name}.js"
+        manifest[template_name] = entry
+
+    (output_dir / "bundles.json").write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+    _built_bundles.cache_clear()
+    return manifest
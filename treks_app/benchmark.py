@@ -0,0 +1,251 @@
+"""
+Latency/throughput benchmark for every route in treks_app/urls.py.
+
+Each scenario is driven by ``concurrency`` threads, each with its own test
+client and database connection, and reports p50/p95/p99 latency, requests
+per second and queries per request. Results can be saved as a baseline and
+later runs compared against it.
+"""
+import math
+import queue
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import date
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client
+from django.urls import reverse
+
+from . import urls
+from .models import (
+    FAQ, Blog, HomepageBanner, Operator, SafetyTip, Tag, TeamMember, Testimonial,
+    Trek, TrekCategory, TrekList, TrekOrganizer, TrekPoint,
+)
+
+CONTACT_FORM = {
+    "name": "Bench User",
+    "email": "bench@example.com",
+    "mobile": "9999999999",
+    "user_type": "trekker",
+    "comment": "Looking for a weekend camping trek",
+}
+
+
+@dataclass
+class Scenario:
+    name: str
+    route: str
+    requests: list  # [(path, post_data or None), ...]
+    expected_status: int = 200
+
+
+@dataclass
+class Result:
+    latencies: list = field(default_factory=list)
+    queries: list = field(default_factory=list)
+    errors: int = 0
+    wall: float = 0.0
+
+
+def seed_data(treks=60, blogs=12, seed=42):
+    """Small deterministic catalog so every scenario has something to render."""
+    rng = random.Random(seed)
+    tags = [Tag.objects.create(name=name) for name in ("adventure", "camping", "nature", "beach", "weekend")]
+    operators = [Operator.objects.create(name=f"Operator {i}") for i in range(5)]
+    points = [TrekPoint.objects.create(name=f"Point {i}") for i in range(10)]
+    categories = [TrekCategory.objects.create(name=name) for name in ("Himalayan", "Western Ghats", "Coastal")]
+    organizer = TrekOrganizer.objects.create(
+        name="Bench Organizer", description="-", logo="organizers/bench.png",
+        contact_email="org@example.com", contact_phone="0",
+    )
+
+    listed = []
+    for i in range(treks):
+        trek = TrekList.objects.create(
+            name=f"{rng.choice(['Kedar', 'Hampta', 'Triund', 'Kudremukh', 'Gokarna'])} Trek {i}",
+            state=rng.choice(["Uttarakhand", "Himachal", "Karnataka"]),
+            is_pinned=i < 4, pin_priority=i if i < 4 else None,
+            duration_days=f"{rng.randint(1, 6)} Days", price_start=rng.randint(20, 200) * 100,
+            operating_days="Mon, Wed, Sat", short_desc="A trek.", activities="Trekking, Camping, Bonfire",
+        )
+        trek.tags.set(rng.sample(tags, 2))
+        trek.operators.set(rng.sample(operators, 2))
+        trek.trek_points.set(rng.sample(points, 3))
+        if listed:
+            trek.related_treks.set(rng.sample(listed, min(3, len(listed))))
+        listed.append(trek)
+
+    for i in range(treks // 2):
+        detail = Trek.objects.create(
+            title=f"Bench Trek {i}", slug=f"bench-trek-{i}", description="-", image="treks/bench.png",
+            category=categories[i % len(categories)], organizer=organizer, duration="2 days",
+            difficulty=Trek.DIFFICULTY_CHOICES[i % 4][0], location="-", price=1000, is_featured=i < 3,
+        )
+        Testimonial.objects.create(name=f"Guest {i}", trek=detail, date=date(2024, 1, 1), content="Great", rating=5, is_featured=i < 6)
+
+    for i in range(blogs):
+        Blog.objects.create(title=f"Bench Blog {i}", content="<p>" + "Lorem ipsum. " * 200 + "</p>", author="Bench", is_featured=i < 3)
+    for i in range(12):
+        FAQ.objects.create(question=f"Question {i}?", answer="Answer.", category=["general", "booking"][i % 2], order=i)
+    for i in range(6):
+        SafetyTip.objects.create(title=f"Tip {i}", content="Stay safe.", order=i)
+        TeamMember.objects.create(name=f"Member {i}", position="Guide", bio="-", photo="team/bench.png", order=i)
+    HomepageBanner.objects.create(title="Banner", image="banners/bench.png", is_active=True, order=0)
+
+
+def scenarios():
+    cards = list(TrekList.objects.values_list("pk", flat=True)[:20])
+    treks = list(Trek.objects.values_list("slug", flat=True)[:20])
+    blogs = list(Blog.objects.values_list("slug", flat=True)[:10])
+    names = list(TrekList.objects.values_list("name", flat=True)[:20])
+
+    def get(name, *paths, expected=200, route=None):
+        return Scenario(name, route or name, [(path, None) for path in paths], expected)
+
+    return [
+        get("home", *[f"{reverse('home')}?page={page}" for page in (1, 2, 3)]),
+        get("about", reverse("about")),
+        get("privacy_policy", reverse("privacy_policy")),
+        get("terms_and_conditions", reverse("terms_and_conditions")),
+        get("user_agreement", reverse("user_agreement")),
+        get("safety", reverse("safety")),
+        get("blogs", *[f"{reverse('blogs')}?page={page}" for page in (1, 2)]),
+        get("blog_detail", *[reverse("blog_detail", args=[slug]) for slug in blogs]),
+        get("treks", reverse("treks"), f"{reverse('treks')}?difficulty=easy"),
+        get("trek_detail", *[reverse("trek_detail", args=[slug]) for slug in treks]),
+        get("card_trek_detail", *[reverse("card_trek_detail", args=[pk]) for pk in cards]),
+        get("search_trek", *[f"{reverse('search_trek')}?q={name.split()[0]}" for name in names], expected=302),
+        get("search_suggestions", *[f"{reverse('search_suggestions')}?q={name[:n]}" for name in names for n in (2, 3, 4)]),
+        get("travel_your_way", *[f"{reverse('travel_your_way')}?tag={tag}" for tag in ("adventure", "camping", "beach")]),
+        get("browse", reverse("browse"), f"{reverse('browse')}?tag=adventure&tag=camping&state=Karnataka", f"{reverse('browse')}?price=2000-5000&page=2"),
+        get("sitemap", reverse("sitemap")),
+        get("sitemap_chunk", reverse("sitemap_chunk", args=["sitemap-treks-1.xml"])),
+        get("contact", reverse("contact")),
+        Scenario("contact_post", "contact", [(reverse("contact"), CONTACT_FORM)]),
+    ]
+
+
+def check_coverage(scenario_list):
+    """Every named route must have a scenario."""
+    routes = {pattern.name for pattern in urls.urlpatterns if pattern.name}
+    missing = routes - {s.route for s in scenario_list}
+    if missing:
+        raise ValueError(f"No benchmark scenario for: {', '.join(sorted(missing))}")
+
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def run_scenario(scenario, total, concurrency, warmup=5):
+    """Run ``total`` requests of ``scenario`` across ``concurrency`` threads."""
+    result = Result()
+    lock = threading.Lock()
+    ready = threading.Barrier(concurrency + 1)
+    work = queue.Queue()
+    for i in range(total):
+        work.put(scenario.requests[i % len(scenario.requests)])
+
+    def request(client, path, data):
+        if data is None:
+            return client.get(path, secure=True)
+        return client.post(path, data, secure=True)
+
+    def worker():
+        client = Client()
+        count = [0]
+
+        def count_queries(execute, sql, params, many, context):
+            count[0] += 1
+            return execute(sql, params, many, context)
+
+        try:
+            # Untimed: the first request on a client loads the middleware chain
+            # and opens this thread's database connection.
+            try:
+                request(client, *scenario.requests[0])
+            except Exception:
+                ready.abort()
+                raise
+            ready.wait()
+            with connection.execute_wrapper(count_queries):
+                while True:
+                    try:
+                        path, data = work.get_nowait()
+                    except queue.Empty:
+                        return
+                    count[0] = 0
+                    started = time.perf_counter()
+                    response = request(client, path, data)
+                    elapsed = time.perf_counter() - started
+                    with lock:
+                        result.latencies.append(elapsed)
+                        result.queries.append(count[0])
+                        if response.status_code != scenario.expected_status:
+                            result.errors += 1
+        finally:
+            connection.close()
+
+    client = Client()
+    for path, data in scenario.requests[:warmup]:
+        request(client, path, data)
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    ready.wait()
+    started = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    result.wall = time.perf_counter() - started
+    return result
+
+
+def summarize(result):
+    latencies = sorted(result.latencies)
+    count = len(latencies)
+    return {
+        "requests": count,
+        "errors": result.errors,
+        "rps": round(count / result.wall, 1) if result.wall else 0.0,
+        "p50_ms": round(_percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(_percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(_percentile(latencies, 99) * 1000, 2),
+        "queries": round(sum(result.queries) / count, 1) if count else 0.0,
+    }
+
+
+def run(total, concurrency, cold=False, only=None):
+    scenario_list = scenarios()
+    check_coverage(scenario_list)
+    summaries = {}
+    for scenario in scenario_list:
+        if only and scenario.name not in only:
+            continue
+        if cold:
+            cache.clear()
+        summaries[scenario.name] = summarize(run_scenario(scenario, total, concurrency))
+    return summaries
+
+
+def compare(current, baseline, tolerance):
+    """Return [(scenario, metric, baseline, current)] for regressions beyond ``tolerance`` (a fraction)."""
+    regressions = []
+    for name, stats in current.items():
+        before = baseline.get(name)
+        if not before:
+            continue
+        for metric in ("p50_ms", "p95_ms", "p99_ms"):
+            if before[metric] and stats[metric] > before[metric] * (1 + tolerance):
+                regressions.append((name, metric, before[metric], stats[metric]))
+        if stats["queries"] > before["queries"]:
+            regressions.append((name, "queries", before["queries"], stats["queries"]))
+        if stats["errors"] > before["errors"]:
+            regressions.append((name, "errors", before["errors"], stats["errors"]))
+    return regressions
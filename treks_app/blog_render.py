@@ -0,0 +1,145 @@
+"""
+Render artifacts for Blog, computed once when a post is saved.
+
+``render_artifacts(content, excerpt)`` sanitizes the CKEditor HTML, gives
+every h2/h3 a stable id, marks images ``loading="lazy"``, keeps only iframes
+embedding one of ``BLOG_EMBED_HOSTS`` over https, and derives the
+table of contents, word count, reading time and a plain-text summary. The
+results are stored on the Blog row, so reading a post parses nothing.
+"""
+import math
+import re
+from html import escape
+from html.parser import HTMLParser
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.utils.text import Truncator, slugify
+
+ALLOWED_TAGS = [
+    "a", "abbr", "b", "blockquote", "br", "caption", "code", "div", "em", "figcaption", "figure",
+    "h1", "h2", "h3", "h4", "h5", "h6", "hr", "i", "iframe", "img", "li", "ol", "p", "pre", "s",
+    "span", "strong", "sub", "sup", "table", "tbody", "td", "tfoot", "th", "thead", "tr", "u", "ul",
+]
+ALLOWED_ATTRIBUTES = {
+    "*": ["class", "id", "style", "title"],
+    "a": ["href", "rel", "target"],
+    "iframe": lambda tag, name, value: _iframe_attribute(name, value),
+    "img": ["src", "alt", "width", "height"],
+    "td": ["colspan", "rowspan"],
+    "th": ["colspan", "rowspan", "scope"],
+}
+IFRAME_ATTRIBUTES = {"width", "height", "allow", "allowfullscreen", "frameborder"}
+VOID_TAGS = {"br", "hr", "img"}
+TOC_TAGS = {"h2", "h3"}
+# Tags that separate words in the plain-text version.
+BLOCK_TAGS = {"p", "li", "br", "div", "td", "th", "blockquote", "pre", "h1", "h2", "h3", "h4", "h5", "h6"}
+
+
+def _iframe_attribute(name, value):
+    if name == "src":
+        url = urlsplit(value)
+        return url.scheme == "https" and url.hostname in settings.BLOG_EMBED_HOSTS
+    return name in IFRAME_ATTRIBUTES
+
+
+def sanitize(content):
+    import bleach
+    from bleach.css_sanitizer import CSSSanitizer
+
+    return bleach.clean(
+        content or "",
+        tags=ALLOWED_TAGS,
+        attributes=ALLOWED_ATTRIBUTES,
+        protocols=["http", "https", "mailto", "tel"],
+        css_sanitizer=CSSSanitizer(),
+        strip=True,
+        strip_comments=True,
+    )
+
+
+class _Rewriter(HTMLParser):
+    """Re-emits sanitized HTML with heading ids and lazy images, collecting text and headings."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.out = []
+        self.text = []
+        self.toc = []
+        self.ids = set()
+        self.heading = None  # [tag, index of its opening tag in out, text parts, attrs]
+        self.dropped_iframes = 0
+
+    def _unique_id(self, text):
+        base = slugify(text) or "section"
+        candidate, n = base, 1
+        while candidate in self.ids:
+            n += 1
+            candidate = f"{base}-{n}"
+        self.ids.add(candidate)
+        return candidate
+
+    def _tag(self, tag, attrs):
+        rendered = "".join(
+            f" {name}" if value is None else f' {name}="{escape(value)}"' for name, value in attrs
+        )
+        return f"<{tag}{rendered}>"
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "iframe" and "src" not in dict(attrs):
+            # sanitize() removed a src outside BLOG_EMBED_HOSTS; drop the empty frame.
+            self.dropped_iframes += 1
+            return
+        if tag == "img":
+            names = {name for name, _ in attrs}
+            attrs = attrs + [(name, value) for name, value in (("loading", "lazy"), ("decoding", "async")) if name not in names]
+        if tag in TOC_TAGS and self.heading is None:
+            self.heading = [tag, len(self.out), [], attrs]
+        self.out.append(self._tag(tag, attrs))
+        if tag in BLOCK_TAGS:
+            self.text.append(" ")
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+
+    def handle_endtag(self, tag):
+        if tag in VOID_TAGS:
+            return
+        if tag == "iframe" and self.dropped_iframes:
+            self.dropped_iframes -= 1
+            return
+        if self.heading and tag == self.heading[0]:
+            tag_name, position, parts, attrs = self.heading
+            title = " ".join("".join(parts).split())
+            if title:
+                anchor = dict(attrs).get("id") or self._unique_id(title)
+                self.ids.add(anchor)
+                attrs = [(name, value) for name, value in attrs if name != "id"] + [("id", anchor)]
+                self.out[position] = self._tag(tag_name, attrs)
+                self.toc.append({"level": int(tag_name[1]), "id": anchor, "title": title})
+            self.heading = None
+        self.out.append(f"</{tag}>")
+        if tag in BLOCK_TAGS:
+            self.text.append(" ")
+
+    def handle_data(self, data):
+        self.out.append(escape(data, quote=False))
+        self.text.append(data)
+        if self.heading:
+            self.heading[2].append(data)
+
+
+def render_artifacts(content, excerpt=""):
+    rewriter = _Rewriter()
+    rewriter.feed(sanitize(content))
+    rewriter.close()
+
+    text = " ".join("".join(rewriter.text).split())
+    word_count = len(re.findall(r"\w+", text))
+    return {
+        "content_html": "".join(rewriter.out),
+        "toc": rewriter.toc,
+        "word_count": word_count,
+        "reading_minutes": max(1, math.ceil(word_count / settings.BLOG_WORDS_PER_MINUTE)),
+        "summary": (excerpt or "").strip() or Truncator(text).words(settings.BLOG_SUMMARY_WORDS),
+    }
@@ -0,0 +1,103 @@
+"""
+Stampede-safe view caching.
+
+``get_or_compute(key, compute, timeout)`` replaces the ``cache.get`` /
+compute / ``cache.set`` pattern. Entries are stored as
+``(value, expires_at, compute_seconds)`` and kept for ``stale_ttl`` seconds
+past their expiry, which gives three protections:
+
+* single flight: only the request that wins ``cache.add`` on the lock key
+  recomputes; the others serve the stale value, or wait briefly for the
+  winner on a cold miss;
+* probabilistic early refresh ("XFetch"): requests close to expiry refresh
+  with a probability that grows as expiry nears and with how long the value
+  took to compute, so hot keys are usually rebuilt before they expire;
+* stale-while-revalidate: an expired-but-present entry is returned at once
+  and refreshed in a background thread.
+"""
+import logging
+import math
+import random
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections
+
+from aorbo_project.cache_metrics import record_compute
+
+logger = logging.getLogger(__name__)
+
+
+def _lock_key(key):
+    return f"{key}:refresh_lock"
+
+
+def _store(key, compute, timeout, stale_ttl, version):
+    started = time.monotonic()
+    value = compute()
+    delta = time.monotonic() - started
+    cache.set(key, (value, time.time() + timeout, delta), timeout + stale_ttl, version=version)
+    # Includes pickling, which is where lazy querysets actually hit the database.
+    record_compute(key, time.monotonic() - started)
+    return value
+
+
+def _refresh_in_background(key, compute, timeout, stale_ttl, version):
+    def run():
+        try:
+            _store(key, compute, timeout, stale_ttl, version)
+        except Exception:
+            logger.exception("Background refresh of %s failed", key)
+        finally:
+            cache.delete(_lock_key(key), version=version)
+            close_old_connections()
+
+    threading.Thread(target=run, daemon=True).start()
+
+
+def get_or_compute(key, compute, timeout, stale_ttl=None, version=None, beta=1.0):
+    """
+    Return the cached value for ``key``, calling ``compute()`` to build it.
+
+    ``timeout`` is the freshness lifetime in seconds; ``stale_ttl`` (default:
+    ``timeout``) is how long an expired value may still be served while one
+    request rebuilds it. ``beta`` > 1 favours earlier refreshes.
+    """
+    if stale_ttl is None:
+        stale_ttl = timeout
+    lock_timeout = settings.CACHE_COMPUTE_LOCK_TIMEOUT
+
+    entry = cache.get(key, version=version)
+    if entry is not None:
+        value, expires_at, delta = entry
+        # XFetch: -log(u) is exponentially distributed, so the chance of an
+        # early refresh rises smoothly as expires_at approaches.
+        if time.time() - delta * beta * math.log(1.0 - random.random()) < expires_at:
+            return value
+        if cache.add(_lock_key(key), True, lock_timeout, version=version):
+            if settings.CACHE_REFRESH_IN_BACKGROUND:
+                _refresh_in_background(key, compute, timeout, stale_ttl, version)
+            else:
+                try:
+                    return _store(key, compute, timeout, stale_ttl, version)
+                finally:
+                    cache.delete(_lock_key(key), version=version)
+        return value
+
+    # Cold miss: one request computes, the rest wait for its result.
+    if cache.add(_lock_key(key), True, lock_timeout, version=version):
+        try:
+            return _store(key, compute, timeout, stale_ttl, version)
+        finally:
+            cache.delete(_lock_key(key), version=version)
+
+    deadline = time.monotonic() + settings.CACHE_COMPUTE_WAIT
+    while time.monotonic() < deadline:
+        time.sleep(0.02)
+        entry = cache.get(key, version=version)
+        if entry is not None:
+            return entry[0]
+    # The lock holder is too slow (or died); don't leave this request hanging.
+    return compute()
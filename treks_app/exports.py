@@ -0,0 +1,102 @@
+"""
+Streaming CSV / JSON Lines exports of contact leads and visitor logs.
+
+``export_stream(queryset, fields, fmt)`` walks the rows with
+``values_list(...).iterator(chunk_size=EXPORT_CHUNK_SIZE)`` (a server-side
+cursor on PostgreSQL) and yields encoded bytes in blocks of about 64 KB,
+optionally gzip-compressed on the fly, so memory use doesn't depend on
+the number of rows. The admin (ExportAdminMixin) serves it as a
+``StreamingHttpResponse`` and ``manage.py export_records`` writes it to a
+file or stdout.
+"""
+import csv
+import io
+import json
+import re
+import zlib
+
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+from .models import Contact, Visitor
+
+FORMATS = {
+    "csv": ("text/csv", "csv"),
+    "jsonl": ("application/x-ndjson", "jsonl"),
+}
+EXPORTS = {
+    "contact": (Contact, ["id", "name", "email", "mobile", "user_type", "comment", "created_at"]),
+    "visitor": (Visitor, ["id", "ip_address", "session_id", "user_agent", "visit_time"]),
+}
+BLOCK_SIZE = 64 * 1024
+# Spreadsheet apps run cells starting with these as formulas; phone
+# numbers such as "+91 939 809 3503" are left alone.
+FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+PHONE_NUMBER = re.compile(r"^[+-]?[\d\s().-]+$")
+
+
+def _csv_cell(value):
+    if value is None:
+        return ""
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES) and not PHONE_NUMBER.match(value):
+        return "'" + value
+    return value.isoformat() if hasattr(value, "isoformat") else value
+
+
+def _csv_blocks(rows, fields):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(fields)
+    for row in rows:
+        writer.writerow([_csv_cell(value) for value in row])
+        if buffer.tell() >= BLOCK_SIZE:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode("utf-8")
+
+
+def _json_value(value):
+    return value.isoformat() if hasattr(value, "isoformat") else str(value)
+
+
+def _jsonl_blocks(rows, fields):
+    lines, size = [], 0
+    for row in rows:
+        line = json.dumps(dict(zip(fields, row)), default=_json_value, ensure_ascii=False) + "\n"
+        lines.append(line)
+        size += len(line)
+        if size >= BLOCK_SIZE:
+            yield "".join(lines).encode("utf-8")
+            lines, size = [], 0
+    yield "".join(lines).encode("utf-8")
+
+
+def _gzip(blocks):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits 31: gzip container
+    for block in blocks:
+        compressed = compressor.compress(block)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def export_stream(queryset, fields, fmt, compress=False, chunk_size=None):
+    """Encoded export of ``fields`` for every row of ``queryset``, as an iterator of bytes."""
+    rows = queryset.values_list(*fields).iterator(chunk_size=chunk_size or settings.EXPORT_CHUNK_SIZE)
+    blocks = (_csv_blocks if fmt == "csv" else _jsonl_blocks)(rows, fields)
+    return _gzip(blocks) if compress else blocks
+
+
+def filename(model, fmt, compress=False):
+    stamp = timezone.localtime().strftime("%Y%m%d-%H%M%S")
+    return f"{model._meta.model_name}-{stamp}.{FORMATS[fmt][1]}" + (".gz" if compress else "")
+
+
+def streaming_response(queryset, fields, fmt, compress=False):
+    content_type = "application/gzip" if compress else f"{FORMATS[fmt][0]}; charset=utf-8"
+    response = StreamingHttpResponse(export_stream(queryset, fields, fmt, compress), content_type=content_type)
+    response["Content-Disposition"] = f'attachment; filename="{filename(queryset.model, fmt, compress)}"'
+    response["Cache-Control"] = "no-store"
+    return response
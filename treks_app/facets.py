@@ -0,0 +1,188 @@
+"""
+In-memory faceted search over TrekList.
+
+The catalog is loaded once per ``treklist`` content version into a
+``FacetIndex``: every trek gets a position (in home-page order) and every
+facet value (a state, tag, operator, price band, duration band or operating
+weekday) a bitmap,
+stored as a Python int with bit ``i`` set when trek ``i`` has that value.
+Filtering is then ``&`` across facets and ``|`` within one, and each facet
+count is a ``bit_count()`` of the value's bitmap against the other facets'
+selection, so a browse request needs no SQL at all.
+
+The index is stored with ``get_or_compute`` (shared between workers when the
+cache is) and kept unpickled in a per-process memo; signals.py bumps the
+``treklist`` version whenever a trek, its tags or operators, or a tag or
+operator itself changes, and every worker sees the bump within
+``CONTENT_VERSION_CHECK_INTERVAL``.
+"""
+from collections import defaultdict
+
+from django.conf import settings
+from django.db.models import Case, IntegerField, When
+from django.urls import reverse
+
+from .caching import get_or_compute
+from .models import WEEKDAYS, Operator, Tag, TrekList
+from .versions import get_version
+
+FACETS = ("state", "tag", "operator", "price", "duration", "day")
+
+# (version, index) of the last index this process loaded.
+_memo = (None, None)
+
+
+def _band(bands, value):
+    """Label of the (low, high) band holding ``value``; ``high`` is exclusive, None is open."""
+    if value is None:
+        return None
+    for low, high in bands:
+        if value >= low and (high is None or value < high):
+            return f"{low}-{high}" if high is not None else f"{low}-"
+    return None
+
+
+class FacetIndex:
+    def __init__(self, rows, values):
+        # rows: one (id, name, state, price_start, duration_days, image) per position.
+        # values: {facet: {value: bitmap}}
+        self.rows = rows
+        self.values = values
+        self.all = (1 << len(rows)) - 1
+
+    def _selected(self, facet, chosen):
+        bitmap = 0
+        for value in chosen:
+            bitmap |= self.values[facet].get(value, 0)
+        return bitmap
+
+    def search(self, filters):
+        """
+        ``filters`` maps facet -> list of values. Returns (bitmap of matches,
+        {facet: {value: count}}), where each facet's counts ignore that facet's
+        own filter so the other values stay selectable.
+        """
+        selections = {
+            facet: self._selected(facet, chosen)
+            for facet, chosen in filters.items() if facet in self.values and chosen
+        }
+        matches = self.all
+        for bitmap in selections.values():
+            matches &= bitmap
+
+        counts = {}
+        for facet, values in self.values.items():
+            base = self.all
+            for other, bitmap in selections.items():
+                if other != facet:
+                    base &= bitmap
+            counts[facet] = {
+                value: count for value, bitmap in values.items() if (count := (bitmap & base).bit_count())
+            }
+        return matches, counts
+
+    def positions(self, bitmap, offset, limit):
+        """Positions of the set bits of ``bitmap``, in order, skipping ``offset``."""
+        bits = bin(bitmap)[:1:-1]
+        found = []
+        index = bits.find("1")
+        while index != -1 and len(found) < offset + limit:
+            found.append(index)
+            index = bits.find("1", index + 1)
+        return found[offset:]
+
+
+def build_index():
+    treks = (
+        TrekList.objects
+        .annotate(pin_order=Case(When(is_pinned=True, then=0), default=1, output_field=IntegerField()))
+        .order_by("pin_order", "pin_priority", "-created_at")
+        .values_list(
+            "id", "name", "state", "price_start", "duration_days", "image",
+            "price_base", "duration_min_days", "operating_weekdays",
+        )
+    )
+    rows, position = [], {}
+    # Positions per value first; each bitmap is then built once, instead of
+    # copying an ever larger int for every trek added to it.
+    members = {facet: defaultdict(list) for facet in FACETS}
+
+    def add(facet, value, pos):
+        if value is not None:
+            members[facet][value].append(pos)
+
+    for row in treks.iterator():
+        pos = len(rows)
+        rows.append(row[:6])
+        position[row[0]] = pos
+        state, price, days, weekdays = row[2], row[6], row[7], row[8]
+        add("state", state.strip() if state and state.strip() else None, pos)
+        add("price", _band(settings.BROWSE_PRICE_BANDS, price), pos)
+        add("duration", _band(settings.BROWSE_DURATION_BANDS, days), pos)
+        for bit, day in enumerate(WEEKDAYS):
+            if weekdays & (1 << bit):
+                add("day", day, pos)
+
+    tag_names = dict(Tag.objects.values_list("pk", "name"))
+    operator_names = dict(Operator.objects.values_list("pk", "name"))
+    for field_name, facet, names in (("tags", "tag", tag_names), ("operators", "operator", operator_names)):
+        through = getattr(TrekList, field_name).through
+        column = TrekList._meta.get_field(field_name).m2m_reverse_name()
+        for trek_id, pk in through.objects.values_list("treklist_id", column).iterator():
+            if trek_id in position:
+                add(facet, names.get(pk), position[trek_id])
+
+    values = {
+        facet: {value: _bitmap(positions, len(rows)) for value, positions in by_value.items()}
+        for facet, by_value in members.items()
+    }
+    return FacetIndex(rows, values)
+
+
+def _bitmap(positions, size):
+    bits = bytearray((size + 7) // 8)
+    for pos in positions:
+        bits[pos >> 3] |= 1 << (pos & 7)
+    return int.from_bytes(bits, "little")
+
+
+def get_index():
+    global _memo
+    version = get_version("treklist")
+    memo_version, index = _memo
+    if memo_version != version:
+        # get_or_compute lets one request build a missing index while the
+        # others wait for it, so no lock is held here.
+        index = get_or_compute("facet_index", build_index, settings.BROWSE_INDEX_TIMEOUT, version=version)
+        _memo = (version, index)
+    return index
+
+
+def browse(filters, page=1, page_size=None):
+    """JSON-ready result of a browse request; see views.browse."""
+    page_size = page_size or settings.BROWSE_PAGE_SIZE
+    index = get_index()
+    matches, counts = index.search(filters)
+    total = matches.bit_count()
+    num_pages = max(1, -(-total // page_size))
+    page = min(max(1, page), num_pages)
+
+    results = []
+    for pos in index.positions(matches, (page - 1) * page_size, page_size):
+        trek_id, name, state, price, duration, image = index.rows[pos]
+        results.append({
+            "id": trek_id,
+            "name": name,
+            "state": state,
+            "price_start": price,
+            "duration_days": duration,
+            "image": image,
+            "url": reverse("card_trek_detail", args=[trek_id]),
+        })
+    return {
+        "count": total,
+        "page": page,
+        "num_pages": num_pages,
+        "results": results,
+        "facets": counts,
+    }
@@ -0,0 +1,19 @@
+"""Helpers for files generated from the database (sitemaps, static pages)."""
+import os
+import tempfile
+
+
+def write_file(path, data):
+    """Write ``data`` to ``path`` atomically, skipping it if nothing changed."""
+    try:
+        with open(path, "rb") as f:
+            if f.read() == data:
+                return False
+    except FileNotFoundError:
+        pass
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path))
+    with os.fdopen(fd, "wb") as f:
+        f.write(data)
+    os.chmod(tmp, 0o644)
+    os.replace(tmp, path)
+    return True
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from treks_app.models import TrekList
+from treks_app.versions import bump_version
+
+
+class Command(BaseCommand):
+    help = "Fill TrekList's parsed duration, price and weekday columns from the text fields."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        treks = TrekList.objects.only("pk", *TrekList.PARSED_FROM, *TrekList.PARSED_FIELDS).order_by("pk")
+        last_pk, changed, seen = None, 0, 0
+        while True:
+            batch = list((treks.filter(pk__gt=last_pk) if last_pk is not None else treks)[:batch_size])
+            if not batch:
+                break
+            dirty = []
+            for trek in batch:
+                before = [getattr(trek, name) for name in TrekList.PARSED_FIELDS]
+                trek.parse_fields()
+                if [getattr(trek, name) for name in TrekList.PARSED_FIELDS] != before:
+                    dirty.append(trek)
+            with transaction.atomic():
+                TrekList.objects.bulk_update(dirty, TrekList.PARSED_FIELDS)
+            changed += len(dirty)
+            seen += len(batch)
+            last_pk = batch[-1].pk
+            self.stdout.write(f"\r{seen} checked, {changed} updated", ending="")
+            self.stdout.flush()
+        self.stdout.write("")
+        if changed:
+            bump_version("pages", "treklist")
+        self.stdout.write(self.style.SUCCESS(f"Updated {changed} of {seen} treks"))
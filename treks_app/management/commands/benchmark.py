@@ -0,0 +1,77 @@
+import json
+import os
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+
+from treks_app import benchmark
+from treks_app.models import TrekList
+
+
+class Command(BaseCommand):
+    help = "Benchmark every public route concurrently and compare with a stored baseline."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=200, help="Requests per scenario.")
+        parser.add_argument("--concurrency", type=int, default=8)
+        parser.add_argument("--cold", action="store_true", help="Clear the cache before each scenario.")
+        parser.add_argument("--only", nargs="+", help="Scenario names to run.")
+        parser.add_argument("--seed", action="store_true", help="Migrate and seed an empty database first.")
+        parser.add_argument(
+            "--baseline", default=getattr(settings, "BENCHMARK_BASELINE", None),
+            help="Baseline JSON to compare with.",
+        )
+        parser.add_argument("--save-baseline", action="store_true", help="Write this run to --baseline.")
+        parser.add_argument("--output", help="Also write this run's results to a JSON file.")
+        parser.add_argument(
+            "--tolerance", type=float, default=0.2,
+            help="Allowed latency increase over the baseline, as a fraction (default 0.2).",
+        )
+        parser.add_argument("--fail-on-regression", action="store_true")
+
+    def handle(self, *args, **options):
+        if options["seed"]:
+            call_command("migrate", verbosity=0)
+            if not TrekList.objects.exists():
+                benchmark.seed_data()
+
+        results = benchmark.run(
+            options["requests"], options["concurrency"], cold=options["cold"], only=options["only"],
+        )
+        self.report(results)
+
+        if options["output"]:
+            self.write(options["output"], results)
+        baseline_path = options["baseline"]
+        if options["save_baseline"]:
+            if not baseline_path:
+                raise CommandError("--save-baseline needs --baseline.")
+            self.write(baseline_path, results)
+            self.stdout.write(self.style.SUCCESS(f"Baseline saved to {baseline_path}"))
+        elif baseline_path and os.path.exists(baseline_path):
+            with open(baseline_path) as f:
+                baseline = json.load(f)
+            self.compare(results, baseline, options["tolerance"], options["fail_on_regression"])
+
+    def report(self, results):
+        columns = ("requests", "errors", "rps", "p50_ms", "p95_ms", "p99_ms", "queries")
+        self.stdout.write(f"{'scenario':<22}" + "".join(f"{c:>10}" for c in columns))
+        for name, stats in results.items():
+            self.stdout.write(f"{name:<22}" + "".join(f"{stats[c]:>10}" for c in columns))
+
+    def write(self, path, results):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+            f.write("\n")
+
+    def compare(self, results, baseline, tolerance, fail):
+        regressions = benchmark.compare(results, baseline, tolerance)
+        if not regressions:
+            self.stdout.write(self.style.SUCCESS("No regressions against the baseline."))
+            return
+        for name, metric, before, now in regressions:
+            self.stdout.write(self.style.WARNING(f"{name}: {metric} {before} -> {now}"))
+        if fail:
+            raise CommandError(f"{len(regressions)} regressions against the baseline.")
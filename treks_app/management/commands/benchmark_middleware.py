@@ -0,0 +1,74 @@
+import time
+
+from django.conf import settings
+from django.core.handlers.base import BaseHandler
+from django.core.management.base import BaseCommand
+from django.http import HttpResponse
+from django.test import RequestFactory, override_settings
+from django.urls import path
+
+DEFAULT_PATHS = ["/", "/about/", "/blogs/", "/blogs/sample-post/", "/treks/", "/search-suggestions/", "/browse/"]
+
+
+def _noop(request, *args, **kwargs):
+    return HttpResponse("ok")
+
+
+# Requests are routed here (request.urlconf) so only middleware is timed.
+urlpatterns = [path("<path:anything>", _noop), path("", _noop)]
+
+
+def _handler(**overrides):
+    with override_settings(**overrides):
+        handler = BaseHandler()
+        handler.load_middleware()
+    return handler
+
+
+def _time(handler, factory, url, requests):
+    start = time.perf_counter()
+    for _ in range(requests):
+        request = factory.get(url)
+        request.urlconf = __name__
+        handler.get_response(request)
+    return (time.perf_counter() - start) / requests * 1e6
+
+
+class Command(BaseCommand):
+    help = "Time the middleware stack per request with and without MIDDLEWARE_PROFILES on public paths."
+
+    def add_arguments(self, parser):
+        parser.add_argument("paths", nargs="*", default=DEFAULT_PATHS)
+        parser.add_argument("--requests", type=int, default=2000, help="Requests per path and stack.")
+
+    def handle(self, *args, **options):
+        # Page cache hits and rate limiting would short-circuit repeated requests,
+        # and sampled timing/tracing would add noise.
+        with override_settings(
+            PAGE_CACHE_VIEWS=[], RATE_LIMIT_ENABLED=False, SERVER_TIMING_SAMPLE_RATE=0, QUERY_TRACER_SAMPLE_RATE=0,
+        ):
+            self.run(options)
+
+    def run(self, options):
+        factory = RequestFactory(HTTP_HOST=settings.ALLOWED_HOSTS[0])
+        stacks = {"full": _handler(MIDDLEWARE_PROFILES={}), "profiled": _handler()}
+        for handler in stacks.values():
+            _time(handler, factory, "/", 50)  # warm up
+
+        self.stdout.write(f"{'path':<28}{'full µs':>10}{'profiled µs':>13}{'saved µs':>10}{'saved':>8}")
+        totals = {"full": 0.0, "profiled": 0.0}
+        for url in options["paths"]:
+            timings = {name: _time(handler, factory, url, options["requests"]) for name, handler in stacks.items()}
+            for name, value in timings.items():
+                totals[name] += value
+            saved = timings["full"] - timings["profiled"]
+            self.stdout.write(
+                f"{url:<28}{timings['full']:>10.1f}{timings['profiled']:>13.1f}{saved:>10.1f}"
+                f"{saved / timings['full']:>8.0%}"
+            )
+        count = len(options["paths"])
+        saved = (totals["full"] - totals["profiled"]) / count
+        self.stdout.write(self.style.SUCCESS(
+            f"Mean per request: {totals['full'] / count:.1f} µs full, "
+            f"{totals['profiled'] / count:.1f} µs profiled, {saved:.1f} µs saved"
+        ))
@@ -0,0 +1,27 @@
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from treks_app.assets import DIST_DIR, build_bundles
+
+
+class Command(BaseCommand):
+    help = "Bundle, purge and minify per-page CSS/JS and extract critical CSS into static/dist/."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--output", default=os.path.join(settings.BASE_DIR, "static", DIST_DIR),
+            help="Directory to write bundles to (default: static/dist).",
+        )
+
+    def handle(self, *args, **options):
+        output = options["output"]
+        manifest = build_bundles(output)
+        for template_name, entry in manifest.items():
+            sizes = ", ".join(
+                f"{kind} {os.path.getsize(os.path.join(output, os.path.basename(path)))}B"
+                for kind, path in entry.items()
+            )
+            self.stdout.write(f"{template_name}: {sizes}")
+        self.stdout.write(self.style.SUCCESS(f"Built {len(manifest)} bundles into {output}"))
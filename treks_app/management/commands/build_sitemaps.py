@@ -0,0 +1,18 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from treks_app.sitemaps import build_sitemaps
+
+
+class Command(BaseCommand):
+    help = "Write the sitemap index and its chunked, gzipped child sitemaps; unchanged chunks are kept."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--output", default=settings.SITEMAP_ROOT, help="Directory to write to (default: SITEMAP_ROOT).")
+        parser.add_argument("--base-url", default=settings.SITEMAP_BASE_URL)
+
+    def handle(self, *args, **options):
+        written, unchanged, removed = build_sitemaps(options["output"], options["base_url"])
+        self.stdout.write(self.style.SUCCESS(
+            f"{written} sitemaps written, {unchanged} unchanged, {removed} removed in {options['output']}"
+        ))
@@ -0,0 +1,26 @@
+import time
+
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+
+class Command(BaseCommand):
+    help = "Delete expired django_session rows in small batches (unlike clearsessions' single DELETE)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument("--pause", type=float, default=0.0, help="Seconds to sleep between batches.")
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        expired = Session.objects.filter(expire_date__lt=now).values_list("pk", flat=True)
+        deleted = 0
+        while True:
+            keys = list(expired[:options["batch_size"]])
+            if not keys:
+                break
+            deleted += Session.objects.filter(pk__in=keys).delete()[0]
+            if options["pause"]:
+                time.sleep(options["pause"])
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} expired sessions"))
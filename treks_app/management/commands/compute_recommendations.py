@@ -0,0 +1,58 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from treks_app.models import TrekRecommendation
+from treks_app.recommendations import feature_matrix, nearest_neighbours, trek_features
+from treks_app.static_export import export_cards
+from treks_app.versions import bump_version
+
+
+class Command(BaseCommand):
+    help = "Rebuild TrekRecommendation: top-k cosine neighbours of every TrekList by tags, state, operators and activities."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--top-k", type=int, default=6)
+        parser.add_argument("--block-size", type=int, default=1000, help="Rows multiplied at a time.")
+        parser.add_argument("--min-score", type=float, default=0.05)
+        parser.add_argument("--batch-size", type=int, default=5000, help="Rows replaced per transaction.")
+
+    def handle(self, *args, **options):
+        ids, features = trek_features()
+        matrix = feature_matrix(ids, features)
+        self.stdout.write(f"{matrix.shape[0]} treks x {matrix.shape[1]} features")
+
+        # Each batch of treks has its rows swapped in its own transaction, so
+        # readers see a trek's old or new recommendations, never none, and no
+        # transaction holds the whole table.
+        written, self.changed = 0, set()
+        treks, batch = [], []
+        neighbours_by_row = nearest_neighbours(matrix, options["top_k"], options["block_size"], options["min_score"])
+        for row, neighbours in neighbours_by_row:
+            treks.append(ids[row])
+            batch += [
+                TrekRecommendation(trek_id=ids[row], recommended_id=ids[neighbour], rank=rank, score=score)
+                for rank, (neighbour, score) in enumerate(neighbours, start=1)
+            ]
+            if len(batch) >= options["batch_size"]:
+                written += self.replace(treks, batch)
+                treks, batch = [], []
+        written += self.replace(treks, batch)
+        bump_version("pages")
+        self.stdout.write(self.style.SUCCESS(f"Stored {written} recommendations"))
+        if settings.STATIC_EXPORT_ROOT and self.changed:
+            # TrekRecommendation has no signal receivers (see signals.py), so
+            # the cards showing the changed neighbours are re-exported here.
+            exported = export_cards(settings.STATIC_EXPORT_ROOT, sorted(self.changed))
+            self.stdout.write(f"Re-exported {len(self.changed)} trek cards ({exported[0]} changed)")
+
+    def replace(self, treks, recommendations):
+        with transaction.atomic():
+            # TrekRecommendation has no signal receivers, so this is a single DELETE.
+            stale = TrekRecommendation.objects.filter(trek_id__in=treks)
+            before = set(stale.values_list("trek_id", "recommended_id", "rank"))
+            stale.delete()
+            TrekRecommendation.objects.bulk_create(recommendations)
+        after = {(r.trek_id, r.recommended_id, r.rank) for r in recommendations}
+        self.changed.update(trek_id for trek_id, _, _ in before ^ after)
+        return len(recommendations)
@@ -0,0 +1,47 @@
+import sys
+
+from django.core.exceptions import FieldError
+from django.core.management.base import BaseCommand, CommandError
+
+from treks_app.exports import EXPORTS, FORMATS, export_stream
+
+
+class Command(BaseCommand):
+    help = "Stream contacts or visitors to CSV or JSON Lines, optionally gzipped, in constant memory."
+
+    def add_arguments(self, parser):
+        parser.add_argument("model", choices=sorted(EXPORTS))
+        parser.add_argument("--format", choices=sorted(FORMATS), default="csv")
+        parser.add_argument("--gzip", action="store_true")
+        parser.add_argument("--output", default="-", help="File to write, or - for stdout (default).")
+        parser.add_argument(
+            "--filter", action="append", default=[], metavar="LOOKUP=VALUE",
+            help="Queryset filter, e.g. visit_time__gte=2025-01-01 (repeatable).",
+        )
+        parser.add_argument("--chunk-size", type=int, help="Rows per cursor fetch (default EXPORT_CHUNK_SIZE).")
+
+    def handle(self, *args, **options):
+        model, fields = EXPORTS[options["model"]]
+        lookups = {}
+        for item in options["filter"]:
+            lookup, sep, value = item.partition("=")
+            if not sep:
+                raise CommandError(f"--filter expects LOOKUP=VALUE, got {item!r}")
+            lookups[lookup] = value
+        try:
+            queryset = model.objects.filter(**lookups).order_by("pk")
+        except FieldError as e:
+            raise CommandError(str(e))
+
+        stream = export_stream(queryset, fields, options["format"], options["gzip"], options["chunk_size"])
+        if options["output"] == "-":
+            self.write(sys.stdout.buffer, stream)
+        else:
+            with open(options["output"], "wb") as f:
+                self.write(f, stream)
+            self.stderr.write(self.style.SUCCESS(f"Wrote {options['output']}"))
+
+    def write(self, f, stream):
+        for block in stream:
+            f.write(block)
+        f.flush()
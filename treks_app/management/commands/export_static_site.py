@@ -0,0 +1,44 @@
+from django.apps import apps
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from treks_app.static_export import export_instance, export_site
+
+
+class Command(BaseCommand):
+    help = "Render public pages into precompressed HTML files for the web server to serve directly."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--output", default=settings.STATIC_EXPORT_ROOT,
+            help="Directory to write to (default: STATIC_EXPORT_ROOT).",
+        )
+        parser.add_argument(
+            "--instance", metavar="APP.MODEL:PK",
+            help="Only re-render the pages showing this object, e.g. treks_app.Blog:12.",
+        )
+        parser.add_argument("--clean", action="store_true", help="Delete the output directory first.")
+
+    def handle(self, *args, **options):
+        output = options["output"]
+        if not output:
+            raise CommandError("Set STATIC_EXPORT_ROOT or pass --output.")
+
+        if options["instance"]:
+            written, unchanged, removed = export_instance(output, self.get_instance(options["instance"]))
+        else:
+            written, unchanged, removed = export_site(output, clean=options["clean"])
+        self.stdout.write(self.style.SUCCESS(
+            f"{written} pages written, {unchanged} unchanged, {removed} removed in {output}"
+        ))
+
+    def get_instance(self, label):
+        try:
+            model_label, pk = label.split(":", 1)
+            model = apps.get_model(model_label)
+        except (ValueError, LookupError):
+            raise CommandError(f"Expected APP.MODEL:PK, got {label!r}.")
+        try:
+            return model._default_manager.get(pk=pk)
+        except model.DoesNotExist:
+            raise CommandError(f"{label} does not exist; run a full export to drop its pages.")
@@ -0,0 +1,75 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from treks_app.models import Blog, TrekImage, TrekList
+from treks_app.storage import get_bucket
+
+# Folders written by Blog.upload_to_supabase and TrekImage.save
+DEFAULT_PREFIXES = ["blogs", "trek_images"]
+
+
+def referenced_paths(bucket):
+    """Return the set of bucket paths still referenced by any model row."""
+    urls = []
+    urls += Blog.objects.values_list("image_url", "original_image_url").iterator()
+    urls += TrekImage.objects.values_list("image_url").iterator()
+    urls += TrekList.objects.values_list("image", "hero_image").iterator()
+
+    paths = set()
+    for row in urls:
+        for url in row:
+            path = bucket.path_for_url(url)
+            if path:
+                paths.add(path)
+    return paths
+
+
+class Command(BaseCommand):
+    help = "Delete objects in the image bucket that are no longer referenced by Blog, TrekImage or TrekList."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true", help="List orphans without deleting them.")
+        parser.add_argument(
+            "--grace-hours", type=float, default=settings.STORAGE_GC_GRACE_HOURS,
+            help="Only delete orphans last modified more than this many hours ago.",
+        )
+        parser.add_argument("--prefix", action="append", dest="prefixes", help="Bucket folder to scan (repeatable).")
+        parser.add_argument("--page-size", type=int, default=1000, help="Objects per list request.")
+        parser.add_argument("--batch-size", type=int, default=100, help="Objects per delete request.")
+
+    def handle(self, *args, **options):
+        bucket = get_bucket()
+        referenced = referenced_paths(bucket)
+        cutoff = timezone.now() - timedelta(hours=options["grace_hours"])
+
+        scanned = recent = 0
+        orphans = []
+        # Collect first, delete afterwards: removing objects while paging
+        # with offsets would shift later pages and skip objects.
+        for prefix in options["prefixes"] or DEFAULT_PREFIXES:
+            for obj in bucket.iter_objects(prefix, page_size=options["page_size"]):
+                scanned += 1
+                if obj.path in referenced:
+                    continue
+                if obj.updated_at is None or obj.updated_at > cutoff:
+                    recent += 1
+                    continue
+                orphans.append(obj)
+
+        freed = sum(obj.size for obj in orphans)
+        for obj in orphans:
+            self.stdout.write(f"{'would delete' if options['dry_run'] else 'deleting'} {obj.path}", self.style.WARNING)
+
+        if not options["dry_run"]:
+            batch_size = options["batch_size"]
+            for start in range(0, len(orphans), batch_size):
+                bucket.remove([obj.path for obj in orphans[start:start + batch_size]])
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Scanned {scanned} objects: {len(orphans)} orphaned ({freed} bytes), "
+            f"{recent} unreferenced but inside the grace period."
+            + (" Dry run, nothing deleted." if options["dry_run"] else "")
+        ))
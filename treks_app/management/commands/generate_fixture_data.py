@@ -0,0 +1,210 @@
+import random
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from django.utils.text import slugify
+
+from treks_app.models import Contact, Operator, Tag, TrekImage, TrekList, TrekPoint, Visitor
+from treks_app.versions import bump_version
+
+PLACES = [
+    "Kedarkantha", "Hampta Pass", "Triund", "Kudremukh", "Gokarna", "Valley of Flowers", "Roopkund",
+    "Chadar", "Sandakphu", "Kumara Parvatha", "Rajmachi", "Harishchandragad", "Brahmatal", "Dayara Bugyal",
+    "Tadiandamol", "Netravati", "Bhrigu Lake", "Kheerganga", "Goechala", "Markha Valley",
+]
+SUFFIXES = ["Trek", "Summit Trek", "Lake Trek", "Ridge Walk", "Camping Trip", "Weekend Trek", "Circuit"]
+STATES = ["Uttarakhand", "Himachal Pradesh", "Karnataka", "Maharashtra", "Sikkim", "Ladakh", "Kerala", "West Bengal"]
+TAGS = [
+    "adventure", "camping", "nature", "beach", "spiritual", "weekend", "snow", "forest", "waterfall",
+    "lake", "monsoon", "winter", "summer", "beginner", "family", "photography", "wildlife", "night trek",
+]
+ACTIVITIES = ["Trekking", "Camping", "Bonfire", "Rappelling", "Stargazing", "River crossing", "Photography"]
+DAYS = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+USER_AGENTS = [
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 Chrome/124.0 Safari/537.36",
+    "Mozilla/5.0 (iPhone; CPU iPhone OS 17_4 like Mac OS X) AppleWebKit/605.1.15 Mobile/15E148",
+    "Mozilla/5.0 (Linux; Android 14; Pixel 8) AppleWebKit/537.36 Chrome/124.0 Mobile Safari/537.36",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 14_4) AppleWebKit/605.1.15 Version/17.4 Safari/605.1.15",
+]
+FIRST_NAMES = ["Aarav", "Diya", "Ishaan", "Meera", "Kabir", "Ananya", "Rohan", "Saanvi", "Vikram", "Priya"]
+
+
+def batched(iterable, size):
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class Command(BaseCommand):
+    help = "Bulk-insert a large synthetic catalog (TrekList and relations) plus Visitor and Contact rows for scaling tests."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--treks", type=int, default=100_000)
+        parser.add_argument("--visitors", type=int, default=2_000_000)
+        parser.add_argument("--contacts", type=int, default=1_000_000)
+        parser.add_argument("--days", type=int, default=365, help="Spread timestamps over this many past days.")
+        parser.add_argument("--seed", type=int, default=1, help="Random seed; the same seed produces the same data.")
+        parser.add_argument("--batch-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options["seed"])
+        self.batch_size = options["batch_size"]
+        self.now = timezone.now()
+        self.span = timedelta(days=options["days"]).total_seconds()
+        self.prefix = f"s{options['seed']}"
+
+        tag_ids, operator_ids, point_ids = self.create_lookups()
+        trek_ids = self.create_treks(options["treks"], tag_ids, operator_ids, point_ids)
+        self.create_images(trek_ids)
+        self.create_related(trek_ids)
+        self.create_visitors(options["visitors"])
+        self.create_contacts(options["contacts"])
+        bump_version("pages", "treklist")
+        self.stdout.write(self.style.SUCCESS("Done."))
+
+    def past(self):
+        return self.now - timedelta(seconds=self.rng.random() * self.span)
+
+    def insert(self, model, objects, label, total, timestamp=None):
+        """
+        bulk_create ``objects`` in batches. ``timestamp`` names an auto_now_add
+        field, which bulk_create stamps with now(); the generated values are
+        written back afterwards with bulk_update.
+        """
+        # bulk_update needs the primary keys, which the database only hands
+        # back for auto-increment keys when conflicts aren't ignored.
+        ignore_conflicts = not (timestamp and model._meta.pk.db_returning)
+        done = 0
+        for batch in batched(objects, self.batch_size):
+            values = [getattr(obj, timestamp) for obj in batch] if timestamp else None
+            with transaction.atomic():
+                model.objects.bulk_create(batch, batch_size=self.batch_size, ignore_conflicts=ignore_conflicts)
+                if timestamp:
+                    for obj, value in zip(batch, values):
+                        setattr(obj, timestamp, value)
+                    model.objects.bulk_update(batch, [timestamp], batch_size=self.batch_size)
+            done += len(batch)
+            self.stdout.write(f"\r{label}: {done}/{total}", ending="")
+            self.stdout.flush()
+        self.stdout.write("")
+
+    def create_lookups(self):
+        Tag.objects.bulk_create([Tag(name=name) for name in TAGS], ignore_conflicts=True)
+        Operator.objects.bulk_create(
+            [Operator(name=f"{place} Adventures {i}") for i, place in enumerate(PLACES * 10)], ignore_conflicts=True,
+        )
+        if not TrekPoint.objects.filter(name__startswith=f"{self.prefix} ").exists():
+            TrekPoint.objects.bulk_create(
+                [TrekPoint(name=f"{self.prefix} {place} base camp {i}") for i, place in enumerate(PLACES * 50)]
+            )
+        return (
+            list(Tag.objects.filter(name__in=TAGS).order_by("pk").values_list("pk", flat=True)),
+            list(Operator.objects.order_by("pk").values_list("pk", flat=True)),
+            list(TrekPoint.objects.filter(name__startswith=f"{self.prefix} ").order_by("pk").values_list("pk", flat=True)),
+        )
+
+    def create_treks(self, count, tag_ids, operator_ids, point_ids):
+        rng = self.rng
+        trek_ids = []
+        links = {"tags": [], "operators": [], "trek_points": []}
+
+        def treks():
+            for i in range(count):
+                name = f"{rng.choice(PLACES)} {rng.choice(SUFFIXES)}"
+                trek_id = f"{slugify(name)}-{self.prefix}-{i}"
+                trek_ids.append(trek_id)
+                links["tags"] += [(trek_id, pk) for pk in rng.sample(tag_ids, rng.randint(2, 5))]
+                links["operators"] += [(trek_id, pk) for pk in rng.sample(operator_ids, rng.randint(1, 3))]
+                links["trek_points"] += [(trek_id, pk) for pk in rng.sample(point_ids, rng.randint(3, 8))]
+                days = rng.randint(1, 8)
+                trek = TrekList(
+                    id=trek_id, name=name, state=rng.choice(STATES),
+                    is_pinned=i < 10, pin_priority=i + 1 if i < 10 else None,
+                    image=f"https://example.com/treks/{trek_id}.webp",
+                    hero_image=f"https://example.com/treks/{trek_id}-hero.webp",
+                    duration_days=f"{days} Days / {days - 1} Nights" if days > 1 else "1 Day",
+                    price_start=rng.randint(10, 400) * 100,
+                    operating_days=", ".join(sorted(rng.sample(DAYS, rng.randint(1, 7)), key=DAYS.index)),
+                    short_desc=f"A {days}-day trek in {rng.choice(STATES)}.",
+                    highlights="Summit views, alpine meadows, campsite by the lake",
+                    activities=", ".join(rng.sample(ACTIVITIES, 3)),
+                    created_at=self.past(),
+                )
+                trek.parse_fields()  # bulk_create skips save()
+                yield trek
+
+        self.insert(TrekList, treks(), "TrekList", count, timestamp="created_at")
+
+        for field_name, rows in links.items():
+            through = getattr(TrekList, field_name).through
+            column = TrekList._meta.get_field(field_name).m2m_reverse_name()
+            self.insert(
+                through,
+                (through(treklist_id=trek_id, **{column: pk}) for trek_id, pk in rows),
+                f"TrekList.{field_name}", len(rows),
+            )
+        return trek_ids
+
+    def create_images(self, trek_ids):
+        rng = self.rng
+        images = [
+            TrekImage(trek_id=trek_id, image_url=f"https://example.com/trek_images/{trek_id}-{n}.webp", caption=f"View {n + 1}")
+            for trek_id in trek_ids
+            for n in range(rng.randint(2, 4))
+        ]
+        self.insert(TrekImage, iter(images), "TrekImage", len(images))
+
+    def create_related(self, trek_ids):
+        """Symmetrical self-M2M: store both directions, as Django would."""
+        rng = self.rng
+        through = TrekList.related_treks.through
+        pairs = set()
+        for trek_id in trek_ids:
+            for other in rng.sample(trek_ids, min(3, len(trek_ids))):
+                if other != trek_id:
+                    pairs.add((trek_id, other))
+                    pairs.add((other, trek_id))
+        self.insert(
+            through,
+            (through(from_treklist_id=a, to_treklist_id=b) for a, b in sorted(pairs)),
+            "TrekList.related_treks", len(pairs),
+        )
+
+    def create_visitors(self, count):
+        rng = self.rng
+        # Returning visitors share a session, so distinct-session stats are meaningful.
+        sessions = [f"{rng.getrandbits(128):032x}" for _ in range(max(1, count // 4))]
+
+        def visitors():
+            for _ in range(count):
+                yield Visitor(
+                    ip_address=f"{rng.randint(1, 223)}.{rng.randint(0, 255)}.{rng.randint(0, 255)}.{rng.randint(1, 254)}",
+                    session_id=rng.choice(sessions),
+                    user_agent=rng.choice(USER_AGENTS),
+                    visit_time=self.past(),
+                )
+
+        self.insert(Visitor, visitors(), "Visitor", count, timestamp="visit_time")
+
+    def create_contacts(self, count):
+        rng = self.rng
+
+        def contacts():
+            for i in range(count):
+                name = rng.choice(FIRST_NAMES)
+                yield Contact(
+                    name=f"{name} {i}", email=f"{name.lower()}.{i}@example.com",
+                    mobile=f"9{rng.randint(0, 999_999_999):09d}",
+                    user_type=rng.choice(["trekker", "organizer", "other"]),
+                    comment=f"Looking for a {rng.choice(TAGS)} trek in {rng.choice(STATES)}.",
+                    created_at=self.past(),
+                )
+
+        self.insert(Contact, contacts(), "Contact", count)
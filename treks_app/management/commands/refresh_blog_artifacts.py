@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from treks_app.models import Blog
+from treks_app.versions import bump_version
+
+
+class Command(BaseCommand):
+    help = "Recompute Blog's sanitized HTML, TOC, summary, word count and reading time from content."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=200)
+        parser.add_argument("--slug", action="append", help="Only these posts (repeatable).")
+
+    def handle(self, *args, **options):
+        blogs = Blog.objects.only("pk", *Blog.RENDERED_FROM, *Blog.RENDERED_FIELDS).order_by("pk")
+        if options["slug"]:
+            blogs = blogs.filter(slug__in=options["slug"])
+
+        last_pk, changed, seen = None, 0, 0
+        while True:
+            batch = list((blogs.filter(pk__gt=last_pk) if last_pk is not None else blogs)[:options["batch_size"]])
+            if not batch:
+                break
+            dirty = []
+            for blog in batch:
+                before = [getattr(blog, name) for name in Blog.RENDERED_FIELDS]
+                blog.render_content()
+                if [getattr(blog, name) for name in Blog.RENDERED_FIELDS] != before:
+                    dirty.append(blog)
+            with transaction.atomic():
+                Blog.objects.bulk_update(dirty, Blog.RENDERED_FIELDS)
+            changed += len(dirty)
+            seen += len(batch)
+            last_pk = batch[-1].pk
+        if changed:
+            bump_version("pages")
+        self.stdout.write(self.style.SUCCESS(f"Updated {changed} of {seen} posts"))
@@ -0,0 +1,40 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from treks_app.warmup import HttpFetcher, LocalFetcher, has_shared_cache, warm, warmup_urls
+
+
+class Command(BaseCommand):
+    help = "Populate the view and page caches by requesting every cacheable page."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--base-url",
+            help="Crawl a running deployment instead of this process (required unless the cache is shared).",
+        )
+        parser.add_argument("--workers", type=int, default=settings.WARMUP_WORKERS)
+        parser.add_argument(
+            "--budget", type=float, default=settings.WARMUP_TIME_BUDGET,
+            help="Seconds after which no new requests are started.",
+        )
+        parser.add_argument("--list", action="store_true", help="Print the URLs without fetching them.")
+
+    def handle(self, *args, **options):
+        urls = warmup_urls()
+        if options["list"]:
+            self.stdout.write("\n".join(urls))
+            return
+
+        if not options["base_url"] and not has_shared_cache():
+            # Pages fetched here would only fill this command's own cache,
+            # which is thrown away when it exits.
+            raise CommandError(
+                "The default cache is per-process, so warming it from this command has no effect "
+                "on the web workers. Pass --base-url, or set WARM_CACHES_ON_START for the workers."
+            )
+        fetch = HttpFetcher(options["base_url"]) if options["base_url"] else LocalFetcher()
+        counts = warm(urls, fetch, workers=options["workers"], budget=options["budget"])
+        self.stdout.write(self.style.SUCCESS(
+            f"Warmed {counts['warmed']} of {len(urls)} URLs "
+            f"({counts['failed']} failed, {counts['skipped']} skipped after budget)"
+        ))
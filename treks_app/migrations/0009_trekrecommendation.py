@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-19 16:27
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('treks_app', '0008_delete_toptrek_delete_whatsnew_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrekRecommendation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rank', models.PositiveSmallIntegerField()),
+                ('score', models.FloatField()),
+                ('recommended', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='treks_app.treklist')),
+                ('trek', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='recommendations', to='treks_app.treklist')),
+            ],
+            options={
+                'ordering': ['trek', 'rank'],
+                'constraints': [models.UniqueConstraint(fields=('trek', 'rank'), name='unique_recommendation_rank')],
+            },
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.18 on 2026-10-19 16:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('treks_app', '0009_trekrecommendation'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='treklist',
+            name='duration_max_days',
+            field=models.PositiveSmallIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='treklist',
+            name='duration_min_days',
+            field=models.PositiveSmallIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='treklist',
+            name='operating_weekdays',
+            field=models.PositiveSmallIntegerField(default=0, editable=False, help_text='Bitmask of operating_days, bit 0 = Monday'),
+        ),
+        migrations.AddField(
+            model_name='treklist',
+            name='price_base',
+            field=models.PositiveIntegerField(blank=True, editable=False, help_text='price_start in settings.BASE_CURRENCY', null=True),
+        ),
+        migrations.AddIndex(
+            model_name='treklist',
+            index=models.Index(fields=['duration_min_days', 'duration_max_days'], name='treks_app_t_duratio_152ef8_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='treklist',
+            index=models.Index(fields=['price_base'], name='treks_app_t_price_b_d3d4ab_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='treklist',
+            index=models.Index(fields=['operating_weekdays'], name='treks_app_t_operati_b06898_idx'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-19 16:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('treks_app', '0010_treklist_parsed_fields'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='blog',
+            name='content_html',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name='blog',
+            name='reading_minutes',
+            field=models.PositiveSmallIntegerField(default=1, editable=False),
+        ),
+        migrations.AddField(
+            model_name='blog',
+            name='summary',
+            field=models.TextField(blank=True, editable=False, help_text='excerpt, or the start of the content'),
+        ),
+        migrations.AddField(
+            model_name='blog',
+            name='toc',
+            field=models.JSONField(blank=True, default=list, editable=False),
+        ),
+        migrations.AddField(
+            model_name='blog',
+            name='word_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
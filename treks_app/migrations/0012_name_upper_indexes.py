@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-19 16:49
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('treks_app', '0011_blog_render_artifacts'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='operator',
+            index=models.Index(django.db.models.functions.text.Upper('name'), name='operator_name_upper_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tag',
+            index=models.Index(django.db.models.functions.text.Upper('name'), name='tag_name_upper_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='treklist',
+            index=models.Index(django.db.models.functions.text.Upper('name'), name='treklist_name_upper_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='trekpoint',
+            index=models.Index(django.db.models.functions.text.Upper('name'), name='trekpoint_name_upper_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-19 16:53
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('treks_app', '0012_name_upper_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='contact',
+            name='created_at',
+            field=models.DateTimeField(db_index=True, default=django.utils.timezone.now),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('treks_app', '0013_contact_created_at_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContentVersion',
+            fields=[
+                ('name', models.CharField(max_length=100, primary_key=True, serialize=False)),
+                ('version', models.BigIntegerField()),
+            ],
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:14
+
+import django.contrib.postgres.indexes
+import django.db.models.functions.text
+import treks_app.models
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('treks_app', '0014_contentversion'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='operator',
+            name='operator_name_upper_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='tag',
+            name='tag_name_upper_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='treklist',
+            name='treklist_name_upper_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='trekpoint',
+            name='trekpoint_name_upper_idx',
+        ),
+        migrations.AddIndex(
+            model_name='operator',
+            index=treks_app.models.PatternIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('name'), name='text_pattern_ops'), name='operator_name_pattern_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tag',
+            index=treks_app.models.PatternIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('name'), name='text_pattern_ops'), name='tag_name_pattern_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='treklist',
+            index=treks_app.models.PatternIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('name'), name='text_pattern_ops'), name='treklist_name_pattern_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='trekpoint',
+            index=treks_app.models.PatternIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('name'), name='text_pattern_ops'), name='trekpoint_name_pattern_idx'),
+        ),
+    ]
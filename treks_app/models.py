@@ -5,16 +5,17 @@ from django.utils.text import slugify
 from django.core.exceptions import ValidationError
 from django.utils.html import mark_safe
 from django.conf import settings
+from django.contrib.postgres.indexes import OpClass
+from django.db.models.functions import Upper
 from ckeditor.fields import RichTextField
-from PIL import Image, ImageEnhance
-import bleach
 import uuid
 import mimetypes
 import io
 from io import BytesIO
 import os
+import re
 from django.template.defaultfilters import filesizeformat
-from .supabase_client import supabase
+from .storage import get_bucket
 
 class Visitor(models.Model):
     ip_address = models.GenericIPAddressField()
@@ -48,6 +49,8 @@ def validate_image_file_extension(value):
         raise ValidationError(
             f"File size too large. Max size is {filesizeformat(MAX_FILE_SIZE)}."
         )
+    from PIL import Image
+
     try:
         value.seek(0)
         img = Image.open(value)
@@ -64,7 +67,7 @@ class Contact(models.Model):
     mobile = models.CharField(max_length=20)
     user_type = models.CharField(max_length=50, blank=True, null=True)
     comment = models.TextField()
-    created_at = models.DateTimeField(default=timezone.now)
+    created_at = models.DateTimeField(default=timezone.now, db_index=True)
     
     def __str__(self):
         return f"{self.name} - {self.email}"
@@ -89,10 +92,22 @@ class Blog(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     is_featured = models.BooleanField(default=False)
 
+    # Derived from content on save (see blog_render; refresh_blog_artifacts for old rows).
+    content_html = models.TextField(blank=True, editable=False)
+    toc = models.JSONField(default=list, blank=True, editable=False)
+    summary = models.TextField(blank=True, editable=False, help_text="excerpt, or the start of the content")
+    word_count = models.PositiveIntegerField(default=0, editable=False)
+    reading_minutes = models.PositiveSmallIntegerField(default=1, editable=False)
+
+    RENDERED_FROM = {"content", "excerpt"}
+    RENDERED_FIELDS = ["content_html", "toc", "summary", "word_count", "reading_minutes"]
+
     class Meta:
         ordering = ['-created_at']
 
     def convert_to_webp(self, image_file):
+        from PIL import Image
+
         image = Image.open(image_file).convert("RGB")
         output = BytesIO()
         image.save(output, format="WEBP", quality=85)
@@ -100,7 +115,7 @@ class Blog(models.Model):
         return output
 
     def upload_to_supabase(self, image_file):
-        bucket = supabase.storage.from_("blogs")
+        bucket = get_bucket()
         folder = "blogs"
 
         # original
@@ -108,11 +123,7 @@ class Blog(models.Model):
         original_name = f"{uuid.uuid4()}.webp"
         original_path = f"{folder}/originals/{original_name}"
 
-        bucket.upload(
-            original_path,
-            original_webp.read(),
-            {"content-type": "image/webp"}
-        )
+        bucket.upload(original_path, original_webp.read(), "image/webp")
 
         # main image
         image_file.seek(0)
@@ -120,21 +131,28 @@ class Blog(models.Model):
         name = f"{uuid.uuid4()}.webp"
         path = f"{folder}/{name}"
 
-        bucket.upload(
-            path,
-            webp.read(),
-            {"content-type": "image/webp"}
-        )
+        bucket.upload(path, webp.read(), "image/webp")
 
         return (
-            bucket.get_public_url(path),
-            bucket.get_public_url(original_path)
+            bucket.public_url(path),
+            bucket.public_url(original_path)
         )
 
+    def render_content(self):
+        from .blog_render import render_artifacts
+
+        for name, value in render_artifacts(self.content, self.excerpt).items():
+            setattr(self, name, value)
+
     def save(self, *args, **kwargs):
         if not self.slug:
             self.slug = slugify(self.title)
 
+        update_fields = kwargs.get("update_fields")
+        if update_fields is None or self.RENDERED_FROM.intersection(update_fields):
+            self.render_content()
+            if update_fields is not None:
+                kwargs["update_fields"] = set(update_fields) | set(self.RENDERED_FIELDS)
         super().save(*args, **kwargs)
 
     def __str__(self):
@@ -210,6 +228,8 @@ class Testimonial(models.Model):
     is_featured = models.BooleanField(default=False)
     
     def save(self, *args, **kwargs):
+        import bleach
+
         # Sanitize content before saving to prevent XSS
         self.content = bleach.clean(self.content, tags=[], attributes={}, strip=True)
         super().save(*args, **kwargs)
@@ -319,18 +339,137 @@ class TermsAndConditions(models.Model):
     def content_preview(self):
         return mark_safe(self.content[:300] + "...")
     
+class PatternIndex(models.Index):
+    """
+    Index whose ``OpClass`` expressions only apply on PostgreSQL; other
+    databases (the SQLite test and benchmark settings) index the bare
+    expression.
+    """
+
+    def create_sql(self, model, schema_editor, using="", **kwargs):
+        if schema_editor.connection.vendor != "postgresql":
+            expressions = [
+                expression.get_source_expressions()[0] if isinstance(expression, OpClass) else expression
+                for expression in self.expressions
+            ]
+            index = models.Index(*expressions, name=self.name)
+            return index.create_sql(model, schema_editor, using=using, **kwargs)
+        return super().create_sql(model, schema_editor, using=using, **kwargs)
+
+
+# The Upper(name) indexes back the admin's case-insensitive prefix search
+# for autocomplete widgets ('^name'). On PostgreSQL with a non-C collation a
+# plain index can't serve LIKE 'X%'; text_pattern_ops can.
 class Operator(models.Model):
     name = models.CharField(max_length=200, unique=True)
     def __str__(self): return self.name
 
+    class Meta:
+        indexes = [
+            PatternIndex(OpClass(Upper("name"), name="text_pattern_ops"), name="operator_name_pattern_idx"),
+        ]
+
 class Tag(models.Model):
     name = models.CharField(max_length=50, unique=True)
     def __str__(self): return self.name
 
+    class Meta:
+        indexes = [
+            PatternIndex(OpClass(Upper("name"), name="text_pattern_ops"), name="tag_name_pattern_idx"),
+        ]
+
 class TrekPoint(models.Model):
     name = models.CharField(max_length=200)
     def __str__(self): return self.name
 
+    class Meta:
+        indexes = [
+            PatternIndex(OpClass(Upper("name"), name="text_pattern_ops"), name="trekpoint_name_pattern_idx"),
+        ]
+
+WEEKDAYS = ["mon", "tue", "wed", "thu", "fri", "sat", "sun"]
+# Spellings of each day accepted by parse_weekdays; a trailing "s" is allowed too.
+WEEKDAY_NAMES = {
+    "mon": ["monday", "mon"],
+    "tue": ["tuesday", "tues", "tue"],
+    "wed": ["wednesday", "wed"],
+    "thu": ["thursday", "thurs", "thur", "thu"],
+    "fri": ["friday", "fri"],
+    "sat": ["saturday", "sat"],
+    "sun": ["sunday", "sun"],
+}
+ALL_WEEKDAYS = (1 << 7) - 1
+WEEKDAY_ALIASES = {
+    "daily": ALL_WEEKDAYS,
+    "everyday": ALL_WEEKDAYS,
+    "all days": ALL_WEEKDAYS,
+    "weekend": 0b1100000,
+    "weekends": 0b1100000,
+    "weekdays": 0b0011111,
+}
+
+
+def parse_duration(text):
+    """
+    (min_days, max_days) from free text such as '3 Days / 2 Nights',
+    '2 Nights / 3 Days', '2-3 days', '4 Nights' (4 days) or '6 hours'
+    (1 day); (None, None) if there is no number. A day count wins over a
+    night count anywhere in the text.
+    """
+    text = (text or "").lower()
+    number = r"(\d+)(?:\s*(?:-|\u2013|\u2014|to)\s*(\d+))?\s*"
+    match = re.search(number + r"days?\b", text) or re.search(number + r"(night|hour|hr)?", text)
+    if not match:
+        return None, None
+    low = int(match.group(1))
+    high = int(match.group(2) or low)
+    if match.lastindex == 3 and match.group(3) in ("hour", "hr"):
+        low = high = 1
+    return min(low, high), max(low, high)
+
+
+def parse_weekdays(text):
+    """Bitmask (bit 0 = Monday) from text such as 'Mon, Wed, Sat', 'Mon-Fri', 'Weekends' or 'Daily'."""
+    text = (text or "").lower()
+    mask = 0
+    for alias, bits in WEEKDAY_ALIASES.items():
+        if re.search(rf"\b{alias}\b", text):
+            mask |= bits
+    # Whole words only, so "monsoon", "wedding" or "sunrise" are not days.
+    day = r"\b(" + "|".join(name for names in WEEKDAY_NAMES.values() for name in names) + r")s?\b"
+    for start, end in re.findall(rf"{day}\s*(?:-|\u2013|to)\s*{day}", text):
+        first, last = WEEKDAYS.index(start[:3]), WEEKDAYS.index(end[:3])
+        for offset in range((last - first) % 7 + 1):
+            mask |= 1 << ((first + offset) % 7)
+    for name in re.findall(day, text):
+        mask |= 1 << WEEKDAYS.index(name[:3])
+    return mask
+
+
+class TrekListQuerySet(models.QuerySet):
+    def duration_between(self, low=None, high=None):
+        """Treks whose whole day range fits in [low, high]."""
+        if low is not None:
+            self = self.filter(duration_min_days__gte=low)
+        if high is not None:
+            self = self.filter(duration_max_days__lte=high)
+        return self
+
+    def price_between(self, low=None, high=None):
+        if low is not None:
+            self = self.filter(price_base__gte=low)
+        if high is not None:
+            self = self.filter(price_base__lte=high)
+        return self
+
+    def open_on(self, *days):
+        """Treks operating on any of ``days`` ('sat', 'sun', ...)."""
+        mask = sum(1 << WEEKDAYS.index(day[:3].lower()) for day in days)
+        # An IN list of the matching masks can use the operating_weekdays
+        # index; a bitwise AND in the WHERE clause can't.
+        return self.filter(operating_weekdays__in=[bits for bits in range(ALL_WEEKDAYS + 1) if bits & mask])
+
+
 class TrekList(models.Model):
     id = models.SlugField(primary_key=True, editable=False)
     name = models.CharField(max_length=200)
@@ -365,6 +504,37 @@ class TrekList(models.Model):
     related_treks = models.ManyToManyField('self', blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    # Parsed from the text fields above on save (backfill_trek_fields for old rows).
+    duration_min_days = models.PositiveSmallIntegerField(blank=True, null=True, editable=False)
+    duration_max_days = models.PositiveSmallIntegerField(blank=True, null=True, editable=False)
+    price_base = models.PositiveIntegerField(
+        blank=True, null=True, editable=False,
+        help_text="price_start in settings.BASE_CURRENCY"
+    )
+    operating_weekdays = models.PositiveSmallIntegerField(
+        default=0, editable=False,
+        help_text="Bitmask of operating_days, bit 0 = Monday"
+    )
+
+    objects = TrekListQuerySet.as_manager()
+
+    PARSED_FROM = {"duration_days", "price_start", "currency", "operating_days"}
+    PARSED_FIELDS = ["duration_min_days", "duration_max_days", "price_base", "operating_weekdays"]
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["duration_min_days", "duration_max_days"]),
+            models.Index(fields=["price_base"]),
+            models.Index(fields=["operating_weekdays"]),
+            PatternIndex(OpClass(Upper("name"), name="text_pattern_ops"), name="treklist_name_pattern_idx"),
+        ]
+
+    def parse_fields(self):
+        self.duration_min_days, self.duration_max_days = parse_duration(self.duration_days)
+        rate = settings.CURRENCY_RATES.get((self.currency or "").upper())
+        self.price_base = round(self.price_start * rate) if self.price_start is not None and rate else None
+        self.operating_weekdays = parse_weekdays(self.operating_days)
+
     def save(self, *args, **kwargs):
         if not self.id:
             base_slug = slugify(self.name)
@@ -377,6 +547,10 @@ class TrekList(models.Model):
 
             self.id = slug
 
+        self.parse_fields()
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and self.PARSED_FROM.intersection(update_fields):
+            kwargs["update_fields"] = set(update_fields) | set(self.PARSED_FIELDS)
         super().save(*args, **kwargs)
 
     @property
@@ -414,7 +588,7 @@ class TrekImage(models.Model):
     caption = models.CharField(max_length=200, blank=True)
 
     def save(self, *args, **kwargs):
-        bucket = supabase.storage.from_("blogs")
+        bucket = get_bucket()
         folder = "trek_images"
 
         # Upload new image
@@ -424,6 +598,8 @@ class TrekImage(models.Model):
             path = f"{folder}/{file_name}"
 
             # Compress image
+            from PIL import Image
+
             img = Image.open(self.image)
             img_io = io.BytesIO()
 
@@ -440,14 +616,13 @@ class TrekImage(models.Model):
             img_io.seek(0)
 
             # Remove old image if updating
-            if self.image_url:
-                base = bucket.get_public_url("").rstrip("/") + "/"
-                old_path = self.image_url.replace(base, "", 1)
+            old_path = bucket.path_for_url(self.image_url)
+            if old_path:
                 bucket.remove([old_path])
 
             # Upload to Supabase
-            bucket.upload(path, img_io.getvalue(), {"content-type": mime})
-            self.image_url = bucket.get_public_url(path)
+            bucket.upload(path, img_io.getvalue(), mime)
+            self.image_url = bucket.public_url(path)
 
             # Prevent Django from storing the file locally
             self.image = None
@@ -456,5 +631,29 @@ class TrekImage(models.Model):
 
     def __str__(self):
         return self.caption or f"{self.trek.name} - Image"
-    
-    
\ No newline at end of file
+
+
+class TrekRecommendation(models.Model):
+    """Similar treks for a TrekList, ranked; rebuilt by ``manage.py compute_recommendations``."""
+    trek = models.ForeignKey(TrekList, on_delete=models.CASCADE, related_name="recommendations")
+    recommended = models.ForeignKey(TrekList, on_delete=models.CASCADE, related_name="+")
+    rank = models.PositiveSmallIntegerField()
+    score = models.FloatField()
+
+    class Meta:
+        ordering = ["trek", "rank"]
+        constraints = [
+            models.UniqueConstraint(fields=["trek", "rank"], name="unique_recommendation_rank"),
+        ]
+
+    def __str__(self):
+        return f"{self.trek_id} #{self.rank}: {self.recommended_id}"
+
+
+class ContentVersion(models.Model):
+    """Counter bumped whenever the content behind ``name`` changes; see versions.py."""
+    name = models.CharField(max_length=100, primary_key=True)
+    version = models.BigIntegerField()
+
+    def __str__(self):
+        return f"{self.name} v{self.version}"
@@ -0,0 +1,68 @@
+"""
+Cheap counts for large admin changelists.
+
+On PostgreSQL, once a table holds more than ``ADMIN_ESTIMATED_COUNT_THRESHOLD``
+rows (going by the planner's ``pg_class.reltuples`` statistic), the admin
+paginator reports the planner's estimate instead of running ``COUNT(*)``:
+``reltuples`` itself for an unfiltered changelist, the row estimate from
+``EXPLAIN`` for a filtered or searched one. Page counts are then approximate,
+which is fine for browsing a log table. ``estimated_distinct`` does the same
+for a column's number of distinct values, from ``pg_stats.n_distinct``.
+Other databases and small tables get exact counts.
+"""
+import json
+
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+
+def table_estimate(model, using):
+    """Planner's row estimate for the model's table, or None if never analyzed."""
+    with connections[using].cursor() as cursor:
+        cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(%s)", [model._meta.db_table])
+        row = cursor.fetchone()
+    return row[0] if row and row[0] >= 0 else None
+
+
+def plan_estimate(queryset):
+    plan = json.loads(queryset.order_by().explain(format="json"))
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def estimated_count(queryset):
+    """Estimated row count on a large PostgreSQL table, otherwise None."""
+    if connections[queryset.db].vendor != "postgresql":
+        return None
+    estimate = table_estimate(queryset.model, queryset.db)
+    if estimate is None or estimate < settings.ADMIN_ESTIMATED_COUNT_THRESHOLD:
+        return None
+    return plan_estimate(queryset) if queryset.query.has_filters() else estimate
+
+
+def estimated_distinct(queryset, field_name):
+    """Planner's distinct-value estimate for a column of a large PostgreSQL table, otherwise None."""
+    if connections[queryset.db].vendor != "postgresql":
+        return None
+    model = queryset.model
+    rows = table_estimate(model, queryset.db)
+    if rows is None or rows < settings.ADMIN_ESTIMATED_COUNT_THRESHOLD:
+        return None
+    with connections[queryset.db].cursor() as cursor:
+        cursor.execute(
+            "SELECT n_distinct FROM pg_stats WHERE schemaname = current_schema() AND tablename = %s AND attname = %s",
+            [model._meta.db_table, model._meta.get_field(field_name).column],
+        )
+        row = cursor.fetchone()
+    if row is None:
+        return None
+    # A negative n_distinct is minus the fraction of rows that are distinct.
+    return int(row[0] if row[0] >= 0 else -row[0] * rows)
+
+
+class EstimatedCountPaginator(Paginator):
+    @cached_property
+    def count(self):
+        estimate = estimated_count(self.object_list)
+        return self.object_list.count() if estimate is None else estimate
@@ -0,0 +1,81 @@
+"""
+Content-based "similar treks" for TrekList.
+
+Each trek becomes a sparse vector over its tags, state, operators and
+activities, weighted by inverse document frequency so that rare shared
+features count for more than common ones, and L2-normalised so that a dot
+product is the cosine similarity. Neighbours are found one block of rows at a
+time (``block @ X.T``), which keeps memory bounded for 100k+ treks.
+
+Only imported by ``manage.py compute_recommendations``; NumPy and SciPy are
+not needed to serve requests.
+"""
+from collections import defaultdict
+
+import numpy as np
+from scipy import sparse
+
+from .models import TrekList
+
+
+def trek_features():
+    """Return (trek ids, {trek id: set of feature names}) for every TrekList."""
+    features = defaultdict(set)
+    ids = []
+    for trek_id, state, activities in TrekList.objects.values_list("id", "state", "activities").iterator():
+        ids.append(trek_id)
+        if state:
+            features[trek_id].add(f"state:{state.strip().lower()}")
+        for activity in (activities or "").split(","):
+            if activity.strip():
+                features[trek_id].add(f"activity:{activity.strip().lower()}")
+
+    for field_name, prefix in (("tags", "tag"), ("operators", "operator")):
+        through = getattr(TrekList, field_name).through
+        column = TrekList._meta.get_field(field_name).m2m_reverse_name()
+        for trek_id, pk in through.objects.values_list("treklist_id", column).iterator():
+            features[trek_id].add(f"{prefix}:{pk}")
+    return ids, features
+
+
+def feature_matrix(ids, features):
+    """IDF-weighted, row-normalised CSR matrix with one row per id."""
+    columns = {}
+    rows, cols = [], []
+    for row, trek_id in enumerate(ids):
+        for name in features.get(trek_id, ()):
+            rows.append(row)
+            cols.append(columns.setdefault(name, len(columns)))
+
+    shape = (len(ids), len(columns))
+    matrix = sparse.csr_matrix((np.ones(len(rows), dtype=np.float32), (rows, cols)), shape=shape)
+    df = np.bincount(cols, minlength=len(columns))
+    idf = np.log((1 + len(ids)) / (1 + df)).astype(np.float32) + 1
+    matrix = matrix @ sparse.diags(idf)
+
+    norms = np.sqrt(matrix.multiply(matrix).sum(axis=1)).A1
+    norms[norms == 0] = 1
+    return sparse.diags(1 / norms) @ matrix
+
+
+def nearest_neighbours(matrix, top_k, block_size=1000, min_score=0.0):
+    """
+    Yield (row, [(neighbour row, score), ...]) with up to ``top_k`` neighbours
+    per row, best first, excluding the row itself.
+    """
+    transposed = matrix.T.tocsc()
+    for start in range(0, matrix.shape[0], block_size):
+        block = (matrix[start:start + block_size] @ transposed).tocsr()
+        block.setdiag(0, k=start)
+        block.eliminate_zeros()
+        for offset in range(block.shape[0]):
+            begin, end = block.indptr[offset], block.indptr[offset + 1]
+            scores = block.data[begin:end]
+            neighbours = block.indices[begin:end]
+            if len(scores) > top_k:
+                keep = np.argpartition(-scores, top_k)[:top_k]
+                scores, neighbours = scores[keep], neighbours[keep]
+            order = np.lexsort((neighbours, -scores))
+            yield start + offset, [
+                (int(neighbours[i]), float(scores[i])) for i in order if scores[i] > min_score
+            ]
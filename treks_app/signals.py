@@ -0,0 +1,56 @@
+from django.apps import apps
+from django.conf import settings
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+
+from .snapshots import SNAPSHOT_MODELS, version_name
+from .versions import bump_version
+
+# Rows written by visitors or derived by commands, not editors, and the
+# version counters themselves; they never change rendered pages. Having no
+# receiver also keeps their deletes on Django's fast path (one DELETE, no
+# per-row fetch and signal).
+UNTRACKED_MODELS = {"visitor", "contact", "trekrecommendation", "contentversion"}
+
+# Models behind the browse facet index (facets.py), including TrekList's
+# tags/operators through tables.
+FACET_MODELS = {"treklist", "tag", "operator", "treklist_tags", "treklist_operators"}
+
+# Models listed in the sitemaps (sitemaps.py).
+SITEMAP_MODELS = {"treklist", "trek", "blog"}
+
+
+def content_changed(sender, **kwargs):
+    meta = sender._meta
+    if kwargs.get("action", "post_").startswith("pre_"):
+        return
+    bump_version("pages")
+    if meta.model_name in FACET_MODELS:
+        bump_version("treklist")
+    if meta.model_name in SNAPSHOT_MODELS:
+        bump_version(version_name(sender))
+    if meta.model_name in SITEMAP_MODELS and settings.SITEMAP_REBUILD_ON_SAVE:
+        from .sitemaps import rebuild_after_commit
+        rebuild_after_commit()
+    if settings.STATIC_EXPORT_ROOT:
+        from .static_export import export_after_commit
+        export_after_commit(kwargs["instance"])
+
+
+def content_deleting(sender, instance, **kwargs):
+    if settings.STATIC_EXPORT_ROOT:
+        from .static_export import remember_affected_urls
+        remember_affected_urls(instance)
+
+
+# Connected per model rather than for every sender, so models outside this
+# app (sessions, auth, admin log) and the untracked ones above pay nothing.
+for model in apps.get_app_config("treks_app").get_models(include_auto_created=True):
+    if model._meta.model_name in UNTRACKED_MODELS:
+        continue
+    if model._meta.auto_created:
+        # Through rows only go away with their owner, whose own delete is seen.
+        m2m_changed.connect(content_changed, sender=model)
+    else:
+        post_save.connect(content_changed, sender=model)
+        pre_delete.connect(content_deleting, sender=model)
+        post_delete.connect(content_changed, sender=model)
@@ -0,0 +1,172 @@
+"""
+Precompressed XML sitemaps for the trek and blog catalog.
+
+``build_sitemaps(root)`` streams each section's rows with a server-side
+cursor (``iterator()``) and cuts them into child sitemaps of at most
+``SITEMAP_CHUNK_SIZE`` URLs, written as ``sitemap-<section>-<n>.xml`` plus a
+``.gz`` copy and listed in ``sitemap.xml``. Every chunk's content is
+fingerprinted and recorded in ``manifest.json``; chunks whose fingerprint is
+unchanged are not rewritten, so an edit usually costs one streamed pass and
+a single file write. Rows are ordered by primary key so chunk boundaries
+only move where rows were added or removed.
+
+signals.py calls ``rebuild_after_commit`` when treks or blog posts change;
+``manage.py build_sitemaps`` does a full pass (e.g. after a deploy).
+"""
+import gzip
+import hashlib
+import json
+import logging
+import os
+import threading
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.urls import reverse
+
+from .models import Blog, Trek, TrekList
+from .files import write_file
+from .static_export import SIMPLE_PAGES
+
+logger = logging.getLogger(__name__)
+
+INDEX = "sitemap.xml"
+MANIFEST = "manifest.json"
+XMLNS = 'xmlns="http://www.sitemaps.org/schemas/sitemap/0.9"'
+
+
+def _pages():
+    for name in SIMPLE_PAGES:
+        yield reverse(name), None
+
+
+def _rows(queryset, route):
+    for key, lastmod in queryset.order_by("pk").iterator(chunk_size=2000):
+        yield reverse(route, args=[key]), lastmod
+
+
+def sections():
+    """(name, iterable of (path, lastmod or None)) for every sitemap section."""
+    return [
+        ("pages", _pages()),
+        ("treks", _rows(TrekList.objects.values_list("pk", "created_at"), "card_trek_detail")),
+        ("trek-details", _rows(Trek.objects.values_list("slug", "updated_at"), "trek_detail")),
+        ("blogs", _rows(Blog.objects.values_list("slug", "updated_at"), "blog_detail")),
+    ]
+
+
+def _chunks(entries, size):
+    chunk = []
+    for entry in entries:
+        chunk.append(entry)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _urlset(chunk, base_url):
+    lines = ['<?xml version="1.0" encoding="UTF-8"?>', f"<urlset {XMLNS}>"]
+    for path, lastmod in chunk:
+        lastmod_tag = f"<lastmod>{lastmod.date().isoformat()}</lastmod>" if lastmod else ""
+        lines.append(f"<url><loc>{escape(base_url + path)}</loc>{lastmod_tag}</url>")
+    lines.append("</urlset>\n")
+    return "\n".join(lines).encode("utf-8")
+
+
+def _index(entries, base_url):
+    lines = ['<?xml version="1.0" encoding="UTF-8"?>', f"<sitemapindex {XMLNS}>"]
+    for filename, lastmod in entries:
+        lastmod_tag = f"<lastmod>{lastmod}</lastmod>" if lastmod else ""
+        lines.append(f"<sitemap><loc>{escape(f'{base_url}/{filename}')}</loc>{lastmod_tag}</sitemap>")
+    lines.append("</sitemapindex>\n")
+    return "\n".join(lines).encode("utf-8")
+
+
+def _write_compressed(path, body):
+    write_file(path, body)
+    write_file(path + ".gz", gzip.compress(body, compresslevel=9, mtime=0))
+
+
+def _read_manifest(root):
+    try:
+        with open(os.path.join(root, MANIFEST)) as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def build_sitemaps(root=None, base_url=None):
+    """Regenerate changed chunks and the index. Returns (written, unchanged, removed) chunk counts."""
+    root = root or settings.SITEMAP_ROOT
+    base_url = (base_url or settings.SITEMAP_BASE_URL).rstrip("/")
+    os.makedirs(root, exist_ok=True)
+    previous = _read_manifest(root)
+    manifest = {}
+    written = unchanged = 0
+
+    for section, entries in sections():
+        for number, chunk in enumerate(_chunks(entries, settings.SITEMAP_CHUNK_SIZE), start=1):
+            filename = f"sitemap-{section}-{number}.xml"
+            dates = [lastmod for _, lastmod in chunk if lastmod]
+            lastmod = max(dates).date().isoformat() if dates else None
+            digest = hashlib.sha256()
+            for path, modified in chunk:
+                digest.update(f"{path} {modified.isoformat() if modified else ''}\n".encode())
+            fingerprint = f"{base_url} {digest.hexdigest()}"
+            manifest[filename] = {"fingerprint": fingerprint, "lastmod": lastmod}
+
+            path = os.path.join(root, filename)
+            if previous.get(filename, {}).get("fingerprint") == fingerprint and os.path.exists(path):
+                unchanged += 1
+                continue
+            _write_compressed(path, _urlset(chunk, base_url))
+            written += 1
+
+    removed = 0
+    for filename in previous.keys() - manifest.keys():
+        for suffix in ("", ".gz"):
+            if os.path.exists(os.path.join(root, filename + suffix)):
+                os.remove(os.path.join(root, filename + suffix))
+        removed += 1
+
+    _write_compressed(os.path.join(root, INDEX), _index(
+        [(filename, entry["lastmod"]) for filename, entry in manifest.items()], base_url,
+    ))
+    write_file(os.path.join(root, MANIFEST), json.dumps(manifest, indent=1, sort_keys=True).encode())
+    return written, unchanged, removed
+
+
+_state = {"running": False, "again": False}
+_state_lock = threading.Lock()
+
+
+def _rebuild_loop():
+    try:
+        while True:
+            try:
+                build_sitemaps()
+            except Exception:
+                logger.exception("Sitemap rebuild failed")
+            with _state_lock:
+                if not _state["again"]:
+                    _state["running"] = False
+                    return
+                _state["again"] = False
+    finally:
+        close_old_connections()
+
+
+def rebuild_after_commit():
+    """Rebuild off the request thread once the transaction commits; bursts of edits share one rebuild."""
+    def start():
+        with _state_lock:
+            if _state["running"]:
+                _state["again"] = True
+                return
+            _state["running"] = True
+        threading.Thread(target=_rebuild_loop, daemon=True).start()
+
+    transaction.on_commit(start)
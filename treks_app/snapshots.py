@@ -0,0 +1,80 @@
+"""
+In-process snapshots of small, rarely edited tables.
+
+Each snapshot is loaded once per worker into an immutable structure (tuples
+and read-only mappings) and reused until the table's content version moves;
+signals.py bumps ``snapshot_<model>`` on every save or delete. A request
+therefore costs a lookup in the process's memo of versions (refreshed from
+the database every ``CONTENT_VERSION_CHECK_INTERVAL`` seconds) per snapshot
+it touches, with no unpickling of the rows.
+
+Templates reach them through the ``site_content`` context processor, e.g.
+``{% for tip in site_content.safety_tips %}``.
+"""
+import threading
+from types import MappingProxyType
+
+from .models import FAQ, ContactInfo, HomepageBanner, SafetyTip, SocialMedia, TeamMember, TermsAndConditions
+from .versions import get_version
+
+
+def version_name(model):
+    return f"snapshot_{model._meta.model_name}"
+
+
+class Snapshot:
+    def __init__(self, model, load):
+        self.model = model
+        self.load = load
+        self._lock = threading.Lock()
+        self._version = None
+        self._value = None
+
+    def get(self):
+        version = get_version(version_name(self.model))
+        if version != self._version:
+            with self._lock:
+                if version != self._version:
+                    self._value = self.load()
+                    self._version = version
+        return self._value
+
+
+SNAPSHOTS = {}
+SNAPSHOT_MODELS = set()
+
+
+def register(name, model, load):
+    SNAPSHOTS[name] = Snapshot(model, load)
+    SNAPSHOT_MODELS.add(model._meta.model_name)
+
+
+def snapshot(name):
+    return SNAPSHOTS[name].get()
+
+
+def _faq_categories():
+    categories = {}
+    for faq in FAQ.objects.order_by("category", "order"):
+        categories.setdefault(faq.category, []).append(faq)
+    return MappingProxyType({category: tuple(faqs) for category, faqs in categories.items()})
+
+
+register("faq_categories", FAQ, _faq_categories)
+register("safety_tips", SafetyTip, lambda: tuple(SafetyTip.objects.order_by("order")))
+register("team_members", TeamMember, lambda: tuple(TeamMember.objects.order_by("order")))
+register("banners", HomepageBanner, lambda: tuple(HomepageBanner.objects.filter(is_active=True).order_by("order")))
+register("social_media", SocialMedia, lambda: tuple(SocialMedia.objects.order_by("order")))
+register("contact_info", ContactInfo, lambda: ContactInfo.objects.first())
+register("terms", TermsAndConditions, lambda: TermsAndConditions.objects.order_by("-updated_at").first())
+
+
+class SiteContent:
+    """Template-facing view of the registry; each snapshot is only loaded when used."""
+
+    def __getitem__(self, name):
+        return snapshot(name)
+
+
+def site_content(request):
+    return {"site_content": SiteContent()}
@@ -0,0 +1,263 @@
+"""
+Static export of public pages for the web server to serve without Django.
+
+``export_site(root)`` renders every public page into ``root/<path>/index.html``
+with ``.gz`` and ``.br`` siblings, and every further page of the paginated
+listings (``<path>?page=N``) into ``root/<path>/page/N/index.html``;
+``export_instance(root, instance)`` only re-renders (or removes) the pages
+that show ``instance``, and ``export_cards(root, pks)`` the trek cards whose
+recommendations changed. Unchanged files are left alone so their mtimes and
+ETags stay stable.
+"""
+import gzip
+import logging
+import math
+import os
+import shutil
+import threading
+from urllib.parse import parse_qs
+
+from django.conf import settings
+from django.db import transaction
+from django.urls import reverse
+
+from .files import write_file
+from .models import Blog, Trek, TrekList
+from .warmup import LocalFetcher
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+SIMPLE_PAGES = ["home", "about", "safety", "privacy_policy", "terms_and_conditions", "user_agreement", "blogs", "treks"]
+
+# Paginated listings (unfiltered): URL name -> (rows, page size), as in views.py.
+LISTINGS = {
+    "home": (TrekList.objects.all, 8),
+    "blogs": (Blog.objects.all, 4),
+    "treks": (Trek.objects.all, 12),
+}
+
+# Recent posts shown in each article's sidebar (blog_detail's first page).
+SIDEBAR_POSTS = 4
+
+
+def _page_count(name):
+    rows, per_page = LISTINGS[name]
+    return max(1, math.ceil(rows().count() / per_page))
+
+
+def _listing(name, first=0):
+    """``name``'s pages from the one holding row ``first`` (0-based, in listing order) to the last."""
+    url = reverse(name)
+    start = first // LISTINGS[name][1] + 1
+    return [url if page == 1 else f"{url}?page={page}" for page in range(start, _page_count(name) + 1)]
+
+
+def _card(pk):
+    return reverse("card_trek_detail", args=[pk])
+
+
+def _trek(slug):
+    return reverse("trek_detail", args=[slug])
+
+
+def _blog(slug):
+    return reverse("blog_detail", args=[slug])
+
+
+def all_urls():
+    urls = [reverse(name) for name in SIMPLE_PAGES]
+    urls += [url for name in LISTINGS for url in _listing(name)[1:]]
+    urls += [_card(pk) for pk in TrekList.objects.values_list("pk", flat=True).iterator()]
+    urls += [_trek(slug) for slug in Trek.objects.values_list("slug", flat=True).iterator()]
+    urls += [_blog(slug) for slug in Blog.objects.values_list("slug", flat=True).iterator()]
+    return urls
+
+
+def _treklist_urls(instance):
+    related = instance.related_treks.values_list("pk", flat=True) if instance.pk else []
+    return _listing("home") + [_card(instance.pk)] + [_card(pk) for pk in related]
+
+
+def _attribute_urls(instance):
+    """Tags, operators and trek points appear on the cards that use them."""
+    field = next(f for f in TrekList._meta.many_to_many if f.related_model is type(instance))
+    pks = TrekList.objects.filter(**{field.name: instance}).values_list("pk", flat=True)
+    return _listing("home") + [_card(pk) for pk in pks]
+
+
+def _trek_urls(instance):
+    siblings = Trek.objects.filter(category_id=instance.category_id).values_list("slug", flat=True)
+    return _listing("treks") + [_trek(instance.slug)] + [_trek(slug) for slug in siblings]
+
+
+def _trek_group_urls(instance):
+    """Categories and organizers: the listing and every trek page under them."""
+    return _listing("treks") + [_trek(slug) for slug in instance.treks.values_list("slug", flat=True)]
+
+
+def _blog_urls(instance):
+    """
+    The home page (featured posts), the blog listing from the post's page
+    on (an added or removed post shifts the later ones), the post itself and
+    the articles whose sidebar lists it among the most recent posts.
+    """
+    newer = Blog.objects.filter(created_at__gt=instance.created_at).exclude(pk=instance.pk)
+    position = newer.count()
+    urls = _listing("home") + _listing("blogs", position) + [_blog(instance.slug)]
+    if position < SIDEBAR_POSTS:
+        sidebars = Blog.objects.values_list("slug", flat=True)
+    elif position == SIDEBAR_POSTS:
+        # Shown only next to the newer posts, whose sidebars skip themselves.
+        sidebars = newer.values_list("slug", flat=True)
+    else:
+        sidebars = []
+    return urls + [_blog(slug) for slug in sidebars]
+
+
+def _testimonial_urls(instance):
+    slug = Trek.objects.filter(pk=instance.trek_id).values_list("slug", flat=True).first()
+    return _listing("home") + ([_trek(slug)] if slug else [])
+
+
+# Model name -> pages showing an instance of it. Models missing here trigger
+# a full export; an empty list means the model isn't on any exported page.
+AFFECTED_PAGES = {
+    "treklist": _treklist_urls,
+    "trekimage": lambda instance: [_card(instance.trek_id)],
+    "tag": _attribute_urls,
+    "operator": _attribute_urls,
+    "trekpoint": _attribute_urls,
+    "trek": _trek_urls,
+    "trekcategory": _trek_group_urls,
+    "trekorganizer": _trek_group_urls,
+    "testimonial": _testimonial_urls,
+    "blog": _blog_urls,
+    "faq": lambda instance: _listing("home"),
+    "homepagebanner": lambda instance: _listing("home"),
+    "teammember": lambda instance: [reverse("about")],
+    "safetytip": lambda instance: [reverse("safety")],
+    "socialmedia": lambda instance: [],
+    "contactinfo": lambda instance: [],
+    "termsandconditions": lambda instance: [],
+    "visitor": lambda instance: [],
+    "contact": lambda instance: [],
+}
+
+
+def _directory(root, url):
+    path, _, query = url.partition("?")
+    directory = os.path.join(root, path.strip("/"))
+    if query:
+        return os.path.join(directory, "page", parse_qs(query)["page"][0])
+    return directory
+
+
+def prune_listings(root):
+    """Remove listing pages past the last one, left behind when rows were deleted. Returns the count."""
+    removed = 0
+    for name in LISTINGS:
+        pages = os.path.join(_directory(root, reverse(name)), "page")
+        if not os.path.isdir(pages):
+            continue
+        last = _page_count(name)
+        for entry in os.listdir(pages):
+            if entry.isdigit() and int(entry) > last:
+                shutil.rmtree(os.path.join(pages, entry))
+                removed += 1
+    return removed
+
+
+def write_page(root, url, body):
+    directory = _directory(root, url)
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, "index.html")
+    if not write_file(path, body):
+        return False
+    write_file(path + ".gz", gzip.compress(body, compresslevel=9, mtime=0))
+    if brotli is not None:
+        write_file(path + ".br", brotli.compress(body))
+    return True
+
+
+def remove_page(root, url):
+    path = os.path.join(_directory(root, url), "index.html")
+    for suffix in ("", ".gz", ".br"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+
+def render_pages(root, urls, fetcher=None):
+    """
+    Render ``urls`` into ``root``; 404s and stale listing pages are removed.
+    Returns (written, unchanged, removed).
+    """
+    fetcher = fetcher or LocalFetcher()
+    written = unchanged = removed = 0
+    for url in dict.fromkeys(urls):
+        status, body = fetcher.get(url)
+        if status == 404:
+            remove_page(root, url)
+            removed += 1
+        elif status != 200:
+            logger.warning("Static export of %s returned %s; keeping the previous file", url, status)
+        elif write_page(root, url, body):
+            written += 1
+        else:
+            unchanged += 1
+    return written, unchanged, removed + prune_listings(root)
+
+
+def export_site(root, clean=False):
+    if clean and os.path.isdir(root):
+        shutil.rmtree(root)
+    return render_pages(root, all_urls())
+
+
+def affected_urls(instance):
+    """URLs that display ``instance``, or None when that isn't known."""
+    if hasattr(instance, "_static_export_urls"):
+        return instance._static_export_urls
+    urls = AFFECTED_PAGES.get(instance._meta.model_name)
+    return None if urls is None else urls(instance)
+
+
+def remember_affected_urls(instance):
+    """
+    Called before ``instance`` is deleted. By post_delete its M2M rows and
+    the rows pointing at it are gone, so the pages that showed it can only
+    be found now.
+    """
+    instance._static_export_urls = affected_urls(instance)
+
+
+def export_instance(root, instance):
+    urls = affected_urls(instance)
+    if urls is None:
+        return export_site(root)
+    return render_pages(root, urls)
+
+
+def export_cards(root, pks):
+    return render_pages(root, [_card(pk) for pk in pks])
+
+
+def export_after_commit(instance):
+    """Re-export pages affected by ``instance`` once the transaction commits, off the request thread."""
+    root = settings.STATIC_EXPORT_ROOT
+    urls = affected_urls(instance)
+
+    def run():
+        try:
+            if urls is None:
+                export_site(root)
+            else:
+                render_pages(root, urls)
+        except Exception:
+            logger.exception("Static export after %r changed failed", instance)
+
+    transaction.on_commit(lambda: threading.Thread(target=run, daemon=True).start())
@@ -0,0 +1,126 @@
+"""
+Object storage for uploaded images.
+
+Blog and trek images live in the Supabase ``blogs`` bucket. ``get_bucket()``
+returns the configured backend: ``supabase`` in production, or ``local`` (a
+plain directory) for development, tests and benchmarks.
+"""
+import os
+from collections import namedtuple
+from datetime import datetime, timezone as dt_timezone
+from pathlib import Path
+
+from django.conf import settings
+from django.utils.dateparse import parse_datetime
+
+BUCKET_NAME = "blogs"
+
+StoredObject = namedtuple("StoredObject", ["path", "size", "updated_at"])
+
+
+class SupabaseBucket:
+    """Thin wrapper around a Supabase storage bucket."""
+
+    def __init__(self, name=BUCKET_NAME):
+        from .supabase_client import supabase
+
+        self.name = name
+        self.bucket = supabase.storage.from_(name)
+
+    @property
+    def base_url(self):
+        return self.bucket.get_public_url("").rstrip("/") + "/"
+
+    def public_url(self, path):
+        return self.bucket.get_public_url(path)
+
+    def upload(self, path, data, content_type):
+        self.bucket.upload(path, data, {"content-type": content_type})
+
+    def remove(self, paths):
+        if paths:
+            self.bucket.remove(list(paths))
+
+    def iter_objects(self, prefix="", page_size=1000):
+        """Yield every object under ``prefix``, listing one page at a time."""
+        offset = 0
+        while True:
+            page = self.bucket.list(prefix, {
+                "limit": page_size,
+                "offset": offset,
+                "sortBy": {"column": "name", "order": "asc"},
+            })
+            for item in page:
+                path = f"{prefix}/{item['name']}" if prefix else item["name"]
+                if item.get("id") is None:
+                    # Folders have no id; descend into them.
+                    yield from self.iter_objects(path, page_size)
+                    continue
+                metadata = item.get("metadata") or {}
+                yield StoredObject(
+                    path=path,
+                    size=metadata.get("size") or 0,
+                    updated_at=parse_datetime(item.get("updated_at") or item.get("created_at") or ""),
+                )
+            if len(page) < page_size:
+                break
+            offset += page_size
+
+    def path_for_url(self, url):
+        """Return the object path for a public URL, or None if it is not ours."""
+        if not url or not url.startswith(self.base_url):
+            return None
+        return url[len(self.base_url):].split("?", 1)[0]
+
+
+class LocalBucket(SupabaseBucket):
+    """Directory-backed bucket with the same interface as ``SupabaseBucket``."""
+
+    def __init__(self, name=BUCKET_NAME, root=None, base_url=None):
+        self.name = name
+        self.root = Path(root or settings.STORAGE_LOCAL_ROOT) / name
+        self._base_url = (base_url or settings.MEDIA_URL).rstrip("/") + f"/{name}/"
+
+    @property
+    def base_url(self):
+        return self._base_url
+
+    def public_url(self, path):
+        return self.base_url + path
+
+    def upload(self, path, data, content_type):
+        target = self.root / path
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_bytes(data)
+
+    def remove(self, paths):
+        for path in paths:
+            try:
+                (self.root / path).unlink()
+            except FileNotFoundError:
+                pass
+
+    def iter_objects(self, prefix="", page_size=1000):
+        base = self.root / prefix if prefix else self.root
+        if not base.exists():
+            return
+        for dirpath, dirnames, filenames in os.walk(base):
+            dirnames.sort()
+            for filename in sorted(filenames):
+                full = Path(dirpath) / filename
+                stat = full.stat()
+                yield StoredObject(
+                    path=full.relative_to(self.root).as_posix(),
+                    size=stat.st_size,
+                    updated_at=datetime.fromtimestamp(stat.st_mtime, tz=dt_timezone.utc),
+                )
+
+
+BACKENDS = {
+    "supabase": SupabaseBucket,
+    "local": LocalBucket,
+}
+
+
+def get_bucket(name=BUCKET_NAME):
+    return BACKENDS[settings.STORAGE_BACKEND](name)
@@ -0,0 +1,59 @@
+import posixpath
+import re
+
+from django import template
+from django.templatetags.static import static
+from django.utils.html import format_html, format_html_join
+from django.utils.safestring import mark_safe
+
+from ..assets import DIST_DIR, built_bundle, bundle_sources, read_static
+
+register = template.Library()
+
+
+def _page(context):
+    return context.template.name if context.template else ""
+
+
+def _inline_css(path):
+    """Critical CSS with its relative url()s turned into static URLs."""
+    def rewrite(match):
+        url = match.group(2)
+        if re.match(r"^([a-z]+:|/|#)", url, re.I):
+            return match.group(0)
+        return f"url('{static(posixpath.normpath(posixpath.join(DIST_DIR, url)))}')"
+
+    css = re.sub(r"""url\(\s*(['"]?)([^'")]*)\1\s*\)""", rewrite, read_static(path))
+    return mark_safe(css.replace("</", "<\\/"))
+
+
+@register.simple_tag(takes_context=True)
+def bundle_styles(context):
+    """Inline the page's critical CSS and load the full bundle without blocking render."""
+    bundle = built_bundle(_page(context))
+    if bundle is None:
+        return format_html_join(
+            "\n  ", '<link rel="stylesheet" href="{}">',
+            ((static(path),) for path in bundle_sources(_page(context))["css"]),
+        )
+    if "css" not in bundle:
+        return ""
+    href = static(bundle["css"])
+    return format_html(
+        '<style>{}</style>\n'
+        '  <link rel="preload" href="{}" as="style" onload="this.onload=null;this.rel=\'stylesheet\'">\n'
+        '  <noscript><link rel="stylesheet" href="{}"></noscript>',
+        _inline_css(bundle["critical"]), href, href,
+    )
+
+
+@register.simple_tag(takes_context=True)
+def bundle_scripts(context):
+    bundle = built_bundle(_page(context))
+    if bundle is None:
+        paths = bundle_sources(_page(context))["js"]
+    else:
+        paths = [bundle["js"]] if "js" in bundle else []
+    return format_html_join(
+        "\n  ", '<script src="{}" defer></script>', ((static(path),) for path in paths)
+    )
@@ -0,0 +1,745 @@
+import gzip
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from csp.utils import build_policy
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connection, connections
+from django.db.models import F
+from django.template import Context, Engine
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import ResolverMatch, reverse
+from django.utils import timezone
+
+from aorbo_project import cache_metrics
+from aorbo_project.hybrid_session import SessionStore
+from aorbo_project.page_cache import PageCacheMiddleware
+from aorbo_project.query_tracer import QueryTracerMiddleware
+
+from . import benchmark, static_export, views, warmup
+from .caching import get_or_compute
+from .management.commands import compute_recommendations
+from .models import (
+    Blog, Contact, ContentVersion, Operator, SafetyTip, Tag, Testimonial, Trek, TrekCategory, TrekImage, TrekList,
+    TrekOrganizer, TrekPoint, TrekRecommendation, Visitor, parse_duration, parse_weekdays,
+)
+from .paginators import EstimatedCountPaginator
+from .sitemaps import build_sitemaps
+from .snapshots import snapshot
+from .storage import get_bucket
+
+
+class StorageGarbageCollectorTests(TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        settings_override = override_settings(STORAGE_BACKEND="local", STORAGE_LOCAL_ROOT=self.root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.bucket = get_bucket()
+
+    def put(self, path, age_hours):
+        self.bucket.upload(path, b"webp", "image/webp")
+        mtime = time.time() - age_hours * 3600
+        os.utime(os.path.join(self.bucket.root, path), (mtime, mtime))
+        return self.bucket.public_url(path)
+
+    def remaining(self):
+        return sorted(obj.path for obj in self.bucket.iter_objects())
+
+    def test_deletes_only_old_unreferenced_objects(self):
+        Blog.objects.create(
+            title="Monsoon", author="Aorbo", content="<p>Hi</p>",
+            image_url=self.put("blogs/main.webp", 48),
+            original_image_url=self.put("blogs/originals/main.webp", 48),
+        )
+        trek = TrekList.objects.create(name="Kedarkantha")
+        TrekImage.objects.create(trek=trek, image_url=self.put("trek_images/kept.jpg", 48))
+        self.put("blogs/replaced.webp", 48)
+        self.put("trek_images/deleted.jpg", 48)
+        self.put("trek_images/uploading.jpg", 1)
+
+        call_command("gc_storage", "--dry-run", stdout=StringIO())
+        self.assertEqual(len(self.remaining()), 6)
+
+        call_command("gc_storage", "--batch-size", "1", stdout=StringIO())
+        self.assertEqual(self.remaining(), [
+            "blogs/main.webp",
+            "blogs/originals/main.webp",
+            "trek_images/kept.jpg",
+            "trek_images/uploading.jpg",
+        ])
+
+
+@override_settings(CACHE_REFRESH_IN_BACKGROUND=False)
+class GetOrComputeTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.calls = 0
+
+    def compute(self):
+        self.calls += 1
+        return self.calls
+
+    def test_fresh_value_is_reused(self):
+        self.assertEqual(get_or_compute("k", self.compute, 60), 1)
+        self.assertEqual(get_or_compute("k", self.compute, 60), 1)
+        self.assertEqual(self.calls, 1)
+
+    def test_stale_value_is_refreshed(self):
+        get_or_compute("k", self.compute, 60)
+        with mock.patch("treks_app.caching.time.time", return_value=time.time() + 61):
+            self.assertEqual(get_or_compute("k", self.compute, 60), 2)
+
+    def test_stale_value_served_while_another_request_refreshes(self):
+        get_or_compute("k", self.compute, 60)
+        cache.add("k:refresh_lock", True)
+        with mock.patch("treks_app.caching.time.time", return_value=time.time() + 61):
+            self.assertEqual(get_or_compute("k", self.compute, 60), 1)
+        self.assertEqual(self.calls, 1)
+
+    def test_versions_are_separate_entries(self):
+        get_or_compute("k", self.compute, 60, version=1)
+        self.assertEqual(get_or_compute("k", self.compute, 60, version=2), 2)
+
+
+class BrowseFacetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        adventure, camping = Tag.objects.create(name="adventure"), Tag.objects.create(name="camping")
+        TrekList.objects.create(name="One", state="Karnataka", price_start=1500).tags.set([adventure])
+        self.two = TrekList.objects.create(name="Two", state="Goa", price_start=3000)
+        self.two.tags.set([adventure, camping])
+
+    def test_filters_and_counts_follow_tag_changes(self):
+        data = self.client.get("/browse/?tag=adventure&state=Goa", secure=True).json()
+        self.assertEqual([trek["id"] for trek in data["results"]], [self.two.pk])
+        self.assertEqual(data["facets"]["state"], {"Karnataka": 1, "Goa": 1})
+
+        self.two.tags.remove(Tag.objects.get(name="adventure"))
+        data = self.client.get("/browse/?tag=adventure", secure=True).json()
+        self.assertEqual(data["count"], 1)
+
+    def test_bulk_loaded_treks_are_counted(self):
+        self.assertEqual(self.client.get("/browse/", secure=True).json()["count"], 2)
+        call_command("generate_fixture_data", treks=5, visitors=0, contacts=0, stdout=StringIO())
+        data = self.client.get("/browse/", secure=True).json()
+        self.assertEqual(data["count"], 7)
+        self.assertEqual(sum(data["facets"]["state"].values()), 7)
+
+
+class FixtureDataTests(TestCase):
+    NOW = timezone.now()
+
+    def generate(self):
+        with mock.patch("django.utils.timezone.now", return_value=self.NOW):
+            call_command(
+                "generate_fixture_data", treks=12, visitors=30, contacts=5, seed=7, batch_size=7, stdout=StringIO(),
+            )
+        data = {
+            "treks": list(TrekList.objects.order_by("pk").values_list("pk", "name", "operating_days", "created_at")),
+            "tags": sorted(TrekList.tags.through.objects.values_list("treklist_id", "tag__name")),
+            "operators": sorted(TrekList.operators.through.objects.values_list("treklist_id", "operator__name")),
+            "visitors": sorted(Visitor.objects.values_list("ip_address", "session_id", "visit_time")),
+            "contacts": sorted(Contact.objects.values_list("name", "email", "created_at")),
+        }
+        for model in (TrekList, Tag, Operator, TrekPoint, Visitor, Contact):
+            model.objects.all().delete()
+        return data
+
+    def test_same_seed_same_data(self):
+        first = self.generate()
+        self.assertEqual(len(first["treks"]), 12)
+        self.assertEqual(len(first["visitors"]), 30)
+        self.assertLess(max(created for *_, created in first["treks"]), self.NOW)
+        self.assertLess(max(visited for *_, visited in first["visitors"]), self.NOW)
+        self.assertEqual(self.generate(), first)
+
+
+class RecommendationTests(TestCase):
+    def setUp(self):
+        adventure, camping, beach = (Tag.objects.create(name=name) for name in ("adventure", "camping", "beach"))
+        self.treks = {}
+        for name, state, tags, activities in [
+            ("A", "Karnataka", [adventure, camping], "Trekking, Camping"),
+            ("B", "Karnataka", [adventure, camping], "Trekking, Camping"),
+            ("C", "Goa", [adventure], "Trekking"),
+            ("D", "Ladakh", [beach], "Rafting"),
+        ]:
+            trek = TrekList.objects.create(name=name, state=state, activities=activities)
+            trek.tags.set(tags)
+            self.treks[name] = trek.pk
+
+    def compute(self, **options):
+        call_command("compute_recommendations", batch_size=1, stdout=StringIO(), **options)
+        names = {pk: name for name, pk in self.treks.items()}
+        result = {}
+        for rec in TrekRecommendation.objects.order_by("trek_id", "rank"):
+            result.setdefault(names[rec.trek_id], []).append(names[rec.recommended_id])
+        return result
+
+    def test_ranked_neighbours_without_self(self):
+        self.assertEqual(self.compute(top_k=2), {"A": ["B", "C"], "B": ["A", "C"], "C": ["A", "B"]})
+        self.assertEqual(self.compute(top_k=1, min_score=0.9), {"A": ["B"], "B": ["A"]})
+
+    def test_unprocessed_treks_keep_their_rows_mid_run(self):
+        self.compute(top_k=2)
+        old = set(TrekRecommendation.objects.values_list("trek_id", "recommended_id"))
+        done, replace = set(), compute_recommendations.Command.replace
+
+        def checked_replace(command, treks, recommendations):
+            written = replace(command, treks, recommendations)
+            done.update(treks)
+            now = set(TrekRecommendation.objects.values_list("trek_id", "recommended_id"))
+            self.assertEqual({row for row in now if row[0] not in done}, {row for row in old if row[0] not in done})
+            return written
+
+        with mock.patch.object(compute_recommendations.Command, "replace", checked_replace):
+            self.compute(top_k=1, min_score=0.9)
+        self.assertEqual(done, set(self.treks.values()))
+
+
+class ParsedTrekFieldsTests(TestCase):
+    def test_parsers(self):
+        self.assertEqual(parse_duration("3 Days / 2 Nights"), (3, 3))
+        self.assertEqual(parse_duration("2\u20133 days"), (2, 3))
+        self.assertEqual(parse_duration("2 Nights / 3 Days"), (3, 3))
+        self.assertEqual(parse_duration("4 Nights"), (4, 4))
+        self.assertEqual(parse_weekdays("Mon, Wed, Sat"), 0b0100101)
+        self.assertEqual(parse_weekdays("Fri to Mon"), 0b1110001)
+        self.assertEqual(parse_weekdays("Weekends"), 0b1100000)
+        self.assertEqual(parse_weekdays("Saturdays and Tues"), 0b0100010)
+        self.assertEqual(parse_weekdays("Sunrise treks, not in monsoon or wedding season"), 0)
+
+    def test_range_and_weekday_filters(self):
+        TrekList.objects.create(name="Short", duration_days="2-3 days", operating_days="Sat, Sun")
+        TrekList.objects.create(name="Long", duration_days="6 Days", operating_days="Mon-Fri")
+        self.assertEqual([t.name for t in TrekList.objects.duration_between(1, 3)], ["Short"])
+        self.assertEqual([t.name for t in TrekList.objects.open_on("sat")], ["Short"])
+
+
+class SnapshotTests(TestCase):
+    def test_reloaded_only_after_a_change(self):
+        cache.clear()
+        SafetyTip.objects.create(title="Second", content="-", order=2)
+        self.assertEqual(len(snapshot("safety_tips")), 1)
+        with self.assertNumQueries(0):
+            snapshot("safety_tips")
+        SafetyTip.objects.create(title="First", content="-", order=1)
+        self.assertEqual([tip.title for tip in snapshot("safety_tips")], ["First", "Second"])
+
+    @override_settings(CONTENT_VERSION_CHECK_INTERVAL=0)
+    def test_changes_from_other_processes_are_seen(self):
+        SafetyTip.objects.create(title="Tip", content="-", order=1)
+        self.assertEqual(len(snapshot("safety_tips")), 1)
+        # Another worker edits the table: its signal bumps the shared row only.
+        SafetyTip.objects.bulk_create([SafetyTip(title="Other", content="-", order=2)])
+        ContentVersion.objects.filter(name="snapshot_safetytip").update(version=F("version") + 1)
+        self.assertEqual(len(snapshot("safety_tips")), 2)
+
+
+class ContentSignalTests(TestCase):
+    def test_untracked_models_keep_fast_delete(self):
+        Visitor.objects.create(ip_address="10.0.0.1")
+        Visitor.objects.create(ip_address="10.0.0.2")
+        with self.assertNumQueries(1):
+            Visitor.objects.all().delete()
+
+
+class BlogArtifactTests(TestCase):
+    def test_artifacts_computed_on_save(self):
+        blog = Blog.objects.create(
+            title="Packing", author="Aorbo",
+            content='<h2>Gear</h2><p>Boots <script>x</script></p><img src="https://example.com/a.webp"><h2>Gear</h2>',
+        )
+        self.assertEqual([entry["id"] for entry in blog.toc], ["gear", "gear-2"])
+        self.assertIn('loading="lazy"', blog.content_html)
+        self.assertNotIn("<script>", blog.content_html)
+        self.assertEqual((blog.word_count, blog.reading_minutes), (4, 1))
+
+    def test_only_allowed_embeds_are_kept(self):
+        blog = Blog.objects.create(
+            title="Video", author="Aorbo",
+            content='<iframe src="https://www.youtube.com/embed/x"></iframe><iframe src="https://evil.example/x"></iframe>',
+        )
+        self.assertEqual(blog.content_html, '<iframe src="https://www.youtube.com/embed/x"></iframe>')
+
+
+@override_settings(RATE_LIMIT_ENABLED=True)
+class RateLimitTests(TestCase):
+    @override_settings(RATE_LIMITS={"search_suggestions": {"rate": "1/min", "burst": 2, "methods": ["GET"]}})
+    def test_bucket_empties_per_client(self):
+        statuses = [
+            self.client.get("/search-suggestions/?q=ke", secure=True, REMOTE_ADDR="192.0.2.1").status_code
+            for _ in range(3)
+        ]
+        self.assertEqual(statuses, [200, 200, 429])
+        response = self.client.get("/search-suggestions/?q=ke", secure=True, REMOTE_ADDR="192.0.2.1")
+        self.assertEqual(response["Retry-After"], "60")
+        other = self.client.get("/search-suggestions/?q=ke", secure=True, REMOTE_ADDR="192.0.2.2")
+        self.assertEqual(other.status_code, 200)
+
+    @override_settings(RATE_LIMITS={"search_suggestions": {"rate": "1/min", "methods": ["GET"], "key": "session"}})
+    def test_made_up_session_cookies_share_the_ip_bucket(self):
+        self.client.cookies["sessionid"] = "first"
+        self.assertEqual(self.client.get("/search-suggestions/?q=ke", secure=True).status_code, 200)
+        self.client.cookies["sessionid"] = "second"
+        self.assertEqual(self.client.get("/search-suggestions/?q=ke", secure=True).status_code, 429)
+
+    @override_settings(RATE_LIMITS={"contact": {"rate": "1/min", "methods": ["POST"]}})
+    def test_browsers_get_an_html_page(self):
+        accept = "text/html,application/xhtml+xml,*/*;q=0.8"
+        self.client.post("/contact/", secure=True, HTTP_ACCEPT=accept)
+        response = self.client.post("/contact/", secure=True, HTTP_ACCEPT=accept)
+        self.assertEqual(response.status_code, 429)
+        self.assertContains(response, "Too many requests", status_code=429)
+        self.assertTrue(response["Content-Type"].startswith("text/html"))
+
+
+class SitemapTests(TestCase):
+    def test_chunks_rewritten_only_when_changed(self):
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root)
+        with override_settings(SITEMAP_ROOT=root, SITEMAP_CHUNK_SIZE=2):
+            for name in ("Alpha", "Beta", "Gamma"):
+                TrekList.objects.create(name=name)
+            written, unchanged, _ = build_sitemaps()
+            self.assertEqual(build_sitemaps(), (0, written, 0))
+
+            TrekList.objects.create(name="Zeta")
+            self.assertEqual(build_sitemaps(), (1, written - 1, 0))
+            response = self.client.get("/sitemap-treks-2.xml", secure=True)
+            self.assertIn(b"/card-trek/zeta/", b"".join(response.streaming_content))
+
+
+class MiddlewareProfileTests(TestCase):
+    def test_public_paths_skip_session_and_auth(self):
+        response = self.client.get("/about/", secure=True)
+        self.assertEqual(response.wsgi_request.skip_middleware, {"session", "auth", "messages", "csp"})
+        self.assertFalse(hasattr(response.wsgi_request, "session"))
+        self.assertEqual(response["Content-Security-Policy"], build_policy())
+
+        self.client.cookies["sessionid"] = "abc"
+        response = self.client.get("/about/", secure=True)
+        self.assertEqual(response.wsgi_request.skip_middleware, frozenset())
+        self.assertEqual(response["Content-Security-Policy"], build_policy())
+
+
+@override_settings(CONTENT_VERSION_CHECK_INTERVAL=60)
+class PageCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def get(self, url="/about/", **extra):
+        return self.client.get(url, secure=True, **extra)
+
+    def test_hit_skips_the_view(self):
+        first = self.get()
+        with self.assertNumQueries(0), mock.patch("treks_app.views.render") as render:
+            second = self.get()
+        render.assert_not_called()
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(second["ETag"], first["ETag"])
+
+    def test_conditional_and_head_requests(self):
+        first = self.get()
+        for headers in ({"HTTP_IF_NONE_MATCH": first["ETag"]}, {"HTTP_IF_MODIFIED_SINCE": first["Last-Modified"]}):
+            response = self.get(**headers)
+            self.assertEqual(response.status_code, 304)
+            self.assertEqual(response.content, b"")
+
+        response = self.client.head("/about/", secure=True)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, b"")
+        self.assertEqual(response["Content-Length"], str(len(first.content)))
+
+    def test_sessions_origins_and_unknown_params_bypass(self):
+        self.get()
+        requests = [
+            lambda: self.get("/about/?ref=newsletter"),
+            lambda: self.get(HTTP_ORIGIN="https://example.com"),
+        ]
+        for cookie in ("sessionid", "messages"):
+            def request(cookie=cookie):
+                self.client.cookies[cookie] = "x"
+                try:
+                    return self.get()
+                finally:
+                    del self.client.cookies[cookie]
+            requests.append(request)
+        for request in requests:
+            with mock.patch("treks_app.views.render", wraps=views.render) as render:
+                self.assertEqual(request().status_code, 200)
+            render.assert_called_once()
+
+    def test_personalized_responses_are_not_stored(self):
+        def view(request):
+            response = HttpResponse("hello")
+            response.set_cookie("seen", "1")
+            return response
+
+        def vary_view(request):
+            response = HttpResponse("hello")
+            response["Vary"] = "Cookie"
+            return response
+
+        for get_response in (view, vary_view):
+            middleware = PageCacheMiddleware(get_response)
+            request = RequestFactory().get("/about/", secure=True)
+            middleware(request)
+            self.assertIsNone(cache.get(middleware.cache_key(request)))
+
+    def test_content_changes_invalidate(self):
+        self.get("/")
+        TrekList.objects.create(name="Zanskar Ridge", state="Ladakh")
+        with mock.patch("treks_app.views.render", wraps=views.render) as render:
+            response = self.get("/")
+        render.assert_called_once()
+        self.assertContains(response, "Zanskar Ridge")
+
+
+class WarmupTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_urls_cover_cached_pages_hot_first(self):
+        alpha = TrekList.objects.create(name="Alpine Lake")
+        TrekList.objects.create(name="Alpine Ridge")
+        urls = warmup.warmup_urls()
+        self.assertEqual(urls[:3], ["/", "/about/", "/safety/"])
+        self.assertIn(f"/card-trek/{alpha.pk}/", urls)
+        self.assertIn("/search-suggestions/?q=alpi", urls)
+        self.assertLess(urls.index("/blogs/"), urls.index("/search-suggestions/?q=al"))
+        self.assertEqual(len(urls), len(set(urls)))
+
+    def test_local_fetch_fills_the_page_cache(self):
+        with self.assertLogs("treks_app.warmup", "WARNING"):
+            counts = warmup.warm(["/about/", "/no-such-page/"], warmup.LocalFetcher(host="testserver"), workers=1)
+        self.assertEqual(counts, {"warmed": 1, "failed": 1})
+        with mock.patch("treks_app.views.render") as render:
+            self.client.get("/about/", secure=True)
+        render.assert_not_called()
+
+    def test_no_requests_started_after_the_budget(self):
+        def fetch(url):
+            time.sleep(0.05)
+            return 200
+
+        counts = warmup.warm([f"/{n}/" for n in range(5)], fetch, workers=1, budget=0.01)
+        self.assertEqual(counts, {"warmed": 1, "skipped": 4})
+
+    def test_per_process_cache_needs_a_base_url(self):
+        with self.assertRaisesMessage(CommandError, "--base-url"):
+            call_command("warm_caches", stdout=StringIO())
+
+        with mock.patch.object(warmup.HttpFetcher, "__call__", return_value=200) as fetch:
+            out = StringIO()
+            call_command("warm_caches", base_url="https://aorbotreks.com", budget=60, stdout=out)
+        self.assertEqual(fetch.call_count, len(warmup.warmup_urls()))
+        self.assertIn("0 failed", out.getvalue())
+
+
+@override_settings(CONTENT_VERSION_CHECK_INTERVAL=60)
+class StaticExportTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        self.treks = [TrekList.objects.create(name=f"Export {n}") for n in range(9)]
+        self.treks[0].related_treks.set([self.treks[1]])
+
+    def page(self, *parts):
+        return os.path.join(self.root, *map(str, parts), "index.html")
+
+    def read(self, *parts):
+        with open(self.page(*parts), "rb") as f:
+            return f.read()
+
+    def test_unchanged_files_are_left_alone(self):
+        written, unchanged, removed = static_export.export_site(self.root)
+        self.assertEqual((unchanged, removed), (0, 0))
+        self.assertTrue(os.path.exists(self.page("page", 2) + ".gz"))
+        mtime = os.stat(self.page()).st_mtime_ns
+
+        self.assertEqual(static_export.export_site(self.root), (0, written, 0))
+        self.assertEqual(os.stat(self.page()).st_mtime_ns, mtime)
+
+    def test_deleting_a_trek_updates_the_pages_that_showed_it(self):
+        static_export.export_site(self.root)
+        deleted, neighbour = self.treks[1], self.treks[0]
+        self.assertIn(b"Export 1", self.read("card-trek", neighbour.pk))
+
+        with override_settings(STATIC_EXPORT_ROOT=self.root), \
+                mock.patch("treks_app.static_export.export_after_commit"):
+            deleted_pk = deleted.pk
+            deleted.delete()
+        static_export.export_instance(self.root, deleted)
+        self.assertFalse(os.path.exists(self.page("card-trek", deleted_pk)))
+        self.assertNotIn(b"Export 1", self.read("card-trek", neighbour.pk))
+        self.assertFalse(os.path.exists(self.page("page", 2)))
+
+    def test_prune_listings(self):
+        static_export.export_site(self.root)
+        TrekList.objects.filter(pk__in=[trek.pk for trek in self.treks[:3]]).delete()
+        os.makedirs(os.path.join(self.root, "blogs", "page", "3"))
+        self.assertEqual(static_export.prune_listings(self.root), 2)
+        self.assertFalse(os.path.exists(os.path.join(self.root, "page", "2")))
+        self.assertTrue(os.path.exists(self.page()))
+
+
+@override_settings(SERVER_TIMING_SAMPLE_RATE=1.0, SERVER_TIMING_PUBLIC=True)
+class ServerTimingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_header_and_log_break_down_the_request(self):
+        TrekList.objects.create(name="Timed")
+        with self.assertLogs("aorbo.server_timing") as logs:
+            response = self.client.get("/", secure=True)
+        metrics = {name: float(ms) for name, ms in re.findall(r'(\w+);dur=([\d.]+)', response["Server-Timing"])}
+        self.assertEqual(list(metrics), ["db", "cache", "tpl", "view", "total"])
+        self.assertGreater(metrics["tpl"], 0)
+        self.assertLessEqual(metrics["tpl"], metrics["view"])
+        self.assertLessEqual(metrics["view"], metrics["total"])
+        self.assertIn('queries"', response["Server-Timing"])
+
+        line = json.loads(logs.records[0].getMessage())
+        self.assertEqual((line["view"], line["status"]), ("home", 200))
+        self.assertGreater(line["db_queries"], 0)
+        self.assertGreater(line["cache_misses"], 0)
+
+    @override_settings(SERVER_TIMING_SAMPLE_RATE=0.0)
+    def test_unsampled_requests_are_not_timed(self):
+        with self.assertNoLogs("aorbo.server_timing"):
+            response = self.client.get("/", secure=True)
+        self.assertFalse(response.has_header("Server-Timing"))
+
+
+class CacheMetricsTests(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.enterContext(override_settings(CACHE_METRICS_DIR=self.directory, METRICS_TOKEN="s3cret"))
+        cache_metrics._reset()
+        cache.clear()
+
+    def scrape(self, token="s3cret"):
+        headers = {"Authorization": f"Bearer {token}"} if token else {}
+        return self.client.get("/metrics/", secure=True, headers=headers)
+
+    def test_counters_are_summed_across_workers(self):
+        other_worker = {"treks": dict.fromkeys(cache_metrics.COUNTERS, 0) | {"hits": 5, "sets": 2}}
+        with open(os.path.join(self.directory, "999-abcdef12.json"), "w") as f:
+            json.dump(other_worker, f)
+        cache.get("treks_page_1")
+        cache.set("treks_page_1", "x")
+        cache.get("treks_page_1")
+
+        response = self.scrape()
+        self.assertEqual(response["Content-Type"], "text/plain; version=0.0.4")
+        lines = response.content.decode().splitlines()
+        self.assertIn('aorbo_cache_hits_total{family="treks"} 6', lines)
+        self.assertIn('aorbo_cache_misses_total{family="treks"} 1', lines)
+        self.assertIn('aorbo_cache_sets_total{family="treks"} 3', lines)
+        self.assertIn("# TYPE aorbo_cache_evictions_total counter", lines)
+
+    def test_scrapes_need_the_token(self):
+        self.assertEqual(self.scrape(token="wrong").status_code, 401)
+        self.assertEqual(self.scrape(token=None)["WWW-Authenticate"], "Bearer")
+        with override_settings(METRICS_TOKEN=""):
+            self.assertEqual(self.scrape().status_code, 404)
+
+
+@override_settings(QUERY_TRACER_SAMPLE_RATE=1.0)
+class QueryTracerTests(TestCase):
+    TEMPLATE = "{% for trek in treks %}\n{{ trek.tags.count }}\n{% endfor %}"
+
+    def test_n_plus_one_reported_with_view_and_template(self):
+        for n in range(6):
+            TrekList.objects.create(name=f"Loop {n}")
+        engine = Engine(loaders=[("django.template.loaders.locmem.Loader", {"loop.html": self.TEMPLATE})])
+
+        def view(request):
+            return HttpResponse(engine.get_template("loop.html").render(Context({"treks": TrekList.objects.all()})))
+
+        request = RequestFactory().get("/loop/")
+        request.resolver_match = ResolverMatch(view, (), {}, url_name="trek_loop")
+        with self.assertLogs("aorbo.query_tracer", "WARNING") as logs:
+            QueryTracerMiddleware(view)(request)
+        findings = [json.loads(record.getMessage()) for record in logs.records]
+        repeated = [f for f in findings if f["kind"] == "repeated"]
+        self.assertEqual(len(repeated), 1)
+        self.assertEqual(repeated[0]["count"], 6)
+        self.assertEqual((repeated[0]["view"], repeated[0]["template"]), ("trek_loop", "loop.html:2"))
+        self.assertTrue(repeated[0]["code"].startswith("treks_app/tests.py:"))
+        self.assertIn("treklist_tags", repeated[0]["sql"])
+
+        path = os.path.join(tempfile.mkdtemp(), "queries.log")
+        self.addCleanup(shutil.rmtree, os.path.dirname(path))
+        with open(path, "w") as f:
+            f.writelines(record.getMessage() + "\n" for record in logs.records)
+        self.client.force_login(User.objects.create_superuser("admin", "admin@example.com", "pw"))
+        with override_settings(QUERY_TRACER_LOG=path):
+            response = self.client.get(reverse("query_report"), secure=True)
+        self.assertContains(response, "loop.html:2")
+        self.assertContains(response, "repeated &times;6")
+
+
+class HybridSessionTests(TestCase):
+    def test_only_logged_in_sessions_hit_the_database(self):
+        store = SessionStore()
+        store["currency"] = "INR"
+        store.save()
+        self.assertFalse(Session.objects.exists())
+        self.assertEqual(SessionStore(store.session_key)["currency"], "INR")
+
+        self.client.force_login(User.objects.create_user("editor"))
+        session_key = self.client.cookies["sessionid"].value
+        self.assertTrue(Session.objects.filter(pk=session_key).exists())
+        self.assertEqual(self.client.session["_auth_user_id"], str(User.objects.get().pk))
+
+        Session.objects.update(expire_date=timezone.now() - timedelta(days=1))
+        call_command("clear_expired_sessions", batch_size=1, stdout=StringIO())
+        self.assertFalse(Session.objects.exists())
+
+
+class AdminQueryBudgetTests(TestCase):
+    """Admin pages must issue a fixed number of queries however many rows exist."""
+
+    ROWS = 15
+
+    def setUp(self):
+        self.client.force_login(User.objects.create_superuser("admin", "admin@example.com", "pw"))
+        category = TrekCategory.objects.create(name="Himalaya")
+        organizer = TrekOrganizer.objects.create(name="Org", contact_email="org@example.com", contact_phone="1")
+        for i in range(self.ROWS):
+            trek = Trek.objects.create(
+                title=f"Trek {i}", slug=f"trek-{i}", description="-", image="treks/x.jpg", category=category,
+                organizer=organizer, duration="2 days", difficulty="easy", location="-", price=1,
+            )
+            Testimonial.objects.create(name=f"Guest {i}", trek=trek, date=timezone.localdate(), content="-", rating=5)
+            self.trek = TrekList.objects.create(name=f"Trek {i}")
+            self.trek.tags.add(Tag.objects.create(name=f"tag-{i}"))
+        self.trek.related_treks.add(*TrekList.objects.exclude(pk=self.trek.pk))
+
+    def assertQueryBudget(self, url, budget):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, secure=True)
+        self.assertEqual(response.status_code, 200)
+        self.assertLessEqual(len(queries), budget, "\n".join(query["sql"] for query in queries))
+        return response
+
+    def test_changelists_and_change_forms(self):
+        self.assertQueryBudget(reverse("admin:treks_app_treklist_changelist"), 8)
+        self.assertQueryBudget(reverse("admin:treks_app_testimonial_changelist"), 4)
+        self.assertQueryBudget(reverse("admin:treks_app_trek_changelist"), 5)
+        self.assertQueryBudget(reverse("admin:treks_app_treklist_change", args=[self.trek.pk]), 11)
+        self.assertQueryBudget(reverse("admin:treks_app_testimonial_change", args=[Testimonial.objects.last().pk]), 5)
+
+    def test_log_changelists(self):
+        for i in range(self.ROWS):
+            Visitor.objects.create(ip_address="192.0.2.1", session_id=f"s{i}")
+            Contact.objects.create(name="Guest", email="guest@example.com", mobile="1", comment="-")
+        self.assertQueryBudget(reverse("admin:treks_app_visitor_changelist"), 8)
+        self.assertQueryBudget(reverse("admin:treks_app_contact_changelist") + "?user_type=trekker", 4)
+
+    def test_large_tables_use_planner_estimates(self):
+        paginator = EstimatedCountPaginator(Visitor.objects.order_by("pk"), 100)
+        with mock.patch.object(connections["default"], "vendor", "postgresql"), \
+                mock.patch("treks_app.paginators.table_estimate", return_value=250000), \
+                CaptureQueriesContext(connection) as queries:
+            self.assertEqual(paginator.num_pages, 2500)
+        self.assertEqual(len(queries), 0)
+
+    def test_autocomplete_is_a_prefix_search(self):
+        url = reverse("admin:autocomplete")
+        params = "?app_label=treks_app&model_name=treklist&field_name=tags&term="
+        response = self.assertQueryBudget(url + params + "TAG-1", 3)
+        names = [result["text"] for result in response.json()["results"]]
+        self.assertEqual(names, sorted(names))
+        self.assertEqual(len(names), 6)  # tag-1, tag-10..14
+        self.assertEqual(self.assertQueryBudget(url + params + "ag", 3).json()["results"], [])
+
+
+class ExportTests(TestCase):
+    def test_admin_export_follows_changelist_filters(self):
+        self.client.force_login(User.objects.create_superuser("admin", "admin@example.com", "pw"))
+        for user_type in ("trekker", "organizer", "trekker"):
+            Contact.objects.create(name="=HYPERLINK()", email="a@example.com", mobile="+91 1", user_type=user_type, comment="-")
+        url = reverse("admin:treks_app_contact_export")
+
+        response = self.client.get(url + "?user_type=trekker&_format=csv", secure=True)
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0], "id,name,email,mobile,user_type,comment,created_at")
+        self.assertEqual(len(lines), 3)
+        self.assertEqual(lines[1].split(",")[1:4], ["'=HYPERLINK()", "a@example.com", "+91 1"])
+
+        response = self.client.get(url + "?user_type=organizer&_format=jsonl&_gzip=1", secure=True)
+        self.assertEqual(response["Content-Type"], "application/gzip")
+        rows = [json.loads(line) for line in gzip.decompress(b"".join(response.streaming_content)).splitlines()]
+        self.assertEqual([row["user_type"] for row in rows], ["organizer"])
+
+    def test_command_streams_to_file(self):
+        Visitor.objects.create(ip_address="192.0.2.1", session_id="a")
+        Visitor.objects.create(ip_address="192.0.2.2", session_id="b")
+        path = os.path.join(tempfile.mkdtemp(), "visitors.jsonl.gz")
+        self.addCleanup(shutil.rmtree, os.path.dirname(path))
+        call_command(
+            "export_records", "visitor", "--format", "jsonl", "--gzip", "--chunk-size", "1",
+            "--filter", "session_id=b", "--output", path, stderr=StringIO(),
+        )
+        with gzip.open(path) as f:
+            self.assertEqual([json.loads(line)["ip_address"] for line in f], ["192.0.2.2"])
+
+
+class BenchmarkScenarioTests(TestCase):
+    def test_every_route_has_a_scenario(self):
+        benchmark.check_coverage(benchmark.scenarios())
+
+    def test_baseline_covers_every_scenario(self):
+        with open(os.path.join(settings.BASE_DIR, "benchmarks", "baseline.json")) as f:
+            baseline = json.load(f)
+        self.assertEqual(set(baseline), {scenario.name for scenario in benchmark.scenarios()})
+
+
+class WorkerBootTests(TestCase):
+    """Importing the WSGI app must stay fast and must not pull in heavy optional modules."""
+
+    BUDGET_SECONDS = float(os.environ.get("BOOT_TIME_BUDGET", "1.5"))
+    LAZY_MODULES = ["supabase", "bleach", "PIL"]
+    SCRIPT = (
+        "import sys, time\n"
+        "started = time.perf_counter()\n"
+        "import django; django.setup()\n"
+        "from aorbo_project.wsgi import application\n"
+        "print(time.perf_counter() - started)\n"
+        "print(','.join(m for m in {modules!r} if m in sys.modules))\n"
+    )
+
+    def boot(self):
+        env = {**os.environ, "BOOT_WARMUP": "False"}
+        script = self.SCRIPT.format(modules=self.LAZY_MODULES)
+        output = subprocess.run(
+            [sys.executable, "-c", script], env=env, capture_output=True, text=True, check=True,
+        ).stdout.splitlines()
+        return float(output[-2]), output[-1]
+
+    def test_boot_time_and_lazy_imports(self):
+        runs = [self.boot() for _ in range(3)]
+        self.assertEqual(runs[0][1], "", "heavy modules imported at boot")
+        self.assertLess(min(seconds for seconds, _ in runs), self.BUDGET_SECONDS)
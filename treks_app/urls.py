@@ -1,6 +1,6 @@
 # treks_app/urls.py
 
-from django.urls import path
+from django.urls import path, re_path
 from . import views
 
 urlpatterns = [
@@ -30,6 +30,13 @@ urlpatterns = [
     # Travel Your Way
     path('travel-your-way/', views.travel_your_way, name='travel_your_way'),
 
+    # Faceted browse (JSON)
+    path('browse/', views.browse, name='browse'),
+
+    # Sitemaps
+    path('sitemap.xml', views.sitemap, name='sitemap'),
+    re_path(r'^(?P<filename>sitemap-[a-z-]+-\d+\.xml)$', views.sitemap, name='sitemap_chunk'),
+
     # ✅ Contact (ONLY ONE)
     path('contact/', views.contact, name='contact'),
 ]
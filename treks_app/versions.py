@@ -0,0 +1,46 @@
+"""
+Content version counters.
+
+Each name maps to an integer in the ``ContentVersion`` table that is bumped
+whenever the rows behind it change (see signals.py). Cache keys that embed a
+version go stale all at once, without having to find and delete them.
+
+Every process reads the whole table at most once per
+``CONTENT_VERSION_CHECK_INTERVAL`` seconds, so a change made in one worker (or
+a management command) reaches the others' in-process caches and snapshots
+within that interval. The process making the change sees it at once.
+"""
+import threading
+import time
+
+from django.conf import settings
+from django.db.models import F
+
+from .models import ContentVersion
+
+_memo = {"versions": {}, "checked": None}
+_lock = threading.Lock()
+
+
+def _versions():
+    checked = _memo["checked"]
+    if checked is None or time.monotonic() - checked >= settings.CONTENT_VERSION_CHECK_INTERVAL:
+        with _lock:
+            if _memo["checked"] is checked:
+                _memo["versions"] = dict(ContentVersion.objects.values_list("name", "version"))
+                _memo["checked"] = time.monotonic()
+    return _memo["versions"]
+
+
+def get_version(name):
+    return _versions().get(name, 0)
+
+
+def bump_version(*names):
+    if ContentVersion.objects.filter(name__in=names).update(version=F("version") + 1) < len(names):
+        # Seed new counters from the clock so a reset table never reuses old keys.
+        seed = int(time.time() * 1000)
+        ContentVersion.objects.bulk_create(
+            [ContentVersion(name=name, version=seed) for name in names], ignore_conflicts=True,
+        )
+    _memo["checked"] = None
@@ -1,89 +1,75 @@
 from django.shortcuts import render, get_object_or_404, redirect
-from django.http import JsonResponse
+from django.http import FileResponse, Http404, JsonResponse
 from django.core.paginator import Paginator
 from django.urls import reverse
 from django.core.mail import EmailMultiAlternatives
 from django.template.loader import render_to_string
 from django.db.models import Q, Case, When, IntegerField
 from django.conf import settings
-from django.core.cache import cache
 from datetime import datetime
 import difflib
+import os
 import threading
 
 from .models import (
     Contact, Blog, TrekCategory, Trek, 
-    Testimonial, FAQ, SafetyTip, TeamMember,
-    HomepageBanner, TrekList
+    Testimonial, TrekList
 )
+from .caching import get_or_compute
+from .facets import FACETS, browse as browse_treks
+from .snapshots import snapshot
+from .versions import get_version
 
 def send_email_async(mail):
     threading.Thread(target=mail.send).start()
 
 
-def get_featured_treks():
-    cache_key = "featured_treks_qs"
-    qs = cache.get(cache_key)
+def cached(key, compute, timeout):
+    """View cache entry that is rebuilt whenever site content changes."""
+    return get_or_compute(key, compute, timeout, version=get_version("pages"))
 
-    if qs is not None:
-        return qs
 
-    qs = (
-        TrekList.objects
-        .prefetch_related('tags')
-        .annotate(
-            pin_order=Case(
-                When(is_pinned=True, then=0),
-                default=1,
-                output_field=IntegerField()
+def get_featured_treks():
+    def compute():
+        return (
+            TrekList.objects
+            .prefetch_related('tags')
+            .annotate(
+                pin_order=Case(
+                    When(is_pinned=True, then=0),
+                    default=1,
+                    output_field=IntegerField()
+                )
             )
+            .order_by('pin_order', 'pin_priority', '-created_at')
         )
-        .order_by('pin_order', 'pin_priority', '-created_at')
-    )
 
-    cache.set(cache_key, qs, 60 * 10)  
-    return qs
+    return cached("featured_treks_qs", compute, 60 * 10)
 
 
 def get_trek_categories():
-    cache_key = "trek_categories_all"
-    categories = cache.get(cache_key)
+    return cached("trek_categories_all", TrekCategory.objects.all, 60 * 60)
 
-    if categories is None:
-        categories = TrekCategory.objects.all()
-        cache.set(cache_key, categories, 60 * 60)
-
-    return categories
 
 def home(request):
     page_number = request.GET.get('page', 1)
-    cache_key = f"home_page_{page_number}"
-    cached_context = cache.get(cache_key)
-
-    if cached_context:
-        return render(request, 'index.html', cached_context)
-
-    paginator = Paginator(get_featured_treks(), 8)
-    page_obj = paginator.get_page(page_number)
 
-    faq_categories = cache.get("faq_categories")
-    if not faq_categories:
-        faq_categories = {}
-        for faq in FAQ.objects.all().order_by('category', 'order'):
-            faq_categories.setdefault(faq.category, []).append(faq)
-        cache.set("faq_categories", faq_categories, 60 * 60)
-
-    context = {
-        'featured_treks': page_obj.object_list,
-        'page_obj': page_obj,
-        'featured_testimonials': Testimonial.objects.filter(is_featured=True)[:6],
-        'featured_blogs': Blog.objects.filter(is_featured=True)[:3],
-        'banners': HomepageBanner.objects.filter(is_active=True).order_by('order'),
-        'faq_categories': faq_categories,
-    }
-
-    cache.set(cache_key, context, 60 * 10)
-    return render(request, 'index.html', context)
+    def compute():
+        paginator = Paginator(get_featured_treks(), 8)
+        page_obj = paginator.get_page(page_number)
+        return {
+            'featured_treks': page_obj.object_list,
+            'page_obj': page_obj,
+            'featured_testimonials': Testimonial.objects.filter(is_featured=True)[:6],
+            'featured_blogs': Blog.objects.filter(is_featured=True)[:3],
+        }
+
+    context = cached(f"home_page_{page_number}", compute, 60 * 10)
+    return render(request, 'index.html', {
+        **context,
+        'banners': snapshot('banners'),
+        'faq_categories': snapshot('faq_categories'),
+    })
 
 
 STOP_WORDS = {"best", "top", "places", "place", "near", "visit", "to", "trip", "trips", "treks", "trek"}
@@ -146,12 +132,15 @@ def search_suggestions(request):
 
     # Cache search suggestions for 30 minutes
     query_n = normalize_text(query)
-    cache_key = f"search_suggestions_{query_n}"
+    response_data = cached(
+        f"search_suggestions_{query_n}",
+        lambda: compute_search_suggestions(query, query_n),
+        60 * 30,
+    )
+    return JsonResponse(response_data)
 
-    cached_results = cache.get(cache_key)
-    if cached_results:
-        return JsonResponse(cached_results)
 
+def compute_search_suggestions(query, query_n):
     MAX_RESULTS = 8
     scored = []
 
@@ -205,47 +194,52 @@ def search_suggestions(request):
             "url": reverse("search_trek") + f"?q={query}",
         })
 
-    response_data = {"results": results}
-    cache.set(cache_key, response_data, 60 * 30) 
-    return JsonResponse(response_data)
+    return {"results": results}
 
 def about(request):
-    """Render about page with cached team members."""
-    cache_key = "about_page_team_members"
-    team_members = cache.get(cache_key)
-    
-    if not team_members:
-        team_members = TeamMember.objects.all().order_by('order')
-        cache.set(cache_key, team_members, 60 * 60)  # 1 hour
-    
+    """Render about page with team members."""
     return render(request, 'about.html', {
-        'team_members': team_members
+        'team_members': snapshot('team_members')
     })
 
 def blogs(request):
     """Render blogs page with pagination and caching."""
     page_number = request.GET.get('page', 1)
-    cache_key = f"blogs_page_{page_number}"
-    cached_page = cache.get(cache_key)
-    
-    if cached_page:
-        return render(request, 'blogs.html', {'blogs': cached_page})
-    
-    paginator = Paginator(
-        Blog.objects.only("id", "title", "slug", "created_at").order_by("-created_at"), 4)
-    page_obj = paginator.get_page(page_number)
-    
-    cache.set(cache_key, page_obj, 60 * 30) 
+
+    def compute():
+        paginator = Paginator(
+            Blog.objects.only("id", "title", "slug", "image_url", "summary", "created_at").order_by("-created_at"), 4)
+        return paginator.get_page(page_number)
+
+    page_obj = cached(f"blogs_page_{page_number}", compute, 60 * 30)
     return render(request, 'blogs.html', {
         'blogs': page_obj
     })
 
+BLOG_DETAIL_FIELDS = (
+    "id", "title", "slug", "author", "created_at", "image_url",
+    "summary", "content_html", "toc", "reading_minutes",
+)
+
+
 def blog_detail(request, slug):
-    blog = get_object_or_404(Blog, slug=slug)
-    all_recent = Blog.objects.exclude(id=blog.id).order_by('-created_at')
-    paginator = Paginator(all_recent, 4)
-    page_number = request.GET.get('page')
-    recent_blogs = paginator.get_page(page_number)
+    """Render a blog post from its precomputed HTML and TOC."""
+    page_number = request.GET.get('page', 1)
+    blog = cached(
+        f"blog_detail_{slug}",
+        lambda: get_object_or_404(Blog.objects.only(*BLOG_DETAIL_FIELDS), slug=slug),
+        60 * 60,
+    )
+
+    def recent():
+        all_recent = (
+            Blog.objects.exclude(id=blog.id)
+            .only("id", "title", "slug", "image_url", "created_at")
+            .order_by('-created_at')
+        )
+        return Paginator(all_recent, 4).get_page(page_number)
+
+    recent_blogs = cached(f"blog_detail_{slug}_recent_{page_number}", recent, 60 * 30)
     return render(request, 'blog_detail.html', {
         'blog': blog,
         'recent_blogs': recent_blogs
@@ -256,60 +250,44 @@ def treks(request):
     difficulty = request.GET.get('difficulty')
     page_number = request.GET.get('page', 1)
 
-    cache_key = f"treks_{page_number}_{category_id}_{difficulty}"
-    cached = cache.get(cache_key)
-    if cached:
-        return render(request, 'treks.html', cached)
-
-    qs = Trek.objects.all()
-    if category_id:
-        qs = qs.filter(category_id=category_id)
-    if difficulty:
-        qs = qs.filter(difficulty=difficulty)
-
-    paginator = Paginator(qs, 12)
-    page_obj = paginator.get_page(page_number)
-
-    context = {
-        'treks': page_obj,
-        'categories': get_trek_categories(),
-        'selected_category': category_id,
-        'selected_difficulty': difficulty,
-        'difficulty_choices': Trek.DIFFICULTY_CHOICES,
-    }
-
-    cache.set(cache_key, context, 60 * 30)
+    def compute():
+        qs = Trek.objects.all()
+        if category_id:
+            qs = qs.filter(category_id=category_id)
+        if difficulty:
+            qs = qs.filter(difficulty=difficulty)
+
+        paginator = Paginator(qs, 12)
+        page_obj = paginator.get_page(page_number)
+
+        return {
+            'treks': page_obj,
+            'categories': get_trek_categories(),
+            'selected_category': category_id,
+            'selected_difficulty': difficulty,
+            'difficulty_choices': Trek.DIFFICULTY_CHOICES,
+        }
+
+    context = cached(f"treks_{page_number}_{category_id}_{difficulty}", compute, 60 * 30)
     return render(request, 'treks.html', context)
 
 def trek_detail(request, slug):
     """Display detailed view of a trek with caching."""
-    cache_key = f"trek_detail_{slug}"
-    cached_data = cache.get(cache_key)
-    
-    if cached_data:
-        return render(request, 'trek_detail.html', cached_data)
-    
-    trek = get_object_or_404(Trek, slug=slug)
-    context = {
-        'trek': trek,
-        'testimonials': trek.testimonials.all(),
-        'similar_treks': Trek.objects.filter(category=trek.category).exclude(id=trek.id)[:3],
-    }
-    
-    cache.set(cache_key, context, 60 * 60)  # 1 hour
+    def compute():
+        trek = get_object_or_404(Trek, slug=slug)
+        return {
+            'trek': trek,
+            'testimonials': trek.testimonials.all(),
+            'similar_treks': Trek.objects.filter(category=trek.category).exclude(id=trek.id)[:3],
+        }
+
+    context = cached(f"trek_detail_{slug}", compute, 60 * 60)  # 1 hour
     return render(request, 'trek_detail.html', context)
 
 def safety(request):
-    """Render safety page with cached safety tips."""
-    cache_key = "safety_page_tips"
-    safety_tips = cache.get(cache_key)
-    
-    if not safety_tips:
-        safety_tips = SafetyTip.objects.all().order_by('order')
-        cache.set(cache_key, safety_tips, 60 * 60)  # 1 hour
-    
+    """Render safety page with safety tips."""
     return render(request, 'safety.html', {
-        'safety_tips': safety_tips
+        'safety_tips': snapshot('safety_tips')
     })
 
 def detect_trek_category(message: str):
@@ -435,18 +413,54 @@ def travel_your_way(request):
     })
 
 
+def browse(request):
+    """JSON treks matching ?state=&tag=&operator=&price=&duration=&day= (repeatable), with facet counts."""
+    filters = {facet: request.GET.getlist(facet) for facet in FACETS}
+    try:
+        page = int(request.GET.get("page", 1))
+    except ValueError:
+        page = 1
+    return JsonResponse(browse_treks(filters, page))
+
+
 def card_trek_detail(request, slug):
     """Display detailed view of a trek with related treks."""
-    trek = get_object_or_404(TrekList, id=slug)
-    related_treks = trek.related_treks.all() if hasattr(trek, "related_treks") else TrekList.objects.none()
-    
-    activities_list = [a.strip() for a in trek.activities.split(",")] if trek.activities else []
+    def compute():
+        trek = get_object_or_404(TrekList, id=slug)
+        # Precomputed neighbours (compute_recommendations), else the curated list
+        related_treks = [r.recommended for r in trek.recommendations.select_related("recommended")]
+        if not related_treks:
+            related_treks = trek.related_treks.all()
 
-    return render(request, "card_details.html", {
-        "trek": trek,
-        "related_treks": related_treks,
-        "activities_list": activities_list,
-    })
+        activities_list = [a.strip() for a in trek.activities.split(",")] if trek.activities else []
+
+        return {
+            "trek": trek,
+            "related_treks": list(related_treks),
+            "activities_list": activities_list,
+        }
+
+    context = cached(f"card_trek_detail_{slug}", compute, 60 * 60)
+    return render(request, "card_details.html", context)
+
+
+def sitemap(request, filename="sitemap.xml"):
+    """Serve a prebuilt sitemap file (see sitemaps.py), gzipped when the client accepts it."""
+    from .sitemaps import INDEX, build_sitemaps
+
+    path = os.path.join(settings.SITEMAP_ROOT, filename)
+    if filename == INDEX and not os.path.exists(path):
+        build_sitemaps()
+    gzipped = "gzip" in request.META.get("HTTP_ACCEPT_ENCODING", "") and os.path.exists(path + ".gz")
+    try:
+        response = FileResponse(open(path + ".gz" if gzipped else path, "rb"), content_type="application/xml")
+    except FileNotFoundError:
+        raise Http404(filename)
+    if gzipped:
+        response["Content-Encoding"] = "gzip"
+    response["Vary"] = "Accept-Encoding"
+    response["Cache-Control"] = f"public, max-age={settings.SITEMAP_MAX_AGE}"
+    return response
 
 
 def privacy_policy(request):
@@ -0,0 +1,157 @@
+"""
+Cache warmup: requests every page whose context is cached so that a fresh
+worker (empty LocMemCache) doesn't make its first visitors pay for the
+paginator counts, FAQ grouping and card rendering.
+
+Pages are fetched through Django's own WSGI handler, so view caches and the
+full-page cache are filled exactly as a real request would fill them, or
+over HTTP against a running deployment with ``base_url``. Fetching in
+process only helps the process itself (a gunicorn worker warming at boot) or
+every process when the cache is shared, see ``has_shared_cache()``. Requests
+carry the rate limiter's exemption header, so the search suggestions aren't
+throttled after the first few.
+"""
+import logging
+import math
+import time
+import urllib.error
+import urllib.request
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.handlers.wsgi import WSGIHandler
+from django.test import RequestFactory
+from django.urls import reverse
+
+from aorbo_project.rate_limit import EXEMPT_HEADER, exempt_token
+
+from .models import Blog, Trek, TrekCategory, TrekList
+
+logger = logging.getLogger(__name__)
+
+
+def _url(name, *args, **params):
+    url = reverse(name, args=args)
+    params = {k: v for k, v in params.items() if v is not None}
+    return f"{url}?{urlencode(params)}" if params else url
+
+
+def _pages(count, per_page):
+    """Values for ?page=, with None for the bare URL most visitors land on."""
+    last = min(max(1, math.ceil(count / per_page)), settings.WARMUP_MAX_PAGES)
+    return [None] + list(range(2, last + 1))
+
+
+def has_shared_cache():
+    """False when the default cache lives in this process only (or nowhere)."""
+    return not isinstance(caches["default"], (LocMemCache, DummyCache))
+
+
+def suggestion_prefixes(limit):
+    """Most common 2-4 character name prefixes, the queries the search box sends first."""
+    counts = Counter()
+    for name in TrekList.objects.values_list("name", flat=True).iterator():
+        name = (name or "").lower().strip()
+        # The view strips the query, so "ab " would only re-warm "ab".
+        prefixes = {name[:length].rstrip() for length in (2, 3, 4) if len(name) >= length}
+        counts.update(prefix for prefix in prefixes if len(prefix) >= 2)
+    return [prefix for prefix, _ in counts.most_common(limit)]
+
+
+def warmup_urls():
+    """URLs to warm, most valuable first so a tight time budget still covers the hot pages."""
+    urls = [_url("home", page=page) for page in _pages(TrekList.objects.count(), 8)]
+    urls += [_url("about"), _url("safety")]
+    urls += [_url("blogs", page=page) for page in _pages(Blog.objects.count(), 4)]
+
+    urls += [_url("treks", page=page) for page in _pages(Trek.objects.count(), 12)]
+    categories = [None] + [str(pk) for pk in TrekCategory.objects.values_list("pk", flat=True)]
+    difficulties = [None] + [value for value, _ in Trek.DIFFICULTY_CHOICES]
+    urls += [
+        _url("treks", category=category, difficulty=difficulty)
+        for category in categories
+        for difficulty in difficulties
+        if category or difficulty
+    ]
+
+    urls += [_url("card_trek_detail", pk) for pk in TrekList.objects.values_list("pk", flat=True).iterator()]
+    urls += [_url("trek_detail", slug) for slug in Trek.objects.values_list("slug", flat=True).iterator()]
+    urls += [
+        _url("search_suggestions", q=prefix)
+        for prefix in suggestion_prefixes(settings.WARMUP_SUGGESTION_PREFIXES)
+    ]
+    return list(dict.fromkeys(urls))
+
+
+class LocalFetcher:
+    """Runs requests through this process's WSGI handler, filling its caches."""
+
+    def __init__(self, host=None):
+        self.handler = WSGIHandler()
+        self.factory = RequestFactory()
+        self.host = host or settings.WARMUP_HOST
+        self.headers = {EXEMPT_HEADER: exempt_token()}
+
+    def get(self, url):
+        """Return ``(status, body)`` for a GET of ``url``."""
+        environ = self.factory.get(url, secure=True, HTTP_HOST=self.host, headers=self.headers).environ
+        status = []
+        response = self.handler(environ, lambda s, headers, exc_info=None: status.append(s))
+        try:
+            body = b"".join(response)
+        finally:
+            # Fires request_finished, which returns the thread's DB connection.
+            response.close()
+        return int(status[0].split()[0]), body
+
+    def __call__(self, url):
+        return self.get(url)[0]
+
+
+class HttpFetcher:
+    """Requests pages from a running deployment."""
+
+    def __init__(self, base_url, timeout=30):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.headers = {"Accept-Encoding": "gzip", EXEMPT_HEADER: exempt_token()}
+
+    def __call__(self, url):
+        request = urllib.request.Request(self.base_url + url, headers=self.headers)
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                response.read()
+                return response.status
+        except urllib.error.HTTPError as exc:
+            return exc.code
+
+
+def warm(urls, fetch, workers=None, budget=None):
+    """
+    Fetch ``urls`` with ``workers`` threads, starting no new request once
+    ``budget`` seconds have passed. Returns a dict of counts by outcome.
+    """
+    workers = workers or settings.WARMUP_WORKERS
+    budget = settings.WARMUP_TIME_BUDGET if budget is None else budget
+    deadline = time.monotonic() + budget
+
+    def visit(url):
+        if time.monotonic() > deadline:
+            return "skipped"
+        try:
+            status = fetch(url)
+        except Exception:
+            logger.exception("Warmup request for %s failed", url)
+            return "failed"
+        if status >= 400:
+            logger.warning("Warmup request for %s returned %s", url, status)
+            return "failed"
+        return "warmed"
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return Counter(executor.map(visit, urls))